@@ -22,21 +22,71 @@ class Config:
     BASE_DIR = None
     SESSIONS_DIR = None
     PROGRESS_DIR = None
+    PROGRESS_DB = None
+    MESSAGE_MAP_DB = None
+    INTENT_LOG_DB = None
     ACCOUNTS_FILE = None
     TRANSFERS_FILE = None
+    RATE_PROFILES_FILE = None
+    COOLDOWN_FILE = None
     
     # Telegram Rate Limiting
-    MAX_MESSAGES_PER_MINUTE = int(os.getenv("MAX_MSG_PER_MIN", "20"))
-    SMART_DELAY_MIN = int(os.getenv("DELAY_MIN", "2"))
-    SMART_DELAY_MAX = int(os.getenv("DELAY_MAX", "8"))
+    MAX_MESSAGES_PER_MINUTE = int(os.getenv("MAX_MSG_PER_MIN", "20"))  # Whole process
+    MAX_MESSAGES_PER_MINUTE_PER_ACCOUNT = int(os.getenv("MAX_MSG_PER_MIN_ACCOUNT", "20"))  # Each account (0 = off)
+    MAX_MESSAGES_PER_MINUTE_PER_TARGET = int(os.getenv("MAX_MSG_PER_MIN_TARGET", "20"))  # Each (account, target) (0 = off)
+    RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "3"))  # Sends allowed back-to-back after idle
+    SMART_DELAY_MIN = int(os.getenv("DELAY_MIN", "2"))  # Delay a new account starts at
+    SMART_DELAY_MAX = int(os.getenv("DELAY_MAX", "8"))  # Upper bound of the adaptive delay
+
+    # Adaptive Pacing (per-account AIMD delay between sends)
+    PACING_INITIAL_DELAY = float(SMART_DELAY_MIN)
+    PACING_MIN_DELAY = float(os.getenv("PACING_MIN_DELAY", "0.5"))  # Lower bound of the adaptive delay
+    PACING_MAX_DELAY = float(SMART_DELAY_MAX)
+    PACING_STEP = 0.1  # Seconds taken off the delay per successful send
+    PACING_BACKOFF = 2.0  # Delay multiplier on FloodWait
+    PACING_SLOW_BACKOFF = 1.5  # Delay multiplier on a slow response
+    PACING_SLOW_RESPONSE = 5.0  # Send taking longer than this (seconds) counts as slow
+    PACING_ERROR_WINDOW = 20  # Sends the recent error rate is averaged over
+
+    # Fair Queuing (global send capacity split across sessions)
+    FAIR_DEFAULT_WEIGHT = 1.0  # Session weight unless the transfer config sets 'weight'
+    FAIR_LIVE_PRIORITY = 1  # Default priority of live sessions (others get 0)
+    FAIR_MAX_WAIT = 120  # Seconds a send waits at most before it is served out of order
+    FAIR_SHARE_WINDOW = 100  # Recent sends each session's reported share is computed over
+
+    # Rate Profiles (per-account limits)
+    RATE_PROFILE = os.getenv("RATE_PROFILE", "")  # Preset for accounts without a profile: safe/balanced/aggressive
+    CALIBRATION_START_RATE = 10  # Messages per minute calibration starts probing at
+    CALIBRATION_MAX_RATE = 120  # Calibration stops ramping here
     
     # Transfer Settings
     DEFAULT_TRANSFER_METHOD = "download_upload"
-    MAX_CONCURRENT_TRANSFERS = 5
-    
+    MAX_CONCURRENT_TRANSFERS = int(os.getenv("MAX_CONCURRENT_TRANSFERS", "5"))  # More sessions wait in a queue
+
+    # Transfer Pipeline (scanner -> bounded queue -> sender workers)
+    TRANSFER_QUEUE_SIZE = int(os.getenv("TRANSFER_QUEUE_SIZE", "100"))  # Scanner blocks when queue is full
+    TRANSFER_SENDER_WORKERS = int(os.getenv("TRANSFER_WORKERS", "1"))  # 1 keeps target order identical to source
+    TRANSFER_STATUS_INTERVAL = 20  # Report status every N processed messages
+    FORWARD_BATCH_SIZE = 100  # Telegram accepts up to 100 message IDs per forward request
+    COPY_VIA_FORWARD = os.getenv("COPY_VIA_FORWARD", "1") == "1"  # Copy mode uses batched drop-author forwards
+    PARALLEL_ACCOUNTS = os.getenv("PARALLEL_ACCOUNTS", "0") == "1"  # One sender per account (may reorder target)
+    MAX_INFLIGHT_MEDIA_BYTES = int(os.getenv("MAX_INFLIGHT_MEDIA_MB", "64")) * 1024 * 1024  # All sessions together
+    SYNC_CHUNK_SIZE = 100  # Mapped messages checked per get_messages call (edit/delete sync)
+    INTENT_RECONCILE_LIMIT = 200  # Recent target messages checked for sends cut short by a crash
+    LIVE_ALBUM_WAIT = 1.0  # Live mode: seconds to wait for more members of an album
+
+    # Scheduled catch-up (re-runs saved jobs instead of holding a live connection)
+    CATCHUP_INTERVAL = int(os.getenv("CATCHUP_INTERVAL", "3600"))  # Default seconds between runs of a job
+    CATCHUP_TICK = 30  # Seconds between checks for due jobs
+    CATCHUP_ACCOUNT_STAGGER = int(os.getenv("CATCHUP_ACCOUNT_STAGGER", "120"))  # Min seconds between job starts on one account
+    CATCHUP_JITTER = 60  # Max random seconds added to each next run
+
     # Progress Settings
-    MAX_PROGRESS_ITEMS = 10000  # Limit progress file size
     PROGRESS_SAVE_INTERVAL = 10  # Save every N messages
+    PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "2"))  # Seconds between background flushes
+    PROGRESS_FLUSH_EVERY = 50  # Flush early once N progress updates are pending
+    PROGRESS_COMPACT_THRESHOLD = 1000  # Fold journal into snapshot after N records
+    PROGRESS_BACKEND = os.getenv("PROGRESS_BACKEND", "json")  # "json" (files) or "sqlite"
     
     # File Types
     SUPPORTED_FILE_TYPES = {
@@ -60,9 +110,14 @@ class Config:
         cls.BASE_DIR = base_dir
         cls.SESSIONS_DIR = os.path.join(base_dir, 'sessions')
         cls.PROGRESS_DIR = os.path.join(base_dir, 'progress')
+        cls.PROGRESS_DB = os.path.join(base_dir, 'progress.db')
+        cls.MESSAGE_MAP_DB = os.path.join(base_dir, 'message_map.db')
+        cls.INTENT_LOG_DB = os.path.join(base_dir, 'intents.db')
         cls.DOWNLOADS_DIR = os.path.join(base_dir, 'downloads') # New download dir
         cls.ACCOUNTS_FILE = os.path.join(base_dir, 'accounts.json')
         cls.TRANSFERS_FILE = os.path.join(base_dir, 'transfers.json')
+        cls.RATE_PROFILES_FILE = os.path.join(base_dir, 'rate_profiles.json')
+        cls.COOLDOWN_FILE = os.path.join(base_dir, 'cooldowns.json')
         
         # Create directories
         os.makedirs(cls.SESSIONS_DIR, exist_ok=True)
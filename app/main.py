@@ -15,7 +15,14 @@ from kivymd.app import MDApp
 from app.config import Config
 from app.managers.account_manager import AccountManager
 from app.managers.progress_manager import ProgressManager
+from app.managers.sqlite_progress_manager import SQLiteProgressManager
+from app.managers.message_map import MessageMap
+from app.managers.intent_log import IntentLog
+from app.managers.rate_profiles import RateProfiles
+from app.managers.cooldown_store import CooldownStore
 from app.managers.transfer_manager import TransferManager
+from app.managers.download_manager import DownloadManager
+from app.managers.job_scheduler import JobScheduler
 from app.screens.accounts_screen import AccountsScreen
 from app.screens.action_screen import ActionScreen
 from app.screens.transfer_screen import TransferScreen
@@ -60,11 +67,35 @@ class TelegramBackupApp(MDApp):
             Config.SESSIONS_DIR
         )
         
-        self.progress_manager = ProgressManager(
-            Config.PROGRESS_DIR
+        if Config.PROGRESS_BACKEND == "sqlite":
+            # Imports existing JSON progress on first run
+            self.progress_manager = SQLiteProgressManager(
+                Config.PROGRESS_DB,
+                Config.PROGRESS_DIR
+            )
+        else:
+            self.progress_manager = ProgressManager(
+                Config.PROGRESS_DIR
+            )
+        
+        self.message_map = MessageMap(Config.MESSAGE_MAP_DB)
+        self.intent_log = IntentLog(Config.INTENT_LOG_DB)
+        
+        self.rate_profiles = RateProfiles(Config.RATE_PROFILES_FILE)
+        
+        # FloodWaits still running from before a restart are restored on init
+        self.transfer_manager = TransferManager(
+            self.progress_manager, self.message_map, self.intent_log, self.rate_profiles,
+            CooldownStore(Config.COOLDOWN_FILE)
         )
         
-        self.transfer_manager = TransferManager()
+        # Periodic catch-up of saved jobs (for setups that can't stay connected)
+        self.job_scheduler = JobScheduler(
+            Config.TRANSFERS_FILE,
+            self.account_manager,
+            self.transfer_manager,
+            DownloadManager()
+        )
         
         # Create screen manager
         sm = ScreenManager()
@@ -114,12 +145,26 @@ class TelegramBackupApp(MDApp):
         """Called when app starts"""
         logger.info("App started")
         add_breadcrumb("App on_start")
+        
+        try:
+            self.job_scheduler.start()
+        except RuntimeError as e:
+            # No running event loop to schedule on
+            logger.warning(f"Job scheduler not started: {e}")
     
     def on_stop(self):
         """Called when app stops"""
         logger.info("App stopped")
         add_breadcrumb("App on_stop")
         
+        self.job_scheduler.stop()
+
+        # Write out buffered progress before the process goes away
+        self.progress_manager.flush()
+        self.message_map.flush()
+        self.intent_log.flush()
+        self.transfer_manager.save_cooldowns()
+        
         # Disconnect all accounts
         import asyncio
         for account in self.account_manager.get_connected_accounts():
@@ -5,10 +5,22 @@ Contains all business logic managers
 
 from .account_manager import AccountManager
 from .progress_manager import ProgressManager
+from .sqlite_progress_manager import SQLiteProgressManager
 from .transfer_manager import TransferManager
+from .message_map import MessageMap
+from .intent_log import IntentLog
+from .job_scheduler import JobScheduler
+from .rate_profiles import RateProfiles
+from .cooldown_store import CooldownStore
 
 __all__ = [
     'AccountManager',
     'ProgressManager', 
-    'TransferManager'
+    'SQLiteProgressManager',
+    'TransferManager',
+    'MessageMap',
+    'IntentLog',
+    'JobScheduler',
+    'RateProfiles',
+    'CooldownStore'
 ]
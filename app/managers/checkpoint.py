@@ -0,0 +1,122 @@
+"""
+Transfer Checkpoint
+Tracks the contiguous processed watermark of a transfer and saves it
+through ProgressManager
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from ..config import Config
+from ..utils.logger import logger
+
+
+class CheckpointTracker:
+    """
+    Resume point for one source -> target transfer
+
+    Message IDs are registered in scan order and marked processed by the
+    senders (possibly out of order when several senders run). The
+    watermark is the highest ID such that every scanned ID up to it is
+    processed, so a restart from the watermark never skips work. IDs
+    sent above the watermark are remembered so they are not re-sent;
+    those at or below it are dropped.
+
+    Intents of finished sends (see IntentLog) are held here until a
+    saved checkpoint covers their IDs; the engine resolves them once that
+    checkpoint is flushed.
+    """
+
+    def __init__(self, progress_manager, source_key: str, target_key: str,
+                 save_interval: int = None):
+        """
+        Initialize tracker from saved progress
+
+        Args:
+            progress_manager: ProgressManager used for load/save
+            source_key: Source channel ID
+            target_key: Target channel ID
+            save_interval: Save every N processed messages (default Config.PROGRESS_SAVE_INTERVAL)
+        """
+        self.progress_manager = progress_manager
+        self.source_key = source_key
+        self.target_key = target_key
+        self.save_interval = save_interval or Config.PROGRESS_SAVE_INTERVAL
+
+        progress = progress_manager.load_progress(source_key, target_key)
+        self.watermark = progress.get('last_message_id', 0) or 0
+        self.sent_ids = progress['sent_message_ids']  # IntervalSet
+        self.base_sent = progress.get('total_sent', 0)
+        self.base_skipped = progress.get('total_skipped', 0)
+
+        self._pending = deque()  # scanned IDs not yet below the watermark, in scan order
+        self._done = set()
+        self._since_save = 0
+        self._intents: List[int] = []  # finished sends not covered by a saved checkpoint
+        self._unsaved: List[int] = []  # IDs sent since the last save
+
+    def already_sent(self, message_id: int) -> bool:
+        """True if this message was already sent (or passed by the watermark)"""
+        return message_id <= self.watermark or message_id in self.sent_ids
+
+    def scanned(self, message_ids: Iterable[int]):
+        """Register IDs handed to the senders (in scan order)"""
+        self._pending.extend(message_ids)
+
+    def mark_sent(self, message_ids: Iterable[int]):
+        """Remember IDs that actually reached the target"""
+        for message_id in message_ids:
+            if self.sent_ids.add(message_id):
+                self._unsaved.append(message_id)
+
+    def processed(self, message_ids: Iterable[int]):
+        """Mark IDs as handled (sent, skipped or failed) and advance the watermark"""
+        for message_id in message_ids:
+            self._done.add(message_id)
+            self._since_save += 1
+        while self._pending and self._pending[0] in self._done:
+            message_id = self._pending.popleft()
+            self._done.discard(message_id)
+            self.watermark = max(self.watermark, message_id)
+
+    def defer_intent(self, intent_id: int):
+        """Keep a finished send's intent until a checkpoint covering it is saved"""
+        self._intents.append(intent_id)
+
+    def take_intents(self) -> List[int]:
+        """Intents covered by the checkpoint just saved (the caller resolves them once flushed)"""
+        intents, self._intents = self._intents, []
+        return intents
+
+    def maybe_save(self, stats: Dict) -> bool:
+        """Save if at least save_interval messages were processed since the last save"""
+        if self._since_save < self.save_interval:
+            return False
+        return self.save(stats)
+
+    def save(self, stats: Optional[Dict] = None) -> bool:
+        """
+        Persist watermark, newly sent IDs and totals
+
+        Only the IDs sent since the last save are appended to the progress
+        journal; the progress manager rewrites the full record when it
+        compacts.
+
+        Args:
+            stats: Session stats (totals are added to the saved base)
+        """
+        stats = stats or {}
+        self._since_save = 0
+        self.sent_ids.remove_below(self.watermark + 1)
+        unsaved, self._unsaved = self._unsaved, []
+        saved = self.progress_manager.append_progress(
+            self.source_key, self.target_key,
+            unsaved,
+            self.watermark,
+            self.base_sent + stats.get('total_sent', 0),
+            self.base_skipped + stats.get('total_skipped', 0)
+        )
+        if saved:
+            logger.debug(f"Checkpoint {self.source_key}->{self.target_key} at ID {self.watermark}")
+        else:
+            self._unsaved = unsaved + self._unsaved  # retried with the next save
+        return saved
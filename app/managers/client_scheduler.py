@@ -0,0 +1,87 @@
+"""
+Client Scheduler
+Picks the next sending account, skipping accounts under FloodWait or pacing
+"""
+import heapq
+import itertools
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from telethon import TelegramClient
+
+
+class ClientScheduler:
+    """
+    Min-heap of accounts keyed by next-available time
+
+    The heap holds (available_at, seq, account_key). A picked account is
+    pushed back with the current time, so free accounts rotate round-robin
+    (seq breaks ties in FIFO order). FloodWait release times live in a
+    shared dict keyed by account, so every scheduler over the same
+    account sees them; they are applied lazily when the account reaches
+    the top of the heap. With a pacer, an account is likewise not picked
+    again before its pacing delay since the last pick has passed.
+    """
+
+    def __init__(self, clients: Dict[str, TelegramClient], flood_wait: Dict[str, float] = None,
+                 clock: Callable[[], float] = time.monotonic, pacer=None):
+        """
+        Initialize scheduler
+
+        Args:
+            clients: account_key -> client
+            flood_wait: Shared account_key -> monotonic release time
+            clock: Monotonic time source (injectable for tests)
+            pacer: Optional shared AccountPacer spacing each account's sends
+        """
+        self.clients = dict(clients)
+        self.flood_wait = flood_wait if flood_wait is not None else {}
+        self.clock = clock
+        self.pacer = pacer
+        self._seq = itertools.count()
+        self._heap: List[Tuple[float, int, str]] = [(0.0, next(self._seq), key) for key in self.clients]
+        heapq.heapify(self._heap)
+
+    def next_client(self) -> Tuple[Optional[TelegramClient], float]:
+        """
+        Pick the account that is free soonest
+
+        Returns:
+            Tuple[Optional[TelegramClient], float]: (client, 0) when one is free now,
+            (None, seconds until the earliest is free) otherwise, (None, 0) if empty
+        """
+        if not self._heap:
+            return None, 0.0
+
+        now = self.clock()
+        while True:
+            available_at, _, key = self._heap[0]
+            release = self.flood_wait.get(key, 0.0)
+            if self.pacer:
+                release = max(release, self.pacer.next_send_at(key))
+            if release > available_at:
+                # FloodWait (or pacing gap) recorded since this entry was pushed
+                heapq.heapreplace(self._heap, (release, next(self._seq), key))
+                continue
+            break
+
+        if available_at > now:
+            return None, available_at - now
+
+        if key in self.flood_wait and self.flood_wait[key] <= now:
+            del self.flood_wait[key]
+        heapq.heapreplace(self._heap, (now, next(self._seq), key))
+        if self.pacer:
+            self.pacer.mark_sent(key, now)
+        return self.clients[key], 0.0
+
+    def report_flood_wait(self, account_key: str, seconds: float) -> float:
+        """
+        Record a FloodWait for an account
+
+        Returns:
+            float: Monotonic release time
+        """
+        release = self.clock() + seconds
+        self.flood_wait[account_key] = max(self.flood_wait.get(account_key, 0.0), release)
+        return self.flood_wait[account_key]
@@ -0,0 +1,92 @@
+"""
+Cooldown Store
+Keeps FloodWait/cooldown and pacing state of accounts across restarts
+"""
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict
+
+from ..utils.logger import logger, capture_exception
+
+
+class CooldownStore:
+    """
+    JSON file with each account's and (account, target) pair's cooldown state
+
+    Release times are stored as wall-clock (Unix) times, because the
+    monotonic clock the schedulers use restarts with the process.
+    Expired cooldowns are dropped on load.
+
+    Layout:
+        accounts: account_key -> {flood_wait_until, delay, error_rate}
+        targets: "account_key|target_key" -> cooldown_until
+    """
+
+    def __init__(self, state_file: str):
+        """
+        Initialize Cooldown Store
+
+        Args:
+            state_file: Path to the state JSON file
+        """
+        self.state_file = state_file
+
+    def load(self) -> Dict:
+        """
+        Load saved state, without cooldowns that already ended
+
+        Returns:
+            Dict: {'accounts': {...}, 'targets': {...}} (empty if none saved)
+        """
+        state = {'accounts': {}, 'targets': {}}
+        if not os.path.exists(self.state_file):
+            return state
+
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading cooldown state: {e}")
+            capture_exception(e, extra_data={"state_file": self.state_file})
+            return state
+
+        now = time.time()
+        for key, account in data.get('accounts', {}).items():
+            account = dict(account)
+            if (account.get('flood_wait_until') or 0) <= now:
+                account.pop('flood_wait_until', None)
+            state['accounts'][key] = account
+        state['targets'] = {
+            pair: until for pair, until in data.get('targets', {}).items() if until > now
+        }
+        return state
+
+    def save(self, state: Dict) -> bool:
+        """
+        Save state (atomically)
+
+        Args:
+            state: {'accounts': {...}, 'targets': {...}}
+
+        Returns:
+            bool: True if saved successfully
+        """
+        try:
+            data = {
+                'accounts': state.get('accounts', {}),
+                'targets': state.get('targets', {}),
+                'last_updated': datetime.now().isoformat()
+            }
+            tmp_path = f'{self.state_file}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.state_file)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving cooldown state: {e}")
+            capture_exception(e, extra_data={"state_file": self.state_file})
+            return False
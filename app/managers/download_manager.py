@@ -14,6 +14,8 @@ import telethon.utils
 
 from app.config import Config
 from app.utils.logger import logger, capture_exception, add_breadcrumb
+from app.utils.byte_budget import get_media_budget
+from app.utils.helpers import RELAY_CHUNK_SIZE
 
 from .base_session import BaseSession
 
@@ -22,7 +24,9 @@ class DownloadSession(BaseSession):
     def __init__(self, session_id):
         super().__init__(session_id)
         self.stats.update({
-            'total_downloaded': 0
+            'total_downloaded': 0,
+            'inflight_bytes': 0,
+            'peak_inflight_bytes': 0
         })
 
 class DownloadManager:
@@ -43,15 +47,26 @@ class DownloadManager:
     def get_session(self, session_id: str) -> Optional[DownloadSession]:
         return self.sessions.get(session_id)
 
-    async def download_channel(self, session_id: str, client: TelegramClient, source, file_types: Dict, status_callback):
+    async def download_channel(self, session_id: str, client: TelegramClient, source, file_types: Dict, status_callback,
+                               min_id: int = 0) -> Optional[int]:
         """
         Main download loop
+
+        Args:
+            min_id: Only download messages after this ID (incremental catch-up)
+
+        Returns:
+            Optional[int]: Highest message ID up to which every message was
+            handled (min_id if none), None if the session is unknown. A failed
+            download holds it back, so the next incremental run retries it.
         """
         session = self.get_session(session_id)
         if not session:
             logger.error(f"Session {session_id} not found")
-            return
+            return None
 
+        last_id = min_id
+        failed = False  # A download failed: last_id stays before it
         try:
             # 1. Resolve Entity
             status_callback("Resolving channel...")
@@ -59,7 +74,7 @@ class DownloadManager:
             entity = await self._get_entity_robust(client, source)
             if not entity:
                 status_callback("Error: Could not find channel")
-                return
+                return last_id
 
             # 2. Iterate
             status_callback("Scanning messages...")
@@ -72,14 +87,19 @@ class DownloadManager:
             add_breadcrumb("download", "Download directory created", "info", {"session_id": session_id, "save_path": save_path})
             
             count = 0
-            async for message in client.iter_messages(entity, reverse=True): # Oldest to newest
+            kwargs = {'reverse': True}  # Oldest to newest
+            if min_id > 0:
+                kwargs['min_id'] = min_id
+            async for message in client.iter_messages(entity, **kwargs):
                 if not session.is_running:
                     status_callback("Stopped by user")
                     break
 
                 # Filter
                 if not self._should_download(message, file_types):
-                    session.total_skipped += 1
+                    session.stats['total_skipped'] += 1
+                    if not failed:
+                        last_id = message.id
                     continue
 
                 # Download
@@ -90,16 +110,19 @@ class DownloadManager:
                     if message.text and file_types.get('text') and not message.media:
                          with open(os.path.join(save_path, f"msg_{message.id}.txt"), "w", encoding='utf-8') as f:
                              f.write(message.text)
-                         session.total_downloaded += 1
+                         session.stats['total_downloaded'] += 1
                     
                     # Media
                     elif message.media:
                         filename = f"{message.id}"
-                        path = await client.download_media(message, file=os.path.join(save_path, filename))
+                        # Shares the media budget with relaying transfer sessions
+                        async with get_media_budget().reserve(2 * RELAY_CHUNK_SIZE, session.stats):
+                            path = await client.download_media(message, file=os.path.join(save_path, filename))
                         if path:
-                            session.total_downloaded += 1
+                            session.stats['total_downloaded'] += 1
                         else:
-                            session.total_errors += 1
+                            session.stats['total_errors'] += 1
+                            failed = True
                             
                     # Rate Limit
                     await asyncio.sleep(random.uniform(1.0, 3.0))
@@ -107,23 +130,28 @@ class DownloadManager:
                 except Exception as e:
                     logger.error(f"Download error msg {message.id}: {e}")
                     capture_exception(e, extra_data={"message_id": message.id, "session_id": session_id, "context": "download_message"})
-                    session.total_errors += 1
+                    session.stats['total_errors'] += 1
+                    failed = True
                 
+                if not failed:
+                    last_id = message.id
                 count += 1
                 if count % 5 == 0:
-                    status_callback(f"Downloaded: {session.total_downloaded} | Errors: {session.total_errors}")
+                    status_callback(f"Downloaded: {session.stats['total_downloaded']} | Errors: {session.stats['total_errors']}")
 
             status_callback(f"Complete! Saved to {safe_name}_{session_id}")
             add_breadcrumb("download", "Download completed", "info", {
                 "session_id": session_id,
-                "total_downloaded": session.total_downloaded,
-                "total_errors": session.total_errors
+                "total_downloaded": session.stats['total_downloaded'],
+                "total_errors": session.stats['total_errors']
             })
             
         except Exception as e:
             logger.error(f"Download fatal error: {e}")
             capture_exception(e, extra_data={"session_id": session_id, "source": str(source), "context": "download_channel"})
             status_callback(f"Error: {e}")
+
+        return last_id
             
     def _should_download(self, message, file_types):
         """Check if message matches selected file types"""
@@ -0,0 +1,149 @@
+"""
+Fair Queue
+Weighted fair queuing of the shared send capacity across transfer sessions
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from ..config import Config
+
+
+class FairQueue:
+    """
+    Hands out the tokens of one shared bucket to sessions by weight
+
+    Weighted fair queuing with virtual finish times: each request of a
+    session is tagged `max(virtual time, session's last tag) + 1/weight`
+    and tokens go to the smallest tag, so backlogged sessions get
+    capacity in proportion to their weights no matter how many requests
+    each one queues. Higher `priority` classes are served first.
+
+    Starvation guarantee: a request waiting longer than `max_wait`
+    seconds is served next regardless of priority and weight.
+
+    The order only applies among queued requests: a request arriving
+    while nothing is queued takes a free token at once, whatever its
+    priority (the capacity would otherwise go unused).
+    """
+
+    def __init__(self, max_wait: float = None, window: int = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize queue
+
+        Args:
+            max_wait: Longest wait before a request jumps the order
+            window: Number of recent grants the reported shares cover
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.max_wait = Config.FAIR_MAX_WAIT if max_wait is None else max_wait
+        self.clock = clock
+        self.weights: Dict[str, float] = {}
+        self.priorities: Dict[str, int] = {}
+        self._finish: Dict[str, float] = {}  # session_key -> finish tag of its last request
+        self._vtime = 0.0
+        self._seq = itertools.count()
+        # (-priority, finish, seq, start tag, enqueued_at, session_key, future)
+        self._heap: List[tuple] = []
+        self._recent = deque(maxlen=Config.FAIR_SHARE_WINDOW if window is None else window)
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def register(self, session_key: str, weight: float = 1.0, priority: int = 0):
+        """
+        Set a session's weight and priority class
+
+        Args:
+            session_key: Session ID
+            weight: Relative share of the capacity within its priority class
+            priority: Higher classes are served first
+        """
+        self.weights[session_key] = max(weight, 0.01)
+        self.priorities[session_key] = priority
+
+    def unregister(self, session_key: str):
+        self.weights.pop(session_key, None)
+        self.priorities.pop(session_key, None)
+        self._finish.pop(session_key, None)
+
+    def share(self, session_key: str) -> float:
+        """Fraction of the recent grants that went to a session"""
+        if not self._recent:
+            return 0.0
+        return sum(1 for key in self._recent if key == session_key) / len(self._recent)
+
+    def shares(self) -> Dict[str, float]:
+        """Recent share of every session that got capacity"""
+        return {key: self.share(key) for key in set(self._recent)}
+
+    def _tag(self, session_key: str):
+        start = max(self._vtime, self._finish.get(session_key, 0.0))
+        finish = start + 1.0 / self.weights.get(session_key, 1.0)
+        self._finish[session_key] = finish
+        return start, finish
+
+    def _grant(self, session_key: str, start_tag: float):
+        self._vtime = max(self._vtime, start_tag)
+        self._recent.append(session_key)
+
+    async def acquire(self, session_key: str, bucket) -> float:
+        """
+        Wait for a token of the shared bucket in fair order
+
+        Args:
+            session_key: Requesting session
+            bucket: Shared TokenBucket
+
+        Returns:
+            float: Seconds waited
+        """
+        started = self.clock()
+        start_tag, finish = self._tag(session_key)
+
+        if not self._heap:
+            # Nobody queued: take a free token right away
+            if bucket.reserve() <= 0:
+                self._grant(session_key, start_tag)
+                return 0.0
+            bucket.refund()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (
+            -self.priorities.get(session_key, 0), finish, next(self._seq), start_tag, started, session_key, future
+        ))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch(bucket))
+
+        await future
+        return self.clock() - started
+
+    def _pop_next(self) -> Optional[tuple]:
+        """Next live request: the longest-waiting one if overdue, else by priority and tag"""
+        while self._heap:
+            oldest = min(self._heap, key=lambda entry: entry[4])
+            if self.clock() - oldest[4] >= self.max_wait:
+                self._heap.remove(oldest)
+                heapq.heapify(self._heap)
+                entry = oldest
+            else:
+                entry = heapq.heappop(self._heap)
+            if not entry[6].done():  # Skip requests whose waiter was cancelled
+                return entry
+        return None
+
+    async def _dispatch(self, bucket):
+        """Release queued requests one token at a time"""
+        while self._heap:
+            wait = bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            entry = self._pop_next()
+            if entry is None:
+                bucket.refund()
+                return
+            _, _, _, start_tag, _, session_key, future = entry
+            self._grant(session_key, start_tag)
+            future.set_result(None)
@@ -0,0 +1,176 @@
+"""
+Intent Log
+Write-ahead record of sends in flight, for exactly-once resume
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional
+
+from ..utils.logger import logger, add_breadcrumb
+from ..utils.sqlite_writer import BackgroundWriter, connect_wal
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS intents (
+    intent_id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    source_ids TEXT NOT NULL,
+    fingerprints TEXT NOT NULL,
+    created REAL NOT NULL,
+    after_target_id INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_intents_key ON intents(key, created);
+CREATE TABLE IF NOT EXISTS marks (
+    key TEXT PRIMARY KEY,
+    target_id INTEGER NOT NULL
+);
+"""
+
+
+class IntentLog:
+    """
+    Sends that were started but not confirmed
+
+    The engine writes an intent (source IDs + content fingerprints)
+    before each send RPC and deletes it once a flushed checkpoint records
+    the sent IDs (see CheckpointTracker). An intent
+    that survives a restart means the app died mid-send: the message may
+    or may not have reached the target, and the engine reconciles it
+    against the target's recent messages before re-sending.
+
+    Each intent also stores the newest target message known when it was
+    written: its own copy can only be newer, which keeps reconciling from
+    claiming earlier copies of identical content. The per-pair mark is the
+    newest target copy of a resolved send, the starting bound of the next run.
+
+    Intents from concurrent senders are committed together by the
+    background writer (group commit), so the extra write per send costs
+    one shared transaction rather than one each.
+    """
+
+    WRITE_BATCH = 200  # Max queued writes committed in one transaction
+
+    def __init__(self, db_path: str):
+        """
+        Initialize Intent Log
+
+        Args:
+            db_path: Database file path
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._read_conn = connect_wal(db_path)
+        self._read_conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._read_conn.execute("PRAGMA table_info(intents)")]
+        if 'after_target_id' not in columns:
+            # Logs written before intents carried a bound: theirs is unknown (0)
+            self._read_conn.execute("ALTER TABLE intents ADD COLUMN after_target_id INTEGER NOT NULL DEFAULT 0")
+        self._read_lock = threading.Lock()
+
+        self._writer = BackgroundWriter(db_path, self.WRITE_BATCH, name="intent-log-writer")
+
+        add_breadcrumb("IntentLog initialized")
+
+    @staticmethod
+    def pair_key(source_id, target_id) -> str:
+        """Key for a source→target channel pair"""
+        return f"channel_{source_id}_to_{target_id}"
+
+    def begin(self, key: str, source_ids: List[int], fingerprints: List[str],
+              after_target_id: int = 0) -> Future:
+        """
+        Record an intent to send (queued)
+
+        Args:
+            key: Pair key
+            source_ids: Source message IDs about to be sent
+            fingerprints: Content fingerprints aligned with source_ids
+            after_target_id: Newest target message ID known before this send
+
+        Returns:
+            Future: Resolves to the intent ID once committed
+        """
+        row = (key, json.dumps(list(source_ids)), json.dumps(list(fingerprints)), time.time(), after_target_id)
+
+        def write(conn: sqlite3.Connection):
+            return conn.execute(
+                "INSERT INTO intents (key, source_ids, fingerprints, created, after_target_id) "
+                "VALUES (?, ?, ?, ?, ?)", row
+            ).lastrowid
+
+        return self._writer.submit(write)
+
+    def complete(self, intent_id: int):
+        """Forget a finished intent (queued - losing it only costs a reconcile)"""
+        self.resolve([intent_id])
+
+    def resolve(self, intent_ids: Iterable[int], key: Optional[str] = None, target_id: int = 0):
+        """
+        Forget intents (queued)
+
+        Args:
+            intent_ids: Intents to delete
+            key: Pair key whose mark is raised to target_id (optional)
+            target_id: Newest target message ID known to be a resolved copy
+        """
+        rows = [(intent_id,) for intent_id in intent_ids]
+        if not rows:
+            return
+
+        def write(conn: sqlite3.Connection):
+            conn.executemany("DELETE FROM intents WHERE intent_id = ?", rows)
+            if key is not None and target_id:
+                conn.execute(
+                    "INSERT INTO marks (key, target_id) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET target_id = MAX(target_id, excluded.target_id)",
+                    (key, target_id)
+                )
+
+        self._writer.submit(write)
+
+    def last_target(self, key: str) -> int:
+        """Newest target message ID of a resolved send of a pair (0 if none)"""
+        self._writer.flush()
+        with self._read_lock:
+            row = self._read_conn.execute("SELECT target_id FROM marks WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def pending(self, key: str) -> List[Dict]:
+        """
+        Intents of a pair left over from an interrupted run (oldest first)
+
+        Returns:
+            List[Dict]: intent_id, source_ids, fingerprints, created, after_target_id
+        """
+        self._writer.flush()
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT intent_id, source_ids, fingerprints, created, after_target_id FROM intents "
+                "WHERE key = ? ORDER BY created, intent_id", (key,)
+            ).fetchall()
+        return [
+            {'intent_id': intent_id, 'source_ids': json.loads(source_ids),
+             'fingerprints': json.loads(fingerprints), 'created': created, 'after_target_id': after_target_id}
+            for intent_id, source_ids, fingerprints, created, after_target_id in rows
+        ]
+
+    def flush(self) -> bool:
+        """
+        Wait until every queued write is committed
+
+        Returns:
+            bool: True if every write queued since the last flush was committed
+        """
+        return self._writer.flush()
+
+    def close(self):
+        """Flush, stop the writer and close connections"""
+        self._writer.close()
+        with self._read_lock:
+            self._read_conn.close()
+        logger.debug("IntentLog closed")
@@ -0,0 +1,305 @@
+"""
+Job Scheduler
+Re-runs saved transfer/download jobs periodically, reading only new messages
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ..config import Config
+from ..utils.logger import logger, add_breadcrumb, capture_exception
+
+
+class JobScheduler:
+    """
+    Periodic incremental catch-up for deployments without live mode
+
+    Jobs are saved in Config.TRANSFERS_FILE. Each run starts reading the
+    source after the job's last_message_id (a transfer additionally
+    resumes from its ProgressManager checkpoint, whichever is further),
+    so a run only reads what was posted since the previous one.
+
+    Starts are paced per account: an account runs one job at a time and
+    waits CATCHUP_ACCOUNT_STAGGER seconds between job starts, and every
+    next run gets up to CATCHUP_JITTER seconds of random offset so jobs
+    with the same interval do not keep firing together.
+    """
+
+    KINDS = ('transfer', 'download')
+
+    def __init__(self, jobs_file: str, account_manager, transfer_manager=None, download_manager=None):
+        """
+        Initialize Job Scheduler
+
+        Args:
+            jobs_file: Path to the saved jobs JSON file
+            account_manager: AccountManager providing connected clients
+            transfer_manager: TransferManager running transfer jobs
+            download_manager: DownloadManager running download jobs
+        """
+        self.jobs_file = jobs_file
+        self.account_manager = account_manager
+        self.transfer_manager = transfer_manager
+        self.download_manager = download_manager
+        self.jobs: List[Dict] = []
+        self._running: Dict[str, asyncio.Task] = {}  # job ID -> running task
+        self._busy_accounts = set()
+        self._account_free_at: Dict[str, float] = {}  # account ID -> monotonic time of next allowed start
+        self._task: Optional[asyncio.Task] = None
+
+        self.load_jobs()
+
+        add_breadcrumb("JobScheduler initialized", {"jobs_count": len(self.jobs)})
+
+    def load_jobs(self) -> List[Dict]:
+        """
+        Load jobs from JSON file
+
+        Returns:
+            List[Dict]: Saved jobs
+        """
+        if not os.path.exists(self.jobs_file):
+            self.jobs = []
+            return self.jobs
+
+        try:
+            with open(self.jobs_file, 'r', encoding='utf-8') as f:
+                self.jobs = json.load(f).get('jobs', [])
+            logger.info(f"Loaded {len(self.jobs)} scheduled jobs")
+        except Exception as e:
+            logger.error(f"Error loading scheduled jobs: {e}")
+            capture_exception(e, extra_data={"jobs_file": self.jobs_file})
+            self.jobs = []
+        return self.jobs
+
+    def save_jobs(self) -> bool:
+        """
+        Save jobs to JSON file (atomically)
+
+        Returns:
+            bool: True if saved successfully
+        """
+        try:
+            data = {
+                'jobs': self.jobs,
+                'last_updated': datetime.now().isoformat()
+            }
+            tmp_path = f'{self.jobs_file}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.jobs_file)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving scheduled jobs: {e}")
+            capture_exception(e, extra_data={"jobs_file": self.jobs_file, "jobs_count": len(self.jobs)})
+            return False
+
+    def add_job(self, kind: str, source: str, account_ids: List[str], target: str = None,
+                file_types=None, mode: str = 'copy', interval: float = None, last_message_id: int = 0) -> str:
+        """
+        Save a new periodic job
+
+        Args:
+            kind: 'transfer' or 'download'
+            source: Source channel
+            account_ids: Accounts to run the job with (downloads use the first connected one)
+            target: Target channel (transfer only)
+            file_types: List of types (transfer) or dict of flags (download)
+            mode: Transfer mode ('copy' or 'forward')
+            interval: Seconds between runs (default Config.CATCHUP_INTERVAL)
+            last_message_id: Read only messages after this ID
+
+        Returns:
+            str: Job ID
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if kind == 'transfer' and not target:
+            raise ValueError("Transfer jobs need a target")
+
+        job_id = str(uuid.uuid4())[:8]
+        self.jobs.append({
+            'id': job_id,
+            'kind': kind,
+            'source': source,
+            'target': target,
+            'file_types': file_types if file_types is not None else ([] if kind == 'transfer' else {}),
+            'mode': mode,
+            'account_ids': list(account_ids),
+            'interval': interval or Config.CATCHUP_INTERVAL,
+            'enabled': True,
+            'last_message_id': last_message_id,
+            'last_run': None,
+            # First run soon, spread out so jobs added together do not start together
+            'next_run': time.time() + random.uniform(0, Config.CATCHUP_JITTER),
+            'last_status': None
+        })
+        self.save_jobs()
+
+        logger.info(f"Scheduled {kind} job {job_id} for {source}")
+        add_breadcrumb("Job scheduled", {"job_id": job_id, "kind": kind})
+        return job_id
+
+    def remove_job(self, job_id: str) -> bool:
+        """Delete a saved job (a run in progress is stopped)"""
+        job = self.get_job(job_id)
+        if not job:
+            return False
+        self.jobs.remove(job)
+        task = self._running.get(job_id)
+        if task and not task.done():
+            task.cancel()
+        return self.save_jobs()
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        return next((job for job in self.jobs if job['id'] == job_id), None)
+
+    def get_jobs(self) -> List[Dict]:
+        return self.jobs
+
+    def set_enabled(self, job_id: str, enabled: bool) -> bool:
+        """Pause or resume a saved job"""
+        job = self.get_job(job_id)
+        if not job:
+            return False
+        job['enabled'] = enabled
+        return self.save_jobs()
+
+    def start(self):
+        """Start the periodic loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        """Stop the loop and any job runs in progress"""
+        for task in [self._task, *self._running.values()]:
+            if task and not task.done():
+                task.cancel()
+        self._task = None
+
+    async def run(self):
+        """Check for due jobs every CATCHUP_TICK seconds until cancelled"""
+        logger.info("Job scheduler started")
+        while True:
+            try:
+                self.run_due()
+            except Exception as e:
+                logger.error(f"Job scheduler error: {e}")
+                capture_exception(e, extra_data={"context": "job_scheduler_tick"})
+            await asyncio.sleep(Config.CATCHUP_TICK)
+
+    def run_due(self) -> List[asyncio.Task]:
+        """
+        Start every due job whose accounts are free to start one
+
+        A due job whose accounts are busy or were used too recently stays
+        due and is retried on a later tick.
+
+        Returns:
+            List[asyncio.Task]: Runs started now
+        """
+        now = time.time()
+        started = []
+        for job in sorted(self.jobs, key=lambda j: j.get('next_run') or 0):
+            if not job.get('enabled', True) or job['id'] in self._running:
+                continue
+            if (job.get('next_run') or 0) > now:
+                continue
+            if not self._accounts_ready(job['account_ids']):
+                continue
+
+            self._claim_accounts(job['account_ids'])
+            task = asyncio.get_running_loop().create_task(self._run_job(job))
+            self._running[job['id']] = task
+            started.append(task)
+        return started
+
+    def _accounts_ready(self, account_ids: List[str]) -> bool:
+        clock = time.monotonic()
+        return all(
+            aid not in self._busy_accounts and self._account_free_at.get(aid, 0) <= clock
+            for aid in account_ids
+        )
+
+    def _claim_accounts(self, account_ids: List[str]):
+        free_at = time.monotonic() + Config.CATCHUP_ACCOUNT_STAGGER
+        for aid in account_ids:
+            self._busy_accounts.add(aid)
+            self._account_free_at[aid] = free_at
+
+    async def _run_job(self, job: Dict):
+        """Run one job, then record where it got to and when to run next"""
+        job_id = job['id']
+        add_breadcrumb("scheduler", "Job run started", "info", {"job_id": job_id, "kind": job['kind']})
+        try:
+            clients = []
+            account_ids = []
+            for aid in job['account_ids']:
+                client = self.account_manager.get_client(aid)
+                if client:
+                    clients.append(client)
+                    account_ids.append(aid)
+
+            if not clients:
+                job['last_status'] = "Skipped: no connected accounts"
+            elif job['kind'] == 'transfer':
+                await self._run_transfer(job, clients, account_ids)
+            else:
+                await self._run_download(job, clients[0])
+        except asyncio.CancelledError:
+            job['last_status'] = "Cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Scheduled job {job_id} error: {e}")
+            capture_exception(e, extra_data={"job_id": job_id, "context": "run_scheduled_job"})
+            job['last_status'] = f"Error: {e}"
+        finally:
+            self._running.pop(job_id, None)
+            self._busy_accounts.difference_update(job['account_ids'])
+            job['last_run'] = time.time()
+            job['next_run'] = job['last_run'] + job['interval'] + random.uniform(0, Config.CATCHUP_JITTER)
+            if job in self.jobs:
+                self.save_jobs()
+            logger.info(f"Scheduled job {job_id}: {job['last_status']}")
+
+    async def _run_transfer(self, job: Dict, clients, account_ids: List[str]):
+        session_id = f"job_{job['id']}"
+        self.transfer_manager.create_session(session_id, {
+            'source': job['source'],
+            'target': job['target'],
+            'start_id': job['last_message_id'],
+            'file_types': job['file_types'],
+            'mode': job['mode'],
+            'account_ids': account_ids
+        })
+
+        def status_callback(sid, text):
+            job['last_status'] = text
+
+        await self.transfer_manager.start_mass_transfer(session_id, clients, status_callback)
+
+        session = self.transfer_manager.get_session(session_id)
+        if session.checkpoint:
+            reached = session.checkpoint.watermark
+        else:
+            reached = session.stats.get('last_scanned_id', 0)
+        job['last_message_id'] = max(job['last_message_id'], reached or 0)
+
+    async def _run_download(self, job: Dict, client):
+        # Same session ID every run, so new files land in the same folder
+        session_id = f"job_{job['id']}"
+        self.download_manager.create_session(session_id)
+
+        def status_callback(text):
+            job['last_status'] = text
+
+        reached = await self.download_manager.download_channel(
+            session_id, client, job['source'], job['file_types'], status_callback,
+            min_id=job['last_message_id']
+        )
+        job['last_message_id'] = max(job['last_message_id'], reached or 0)
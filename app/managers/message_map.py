@@ -0,0 +1,238 @@
+"""
+Message Map
+Persistent source message ID -> target message ID(s) mapping per channel pair
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utils.logger import logger, add_breadcrumb, capture_exception
+from ..utils.sqlite_writer import BackgroundWriter, connect_wal
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pairs (
+    pair_id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS message_map (
+    pair_id INTEGER NOT NULL,
+    source_id INTEGER NOT NULL,
+    target_id INTEGER NOT NULL,
+    PRIMARY KEY (pair_id, source_id, target_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_message_map_target ON message_map(pair_id, target_id);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    pair_id INTEGER PRIMARY KEY,
+    last_sync REAL NOT NULL
+);
+"""
+
+
+class MessageMap:
+    """
+    Which target message(s) each source message became
+
+    One row per (pair, source_id, target_id) in a WITHOUT ROWID table
+    clustered on (pair, source_id), so point and range lookups by source
+    ID are index seeks; a second index serves reverse (target -> source)
+    lookups. Pairs are stored once and referenced by integer ID.
+
+    Writes are queued to a background thread and committed in batches
+    (see BackgroundWriter); reads first wait for queued writes.
+    """
+
+    WRITE_BATCH = 200  # Max queued writes committed in one transaction
+
+    def __init__(self, db_path: str):
+        """
+        Initialize Message Map
+
+        Args:
+            db_path: Database file path
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._read_conn = connect_wal(db_path)
+        self._read_conn.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        self._pair_ids: Dict[str, int] = dict(
+            (key, pair_id) for pair_id, key in self._read_conn.execute("SELECT pair_id, key FROM pairs")
+        )
+
+        self._writer = BackgroundWriter(db_path, self.WRITE_BATCH, name="message-map-writer")
+
+        add_breadcrumb("MessageMap initialized")
+
+    @staticmethod
+    def pair_key(source_id, target_id) -> str:
+        """
+        Key for a source→target channel pair
+
+        Args:
+            source_id: Source channel ID
+            target_id: Target channel ID
+        """
+        return f"channel_{source_id}_to_{target_id}"
+
+    def _pair_id(self, key: str) -> int:
+        """Integer ID of a pair, created on first use"""
+        pair_id = self._pair_ids.get(key)
+        if pair_id is None:
+            with self._read_lock:
+                self._read_conn.execute("INSERT OR IGNORE INTO pairs (key) VALUES (?)", (key,))
+                pair_id = self._read_conn.execute("SELECT pair_id FROM pairs WHERE key = ?", (key,)).fetchone()[0]
+            self._pair_ids[key] = pair_id
+        return pair_id
+
+    def _read(self, sql: str, params=()) -> List[tuple]:
+        self._writer.flush()
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    def flush(self) -> bool:
+        """
+        Wait until every queued write is committed
+
+        Returns:
+            bool: True if every write queued since the last flush was committed
+        """
+        return self._writer.flush()
+
+    def close(self):
+        """Flush, stop the writer and close connections"""
+        self._writer.close()
+        with self._read_lock:
+            self._read_conn.close()
+
+    def record(self, key: str, mappings: Iterable[Tuple[int, int]]):
+        """
+        Bulk insert (source_id, target_id) rows for a pair (queued)
+
+        Args:
+            key: Pair key (see pair_key)
+            mappings: (source_id, target_id) tuples; duplicates are ignored
+        """
+        pair_id = self._pair_id(key)
+        rows = [(pair_id, int(source_id), int(target_id)) for source_id, target_id in mappings]
+        if not rows:
+            return
+
+        def write(conn: sqlite3.Connection):
+            conn.executemany(
+                "INSERT OR IGNORE INTO message_map (pair_id, source_id, target_id) VALUES (?, ?, ?)", rows
+            )
+
+        self._writer.submit(write)
+
+    def get_targets(self, key: str, source_id: int) -> List[int]:
+        """
+        Target message IDs a source message became (empty if unknown)
+
+        Args:
+            key: Pair key
+            source_id: Source message ID
+        """
+        rows = self._read(
+            "SELECT target_id FROM message_map WHERE pair_id = ? AND source_id = ? ORDER BY target_id",
+            (self._pair_id(key), source_id)
+        )
+        return [target_id for target_id, in rows]
+
+    def get_range(self, key: str, min_source_id: int, max_source_id: int) -> Dict[int, List[int]]:
+        """
+        Mappings for source IDs in [min_source_id, max_source_id]
+
+        Returns:
+            Dict[int, List[int]]: source_id -> target IDs, in source ID order
+        """
+        result: Dict[int, List[int]] = {}
+        for source_id, target_id in self._read(
+                "SELECT source_id, target_id FROM message_map "
+                "WHERE pair_id = ? AND source_id BETWEEN ? AND ? ORDER BY source_id, target_id",
+                (self._pair_id(key), min_source_id, max_source_id)):
+            result.setdefault(source_id, []).append(target_id)
+        return result
+
+    def get_chunk(self, key: str, after_source_id: int, limit: int) -> Dict[int, List[int]]:
+        """
+        Next `limit` mapped source IDs above after_source_id (for paging)
+
+        Returns:
+            Dict[int, List[int]]: source_id -> target IDs, in source ID order
+        """
+        pair_id = self._pair_id(key)
+        result: Dict[int, List[int]] = {}
+        for source_id, target_id in self._read(
+                "SELECT source_id, target_id FROM message_map WHERE pair_id = ? AND source_id IN ("
+                "SELECT DISTINCT source_id FROM message_map WHERE pair_id = ? AND source_id > ? "
+                "ORDER BY source_id LIMIT ?) ORDER BY source_id, target_id",
+                (pair_id, pair_id, after_source_id, limit)):
+            result.setdefault(source_id, []).append(target_id)
+        return result
+
+    def get_last_sync(self, key: str) -> Optional[float]:
+        """Unix time the last completed edit/delete sync of a pair started"""
+        rows = self._read("SELECT last_sync FROM sync_state WHERE pair_id = ?", (self._pair_id(key),))
+        return rows[0][0] if rows else None
+
+    def set_last_sync(self, key: str, timestamp: float):
+        """Record a completed sync (queued)"""
+        pair_id = self._pair_id(key)
+        self._writer.submit(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO sync_state (pair_id, last_sync) VALUES (?, ?)", (pair_id, timestamp)
+        ))
+
+    def get_source(self, key: str, target_id: int) -> Optional[int]:
+        """Source message ID a target message came from, if known"""
+        rows = self._read(
+            "SELECT source_id FROM message_map WHERE pair_id = ? AND target_id = ? LIMIT 1",
+            (self._pair_id(key), target_id)
+        )
+        return rows[0][0] if rows else None
+
+    def count(self, key: str) -> int:
+        """Number of mapped source messages for a pair"""
+        rows = self._read(
+            "SELECT COUNT(DISTINCT source_id) FROM message_map WHERE pair_id = ?", (self._pair_id(key),)
+        )
+        return rows[0][0]
+
+    def remove(self, key: str, source_ids: Iterable[int]):
+        """
+        Forget mappings of the given source messages (queued)
+
+        Args:
+            key: Pair key
+            source_ids: Source message IDs
+        """
+        pair_id = self._pair_id(key)
+        rows = [(pair_id, int(source_id)) for source_id in source_ids]
+
+        def write(conn: sqlite3.Connection):
+            conn.executemany("DELETE FROM message_map WHERE pair_id = ? AND source_id = ?", rows)
+
+        self._writer.submit(write)
+
+    def clear(self, key: str) -> int:
+        """
+        Drop every mapping of a pair
+
+        Returns:
+            int: Rows deleted
+        """
+        pair_id = self._pair_id(key)
+        try:
+            deleted = self._writer.submit(
+                lambda conn: conn.execute("DELETE FROM message_map WHERE pair_id = ?", (pair_id,)).rowcount
+            ).result()
+            logger.info(f"Cleared {deleted} message mappings for {key}")
+            return deleted
+        except Exception as e:
+            logger.error(f"Error clearing message map for {key}: {e}")
+            capture_exception(e, extra_data={"key": key, "context": "clear_message_map"})
+            return 0
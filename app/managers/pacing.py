@@ -0,0 +1,160 @@
+"""
+Pacing
+Adaptive per-account delay between sends (AIMD feedback control)
+"""
+from typing import Dict, Optional
+
+from ..config import Config
+
+
+class PacingController:
+    """
+    AIMD controller for one account's delay between sends
+
+    Every successful send shortens the delay by `step` (additive
+    increase of the send rate); a FloodWait multiplies it by `backoff`
+    and a response slower than `slow_response` seconds by
+    `slow_backoff` (multiplicative decrease). The delay stays within
+    [min_delay, max_delay].
+
+    The recent error rate (FloodWaits and failed sends) is kept as an
+    exponential moving average over about Config.PACING_ERROR_WINDOW sends.
+    """
+
+    def __init__(self, initial: float = None, min_delay: float = None, max_delay: float = None,
+                 step: float = None, backoff: float = None, slow_backoff: float = None,
+                 slow_response: float = None):
+        """
+        Initialize controller (unset arguments default to Config.PACING_*)
+
+        Args:
+            initial: Starting delay in seconds
+            min_delay: Lower bound of the delay
+            max_delay: Upper bound of the delay
+            step: Seconds taken off the delay per successful send
+            backoff: Delay multiplier on FloodWait
+            slow_backoff: Delay multiplier on a slow response
+            slow_response: Response time (seconds) counted as slow
+        """
+        self.min_delay = Config.PACING_MIN_DELAY if min_delay is None else min_delay
+        self.max_delay = Config.PACING_MAX_DELAY if max_delay is None else max_delay
+        self.step = Config.PACING_STEP if step is None else step
+        self.backoff = Config.PACING_BACKOFF if backoff is None else backoff
+        self.slow_backoff = Config.PACING_SLOW_BACKOFF if slow_backoff is None else slow_backoff
+        self.slow_response = Config.PACING_SLOW_RESPONSE if slow_response is None else slow_response
+        self.delay = self._clamp(Config.PACING_INITIAL_DELAY if initial is None else initial)
+        self.error_rate = 0.0
+
+    def _record_outcome(self, failed: bool):
+        alpha = 1.0 / max(1, Config.PACING_ERROR_WINDOW)
+        self.error_rate += alpha * ((1.0 if failed else 0.0) - self.error_rate)
+
+    def _clamp(self, delay: float) -> float:
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def on_success(self, latency: Optional[float] = None) -> float:
+        """
+        Feed back a successful send
+
+        Args:
+            latency: Seconds the send took (None if not measured)
+
+        Returns:
+            float: New delay
+        """
+        self._record_outcome(False)
+        if latency is not None and latency > self.slow_response:
+            self.delay = self._clamp(self.delay * self.slow_backoff)
+        else:
+            self.delay = self._clamp(self.delay - self.step)
+        return self.delay
+
+    def on_flood_wait(self, seconds: float = 0) -> float:
+        """
+        Feed back a FloodWait (the wait itself is enforced by the scheduler)
+
+        Returns:
+            float: New delay
+        """
+        self._record_outcome(True)
+        self.delay = self._clamp(max(self.delay, self.step) * self.backoff)
+        return self.delay
+
+    def on_error(self):
+        """Feed back a failed send (counts toward the error rate only)"""
+        self._record_outcome(True)
+
+
+class AccountPacer:
+    """
+    Pacing controllers of all accounts, shared by every session
+
+    Also tracks when each account may send next (last send + its delay),
+    so every scheduler over the same account respects the same pace.
+    """
+
+    def __init__(self, **defaults):
+        """
+        Initialize pacer
+
+        Args:
+            **defaults: PacingController arguments for new accounts
+        """
+        self.defaults = defaults
+        self.controllers: Dict[str, PacingController] = {}
+        self._next_send: Dict[str, float] = {}  # account_key -> monotonic time of next allowed send
+
+    def controller(self, account_key: str) -> PacingController:
+        """Controller of an account, created on first use"""
+        controller = self.controllers.get(account_key)
+        if controller is None:
+            controller = self.controllers[account_key] = PacingController(**self.defaults)
+        return controller
+
+    def configure(self, account_key: str, **params):
+        """
+        Set an account's controller parameters (e.g. from a rate profile)
+
+        A new controller starts at `initial`; an existing one keeps its
+        learned delay, moved into the new bounds.
+        """
+        controller = self.controllers.get(account_key)
+        if controller is None:
+            self.controllers[account_key] = PacingController(**{**self.defaults, **params})
+            return
+        for name, value in params.items():
+            if name != 'initial':
+                setattr(controller, name, value)
+        controller.delay = controller._clamp(controller.delay)
+
+    def delay(self, account_key: str) -> float:
+        return self.controller(account_key).delay
+
+    def next_send_at(self, account_key: str) -> float:
+        """Monotonic time the account may send again (0 if now)"""
+        return self._next_send.get(account_key, 0.0)
+
+    def mark_sent(self, account_key: str, now: float):
+        """Start the account's gap before its next send"""
+        self._next_send[account_key] = now + self.delay(account_key)
+
+    def record_success(self, account_key: str, latency: Optional[float] = None) -> float:
+        return self.controller(account_key).on_success(latency)
+
+    def record_flood_wait(self, account_key: str, seconds: float = 0) -> float:
+        return self.controller(account_key).on_flood_wait(seconds)
+
+    def record_error(self, account_key: str):
+        self.controller(account_key).on_error()
+
+    def restore(self, account_key: str, delay: float = None, error_rate: float = None):
+        """Bring back an account's saved pacing state (e.g. after a restart)"""
+        controller = self.controller(account_key)
+        if delay is not None:
+            controller.delay = controller._clamp(delay)
+        if error_rate is not None:
+            controller.error_rate = error_rate
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current delay per account (seconds, rounded)"""
+        return {key: round(c.delay, 2) for key, c in self.controllers.items()}
@@ -4,123 +4,404 @@ Manages transfer progress tracking
 """
 import json
 import os
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from ..config import Config
 from ..utils.logger import logger, add_breadcrumb, capture_exception
+from ..utils.interval_set import IntervalSet
 
 
 class ProgressManager:
     """
     Manages transfer progress
-    
+
     Features:
     - Save/load progress per transfer
-    - Track sent message IDs
+    - Track sent message IDs (as ranges - see IntervalSet)
     - Resume from last position
     - Cleanup old progress
+
+    Write-behind: save_progress/append_progress/update_progress only change the in-memory
+    record and mark it dirty. A background thread flushes dirty records
+    every PROGRESS_FLUSH_INTERVAL seconds, or as soon as
+    PROGRESS_FLUSH_EVERY updates are pending, so no file I/O happens on
+    the caller's (event loop) thread. flush() forces a synchronous flush
+    (shutdown, end of a transfer, tests).
+
+    Storage per channel pair (log-structured):
+    - {key}.json: snapshot, written atomically (temp file + rename).
+      Sent IDs are stored as 'sent_ranges': [[start, end], ...]; old files
+      with a plain 'sent_message_ids' list are migrated on load.
+    - {key}.journal: records appended and fsync'd once per flush, folded
+      into a new snapshot once it holds PROGRESS_COMPACT_THRESHOLD records:
+        's <id>': sent ID (update_progress; also raises last_message_id)
+        'a <id>': sent ID above the watermark (append_progress)
+        'w <last_message_id> <total_sent> <total_skipped>': checkpoint
+          (append_progress); sent IDs at or below it are dropped
+
+    - index.json: key -> summary (last_message_id, totals, last_updated,
+      range_count, size in bytes), rewritten once per flush. Listing and
+      age-based cleanup read only this; it is rebuilt from the progress
+      files if missing or unreadable.
+
+    Load = snapshot + journal replay. Replay is idempotent, so a crash
+    loses at most the updates since the last flush and never leaves a
+    half-written snapshot.
     """
-    
+
+    JOURNAL_SUFFIX = '.journal'
+    INDEX_FILE = 'index.json'
+
     def __init__(self, progress_dir: str):
         """
         Initialize Progress Manager
-        
+
         Args:
             progress_dir: Directory for progress files
         """
         self.progress_dir = progress_dir
         os.makedirs(progress_dir, exist_ok=True)
-        
+
+        self._lock = threading.RLock()          # in-memory state
+        self._flush_lock = threading.Lock()     # file I/O (one flush at a time)
+        self._state: Dict[str, Dict] = {}       # key -> in-memory progress
+        self._pending: Dict[str, List[str]] = {}  # key -> journal records not yet written
+        self._snapshot_dirty = set()            # keys needing a full snapshot
+        self._dirty_count = 0
+        self._journals: Dict[str, object] = {}  # key -> open journal file (flush thread only)
+        self._journal_entries: Dict[str, int] = {}  # key -> journal records on disk
+        self._index: Optional[Dict[str, Dict]] = None  # key -> summary (loaded lazily)
+
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
         add_breadcrumb("ProgressManager initialized")
-    
+
     def get_progress_key(self, source_id: str, target_id: str) -> str:
         """
         Create unique key for source→target channel pair
-        
+
         Args:
             source_id: Source channel ID
             target_id: Target channel ID
-            
+
         Returns:
             str: Unique progress key
         """
         return f"channel_{source_id}_to_{target_id}"
-    
+
+    def _paths(self, key: str):
+        base = os.path.join(self.progress_dir, key)
+        return f'{base}.json', f'{base}{self.JOURNAL_SUFFIX}'
+
+    def _empty_progress(self) -> Dict:
+        return {
+            'sent_message_ids': IntervalSet(),
+            'last_message_id': 0,
+            'total_sent': 0,
+            'total_skipped': 0,
+            'last_updated': None
+        }
+
+    def _copy_progress(self, progress: Dict) -> Dict:
+        result = dict(progress)
+        result['sent_message_ids'] = progress['sent_message_ids'].copy()
+        return result
+
+    def _replay_journal(self, progress: Dict, journal_path: str) -> int:
+        """Apply journal records to progress; returns number of records"""
+        if not os.path.exists(journal_path):
+            return 0
+
+        count = 0
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                # A torn last line (crash mid-append) is simply ignored
+                if not line.endswith('\n') or not all(part.isdigit() for part in parts[1:]):
+                    continue
+                if len(parts) == 2 and parts[0] == 's':
+                    message_id = int(parts[1])
+                    if progress['sent_message_ids'].add(message_id):
+                        progress['total_sent'] += 1
+                    progress['last_message_id'] = max(progress['last_message_id'], message_id)
+                elif len(parts) == 2 and parts[0] == 'a':
+                    progress['sent_message_ids'].add(int(parts[1]))
+                elif len(parts) == 4 and parts[0] == 'w':
+                    last_message_id, total_sent, total_skipped = map(int, parts[1:])
+                    progress['sent_message_ids'].remove_below(last_message_id + 1)
+                    progress.update(last_message_id=last_message_id, total_sent=total_sent,
+                                    total_skipped=total_skipped)
+                else:
+                    continue
+                count += 1
+
+        if count:
+            progress['last_updated'] = datetime.fromtimestamp(os.path.getmtime(journal_path)).isoformat()
+        return count
+
+    def _load_state(self, key: str) -> Dict:
+        """Load (or return cached) in-memory progress for key"""
+        with self._lock:
+            if key in self._state:
+                return self._state[key]
+
+            snapshot_path, journal_path = self._paths(key)
+            if not os.path.exists(snapshot_path) and not os.path.exists(journal_path):
+                logger.info(f"No progress found for {key}, starting fresh")
+                progress = self._empty_progress()
+                self._state[key] = progress
+                self._journal_entries[key] = 0
+                return progress
+
+            progress = self._empty_progress()
+            if os.path.exists(snapshot_path):
+                with open(snapshot_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+
+                if 'sent_ranges' in data:
+                    data['sent_message_ids'] = IntervalSet.from_ranges(data.pop('sent_ranges'))
+                else:
+                    # Legacy list format - rewritten in the compact form on next flush
+                    data['sent_message_ids'] = IntervalSet(data.get('sent_message_ids', []))
+                    logger.info(f"Migrating progress {key} to range format")
+                    self._mark_dirty(key, snapshot=True)
+                progress.update(data)
+
+            self._journal_entries[key] = self._replay_journal(progress, journal_path)
+            self._state[key] = progress
+            return progress
+
     def load_progress(self, source_id: str, target_id: str) -> Dict:
         """
         Load progress for specific channel pair
-        
+
         Args:
             source_id: Source channel ID
             target_id: Target channel ID
-            
+
         Returns:
-            Dict: Progress data with sent_message_ids and last_message_id
+            Dict: Progress data with sent_message_ids (IntervalSet) and last_message_id
         """
         key = self.get_progress_key(source_id, target_id)
-        progress_file = os.path.join(self.progress_dir, f'{key}.json')
-        
-        if not os.path.exists(progress_file):
-            logger.info(f"No progress found for {key}, starting fresh")
-            return {
-                'sent_message_ids': [],
-                'last_message_id': 0,
-                'total_sent': 0,
-                'total_skipped': 0,
-                'last_updated': None
-            }
-        
+
         try:
-            with open(progress_file, 'r', encoding='utf-8') as f:
-                progress = json.load(f)
-            
-            logger.info(f"Loaded progress for {key}: {progress['total_sent']} messages sent")
-            add_breadcrumb("Progress loaded", {
-                "key": key,
-                "total_sent": progress['total_sent']
-            })
-            
+            progress = self._copy_progress(self._load_state(key))
+
+            if progress['last_updated'] is not None:
+                logger.info(f"Loaded progress for {key}: {progress['total_sent']} messages sent")
+                add_breadcrumb("Progress loaded", {
+                    "key": key,
+                    "total_sent": progress['total_sent']
+                })
+
             return progress
-            
+
         except Exception as e:
             logger.error(f"Error loading progress for {key}: {e}")
             capture_exception(e, extra_data={"key": key, "source_id": source_id, "target_id": target_id, "context": "load_progress"})
-            return {
-                'sent_message_ids': [],
-                'last_message_id': 0,
-                'total_sent': 0,
-                'total_skipped': 0,
-                'last_updated': None
-            }
-    
-    def save_progress(self, source_id: str, target_id: str, 
-                     sent_message_ids: List[int], last_message_id: int,
+            return self._empty_progress()
+
+    def _snapshot_data(self, progress: Dict) -> Dict:
+        return {
+            'sent_ranges': progress['sent_message_ids'].to_ranges(),
+            'last_message_id': progress['last_message_id'],
+            'total_sent': progress['total_sent'],
+            'total_skipped': progress['total_skipped'],
+            'last_updated': progress['last_updated'] or datetime.now().isoformat()
+        }
+
+    def _atomic_write_json(self, path: str, data: Dict):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _close_journal(self, key: str):
+        journal = self._journals.pop(key, None)
+        if journal:
+            journal.close()
+
+    def _mark_dirty(self, key: str, snapshot: bool = False, records: List[str] = None):
+        """Record a pending change (caller holds self._lock)"""
+        if snapshot:
+            self._snapshot_dirty.add(key)
+            self._pending.pop(key, None)  # the snapshot covers them
+        elif key not in self._snapshot_dirty:
+            self._pending.setdefault(key, []).extend(records)
+
+        self._dirty_count += len(records) if records else 1
+        if self._dirty_count >= Config.PROGRESS_FLUSH_EVERY:
+            self._wake.set()
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="progress-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait(Config.PROGRESS_FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+
+    def _summary(self, progress: Dict, size: int = 0) -> Dict:
+        return {
+            'last_message_id': progress['last_message_id'],
+            'total_sent': progress['total_sent'],
+            'total_skipped': progress['total_skipped'],
+            'last_updated': progress['last_updated'],
+            'range_count': progress['sent_message_ids'].range_count,
+            'size': size
+        }
+
+    def _file_size(self, key: str) -> int:
+        return sum(os.path.getsize(p) for p in self._paths(key) if os.path.exists(p))
+
+    def _ensure_index(self) -> Dict[str, Dict]:
+        """Load index.json, rebuilding it from the progress files if needed"""
+        with self._flush_lock:
+            return self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """_ensure_index body (caller holds self._flush_lock)"""
+        if self._index is not None:
+            return self._index
+
+        index_path = os.path.join(self.progress_dir, self.INDEX_FILE)
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+            return self._index
+        except FileNotFoundError:
+            logger.info("Progress index missing, rebuilding")
+        except Exception as e:
+            logger.warning(f"Progress index unreadable, rebuilding: {e}")
+
+        index = {}
+        for key in self._list_keys():
+            try:
+                cached = key in self._state
+                index[key] = self._summary(self._load_state(key), self._file_size(key))
+                if not cached:
+                    with self._lock:
+                        if key not in self._snapshot_dirty and key not in self._pending:
+                            self._state.pop(key, None)  # loaded only to index it
+            except Exception as e:
+                logger.error(f"Error indexing {key}: {e}")
+                capture_exception(e, extra_data={"key": key, "context": "rebuild_index"})
+        self._index = index
+        self._write_index()
+        add_breadcrumb("Progress index rebuilt", {"count": len(index)})
+        return self._index
+
+    def _write_index(self):
+        """Persist the in-memory index (caller holds self._flush_lock)"""
+        try:
+            self._atomic_write_json(os.path.join(self.progress_dir, self.INDEX_FILE), self._index)
+        except Exception as e:
+            logger.error(f"Error writing progress index: {e}")
+            capture_exception(e, extra_data={"context": "write_index"})
+
+    def flush(self) -> bool:
+        """
+        Write every dirty record to disk now (blocking)
+
+        Returns:
+            bool: True if everything was written
+        """
+        with self._flush_lock:
+            # Capture the work under the state lock, do the I/O without it
+            with self._lock:
+                snapshots = {}
+                appends = {}
+                for key in self._snapshot_dirty:
+                    snapshots[key] = self._snapshot_data(self._state[key])
+                for key, records in self._pending.items():
+                    if self._journal_entries.get(key, 0) + len(records) >= Config.PROGRESS_COMPACT_THRESHOLD:
+                        snapshots[key] = self._snapshot_data(self._state[key])  # compact
+                    else:
+                        appends[key] = records
+                summaries = {key: self._summary(self._state[key]) for key in (*snapshots, *appends)}
+                self._snapshot_dirty = set()
+                self._pending = {}
+                self._dirty_count = 0
+
+            ok = True
+            for key, data in snapshots.items():
+                try:
+                    snapshot_path, journal_path = self._paths(key)
+                    self._close_journal(key)
+                    self._atomic_write_json(snapshot_path, data)
+                    if os.path.exists(journal_path):
+                        os.remove(journal_path)
+                    self._journal_entries[key] = 0
+                except Exception as e:
+                    ok = False
+                    logger.error(f"Error writing progress snapshot for {key}: {e}")
+                    capture_exception(e, extra_data={"key": key, "context": "flush_progress"})
+                    with self._lock:
+                        self._snapshot_dirty.add(key)  # retry next flush
+
+            for key, records in appends.items():
+                try:
+                    journal = self._journals.get(key)
+                    if journal is None:
+                        journal = open(self._paths(key)[1], 'a', encoding='utf-8')
+                        self._journals[key] = journal
+                    journal.write(''.join(f"{record}\n" for record in records))
+                    journal.flush()
+                    os.fsync(journal.fileno())
+                    self._journal_entries[key] = self._journal_entries.get(key, 0) + len(records)
+                except Exception as e:
+                    ok = False
+                    logger.error(f"Error appending progress journal for {key}: {e}")
+                    capture_exception(e, extra_data={"key": key, "context": "flush_progress"})
+                    self._close_journal(key)
+                    with self._lock:
+                        self._snapshot_dirty.add(key)  # rewrite in full next flush
+
+            if summaries:
+                self._load_index()
+                for key, summary in summaries.items():
+                    summary['size'] = self._file_size(key)
+                    self._index[key] = summary
+                self._write_index()
+
+            if snapshots or appends:
+                logger.debug(f"Flushed progress: {len(snapshots)} snapshots, {len(appends)} journals")
+            return ok
+
+    def save_progress(self, source_id: str, target_id: str,
+                     sent_message_ids, last_message_id: int,
                      total_sent: int = 0, total_skipped: int = 0):
         """
-        Save progress for specific channel pair
-        
+        Save progress for specific channel pair (full snapshot, written on next flush)
+
         Args:
             source_id: Source channel ID
             target_id: Target channel ID
-            sent_message_ids: List of sent message IDs
+            sent_message_ids: Sent message IDs (IntervalSet or any iterable of ints)
             last_message_id: Last processed message ID
             total_sent: Total messages sent
             total_skipped: Total messages skipped
-            
+
         Returns:
             bool: True if saved successfully
         """
         key = self.get_progress_key(source_id, target_id)
-        progress_file = os.path.join(self.progress_dir, f'{key}.json')
-        
+
         try:
-            # Limit size if too large
-            if len(sent_message_ids) > Config.MAX_PROGRESS_ITEMS:
-                logger.warning(f"Progress too large ({len(sent_message_ids)} items), trimming to {Config.MAX_PROGRESS_ITEMS}")
-                # Keep most recent items
-                sent_message_ids = sent_message_ids[-Config.MAX_PROGRESS_ITEMS:]
-            
+            if isinstance(sent_message_ids, IntervalSet):
+                sent_message_ids = sent_message_ids.copy()
+            else:
+                sent_message_ids = IntervalSet(sent_message_ids)
+
             progress = {
                 'sent_message_ids': sent_message_ids,
                 'last_message_id': last_message_id,
@@ -128,141 +409,217 @@ class ProgressManager:
                 'total_skipped': total_skipped,
                 'last_updated': datetime.now().isoformat()
             }
-            
-            with open(progress_file, 'w', encoding='utf-8') as f:
-                json.dump(progress, f, ensure_ascii=False, indent=2)
-            
+
+            with self._lock:
+                self._state[key] = progress
+                self._journal_entries.setdefault(key, 0)
+                self._mark_dirty(key, snapshot=True)
+
             logger.info(f"Saved progress for {key}: {total_sent} sent, {total_skipped} skipped")
             add_breadcrumb("Progress saved", {
                 "key": key,
                 "total_sent": total_sent,
                 "total_skipped": total_skipped
             })
-            
+
             return True
-            
+
         except Exception as e:
             logger.error(f"Error saving progress for {key}: {e}")
             capture_exception(e, extra_data={"key": key, "source_id": source_id, "target_id": target_id, "total_sent": total_sent, "context": "save_progress"})
             return False
-    
+
+    def append_progress(self, source_id: str, target_id: str, message_ids: Iterable[int],
+                        last_message_id: int, total_sent: int = 0, total_skipped: int = 0) -> bool:
+        """
+        Record newly sent IDs and the new watermark (journaled on next flush)
+
+        The incremental form of save_progress used by checkpoints: only the
+        new IDs and one checkpoint record are appended. Sent IDs at or below
+        the watermark are dropped, since a resume starts after it anyway, so
+        skipped messages leave no gaps behind.
+
+        Args:
+            source_id: Source channel ID
+            target_id: Target channel ID
+            message_ids: IDs sent since the last checkpoint
+            last_message_id: Watermark (every message up to it is processed)
+            total_sent: Total messages sent
+            total_skipped: Total messages skipped
+
+        Returns:
+            bool: True if recorded successfully
+        """
+        key = self.get_progress_key(source_id, target_id)
+
+        try:
+            with self._lock:
+                progress = self._load_state(key)
+                sent_ids = progress['sent_message_ids']
+                records = [f"a {message_id}" for message_id in message_ids
+                           if message_id > last_message_id and sent_ids.add(message_id)]
+                sent_ids.remove_below(last_message_id + 1)
+                progress.update(last_message_id=last_message_id, total_sent=total_sent,
+                                total_skipped=total_skipped, last_updated=datetime.now().isoformat())
+                records.append(f"w {last_message_id} {total_sent} {total_skipped}")
+                self._mark_dirty(key, records=records)
+
+            logger.debug(f"Appended progress for {key}: watermark {last_message_id}, {len(records) - 1} new IDs")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error appending progress for {key}: {e}")
+            capture_exception(e, extra_data={"key": key, "source_id": source_id, "target_id": target_id, "context": "append_progress"})
+            return False
+
     def get_all_progress(self) -> Dict[str, Dict]:
         """
-        Get all progress files
-        
+        Get a summary of every channel pair (from the index, no file parsing)
+
         Returns:
-            Dict[str, Dict]: Dictionary of all progress data
+            Dict[str, Dict]: key -> last_message_id, total_sent, total_skipped,
+            last_updated, range_count, size (bytes on disk).
+            Use load_progress for the sent IDs of one pair.
         """
-        all_progress = {}
-        
         try:
-            for filename in os.listdir(self.progress_dir):
-                if filename.endswith('.json'):
-                    key = filename[:-5]  # Remove .json
-                    filepath = os.path.join(self.progress_dir, filename)
-                    
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            all_progress[key] = json.load(f)
-                    except Exception as e:
-                        logger.error(f"Error loading {filename}: {e}")
-                        capture_exception(e, extra_data={"filename": filename, "context": "get_all_progress"})
-            
-            logger.info(f"Loaded {len(all_progress)} progress files")
+            with self._flush_lock:
+                all_progress = {key: dict(summary) for key, summary in self._load_index().items()}
+
+            # Include changes not flushed yet
+            with self._lock:
+                for key in (*self._snapshot_dirty, *self._pending):
+                    size = all_progress.get(key, {}).get('size', 0)
+                    all_progress[key] = self._summary(self._state[key], size)
+
+            logger.info(f"Loaded {len(all_progress)} progress entries")
             return all_progress
-            
+
         except Exception as e:
             logger.error(f"Error getting all progress: {e}")
             capture_exception(e, extra_data={"context": "get_all_progress"})
             return {}
-    
+
+    def _list_keys(self) -> List[str]:
+        """Keys that have a snapshot or journal on disk, or unflushed state"""
+        keys = set()
+        for filename in os.listdir(self.progress_dir):
+            if filename == self.INDEX_FILE:
+                continue
+            for suffix in ('.json', self.JOURNAL_SUFFIX):
+                if filename.endswith(suffix):
+                    keys.add(filename[:-len(suffix)])
+                    break
+        with self._lock:
+            keys.update(self._snapshot_dirty)
+            keys.update(self._pending)
+        return sorted(keys)
+
+    def _remove_key(self, key: str) -> bool:
+        """Drop a key from memory and disk; returns True if it existed"""
+        with self._flush_lock:
+            with self._lock:
+                existed = key in self._snapshot_dirty or key in self._pending
+                self._state.pop(key, None)
+                self._pending.pop(key, None)
+                self._snapshot_dirty.discard(key)
+                self._journal_entries.pop(key, None)
+
+            self._close_journal(key)
+            for path in self._paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+                    existed = True
+
+            if self._index is not None and self._index.pop(key, None) is not None:
+                existed = True
+                self._write_index()
+            return existed
+
     def clear_progress(self, source_id: str, target_id: str) -> bool:
         """
         Clear progress for specific channel pair
-        
+
         Args:
             source_id: Source channel ID
             target_id: Target channel ID
-            
+
         Returns:
             bool: True if cleared successfully
         """
         key = self.get_progress_key(source_id, target_id)
-        progress_file = os.path.join(self.progress_dir, f'{key}.json')
-        
+
         try:
-            if os.path.exists(progress_file):
-                os.remove(progress_file)
+            if self._remove_key(key):
                 logger.info(f"Cleared progress for {key}")
                 add_breadcrumb("Progress cleared", {"key": key})
                 return True
             else:
                 logger.warning(f"No progress file to clear for {key}")
                 return False
-                
+
         except Exception as e:
             logger.error(f"Error clearing progress for {key}: {e}")
             capture_exception(e, extra_data={"key": key, "source_id": source_id, "target_id": target_id, "context": "clear_progress"})
             return False
-    
+
     def update_progress(self, source_id: str, target_id: str, message_id: int):
         """
-        Update progress with new message
-        
+        Update progress with new message (in memory; journaled on next flush)
+
         Args:
             source_id: Source channel ID
             target_id: Target channel ID
             message_id: Message ID that was sent
         """
-        # Load current progress
-        progress = self.load_progress(source_id, target_id)
-        
-        # Update
-        if message_id not in progress['sent_message_ids']:
-            progress['sent_message_ids'].append(message_id)
-            progress['total_sent'] += 1
-        
-        if message_id > progress['last_message_id']:
-            progress['last_message_id'] = message_id
-        
-        # Save
-        self.save_progress(
-            source_id, target_id,
-            progress['sent_message_ids'],
-            progress['last_message_id'],
-            progress['total_sent'],
-            progress['total_skipped']
-        )
-    
+        key = self.get_progress_key(source_id, target_id)
+
+        try:
+            with self._lock:
+                progress = self._load_state(key)
+
+                # Update
+                if not progress['sent_message_ids'].add(message_id):
+                    return
+                progress['total_sent'] += 1
+                progress['last_message_id'] = max(progress['last_message_id'], message_id)
+                progress['last_updated'] = datetime.now().isoformat()
+
+                self._mark_dirty(key, records=[f"s {message_id}"])
+
+        except Exception as e:
+            logger.error(f"Error updating progress for {key}: {e}")
+            capture_exception(e, extra_data={"key": key, "message_id": message_id, "context": "update_progress"})
+
     def cleanup_old_progress(self, days: int = 30) -> int:
         """
         Cleanup progress files older than specified days
-        
+
         Args:
             days: Number of days to keep
-            
+
         Returns:
             int: Number of files deleted
         """
         deleted = 0
         cutoff = datetime.now().timestamp() - (days * 24 * 60 * 60)
-        
+
         try:
-            for filename in os.listdir(self.progress_dir):
-                if filename.endswith('.json'):
-                    filepath = os.path.join(self.progress_dir, filename)
-                    
-                    # Check file age
-                    if os.path.getmtime(filepath) < cutoff:
-                        os.remove(filepath)
-                        deleted += 1
-                        logger.info(f"Deleted old progress file: {filename}")
-            
+            self.flush()
+            with self._flush_lock:
+                index = dict(self._load_index())
+
+            for key, summary in index.items():
+                last_updated = summary.get('last_updated')
+                if last_updated and datetime.fromisoformat(last_updated).timestamp() < cutoff:
+                    self._remove_key(key)
+                    deleted += 1
+                    logger.info(f"Deleted old progress: {key}")
+
             if deleted > 0:
                 add_breadcrumb("Old progress cleaned", {"deleted": deleted})
-            
+
             return deleted
-            
+
         except Exception as e:
             logger.error(f"Error cleaning old progress: {e}")
             capture_exception(e, extra_data={"days": days, "context": "cleanup_old_progress"})
@@ -0,0 +1,208 @@
+"""
+Rate Limiter
+Hierarchical token-bucket limiter for outgoing Telegram sends
+"""
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import Config
+from ..utils.logger import logger
+from .fair_queue import FairQueue
+
+
+class TokenBucket:
+    """
+    Token bucket on the monotonic clock
+
+    Tokens refill continuously at `rate_per_minute / 60` per second up to
+    `burst`. Callers reserve a token up front (the balance may go negative)
+    and then wait for the deficit to refill, so waiters are served strictly
+    in reservation order.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: float = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize bucket
+
+        Args:
+            rate_per_minute: Sustained rate
+            burst: Bucket capacity (max tokens saved up while idle)
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """
+        Take one token
+
+        Returns:
+            float: Seconds until the reserved token is actually available
+        """
+        now = self.clock() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def refund(self):
+        """Give back a reserved token (e.g. waiter was cancelled)"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class RateLimiter:
+    """
+    Nested token-bucket limits
+
+    Scopes:
+    - global: whole process
+    - account: each sending account
+    - pair: each (account, target channel)
+
+    A send must fit in every scope it belongs to. Unset/zero rates
+    disable a scope. Single accounts can get their own rate (see
+    set_account_rate), e.g. from a rate profile. A pair can also be
+    blocked outright for a while (see block), e.g. by chat slow mode.
+
+    Sends made on behalf of a session take their global token through a
+    FairQueue, which splits the process-wide rate across sessions by
+    weight and priority instead of first come, first served.
+    """
+
+    def __init__(self, global_rate: float = None, account_rate: float = None,
+                 target_rate: float = None, burst: float = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize limiter (defaults come from Config)
+
+        Args:
+            global_rate: Messages per minute for the whole process
+            account_rate: Messages per minute per account
+            target_rate: Messages per minute per (account, target)
+            burst: Bucket capacity for every scope
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.global_rate = Config.MAX_MESSAGES_PER_MINUTE if global_rate is None else global_rate
+        self.account_rate = Config.MAX_MESSAGES_PER_MINUTE_PER_ACCOUNT if account_rate is None else account_rate
+        self.target_rate = Config.MAX_MESSAGES_PER_MINUTE_PER_TARGET if target_rate is None else target_rate
+        self.burst = Config.RATE_LIMIT_BURST if burst is None else burst
+        self.clock = clock
+        self.buckets: Dict[Tuple, TokenBucket] = {}
+        self.account_rates: Dict[str, float] = {}  # account_key -> rate overriding account_rate
+        self.cooldowns: Dict[Tuple[str, str], float] = {}  # (account_key, target_key) -> monotonic end
+        self.fair_queue = FairQueue(clock=clock)
+
+    def set_account_rate(self, account_key: str, rate: float):
+        """
+        Give one account its own messages-per-minute limit
+
+        Args:
+            account_key: Sending account
+            rate: Messages per minute (0 disables the account scope)
+        """
+        if self.account_rates.get(account_key) == rate:
+            return
+        self.account_rates[account_key] = rate
+        self.buckets.pop(('account', account_key), None)
+
+    def block(self, account_key: str, target_key: str, seconds: float):
+        """Hold back every send of an account to a target for `seconds`"""
+        end = self.clock() + seconds
+        pair = (account_key, target_key)
+        self.cooldowns[pair] = max(self.cooldowns.get(pair, 0.0), end)
+
+    def active_cooldowns(self) -> Dict[Tuple[str, str], float]:
+        """
+        Pair cooldowns still running
+
+        Returns:
+            Dict[Tuple[str, str], float]: (account_key, target_key) -> seconds left
+        """
+        now = self.clock()
+        return {pair: end - now for pair, end in self.cooldowns.items() if end > now}
+
+    def _bucket(self, scope: Tuple, rate: float) -> Optional[TokenBucket]:
+        if not rate or rate <= 0:
+            return None
+        bucket = self.buckets.get(scope)
+        if bucket is None:
+            bucket = TokenBucket(rate, self.burst, clock=self.clock)
+            self.buckets[scope] = bucket
+        return bucket
+
+    def _buckets_for(self, account_key: str = None, target_key: str = None,
+                     include_global: bool = True) -> List[TokenBucket]:
+        scopes = [(('global',), self.global_rate)] if include_global else []
+        if account_key is not None:
+            scopes.append((('account', account_key), self.account_rates.get(account_key, self.account_rate)))
+            if target_key is not None:
+                scopes.append((('pair', account_key, target_key), self.target_rate))
+        return [b for b in (self._bucket(scope, rate) for scope, rate in scopes) if b]
+
+    def reserve(self, account_key: str = None, target_key: str = None,
+                include_global: bool = True) -> Tuple[float, List[TokenBucket]]:
+        """
+        Reserve one send in every applicable scope
+
+        Args:
+            include_global: False if the global token was already taken
+
+        Returns:
+            Tuple[float, List[TokenBucket]]: Seconds to wait, and the buckets charged
+        """
+        now = self.clock()
+        buckets = self._buckets_for(account_key, target_key, include_global)
+        wait = max([b.reserve(now) for b in buckets], default=0.0)
+        end = self.cooldowns.get((account_key, target_key))
+        if end is not None:
+            if end > now:
+                wait = max(wait, end - now)
+            else:
+                del self.cooldowns[(account_key, target_key)]
+        return wait, buckets
+
+    async def acquire(self, account_key: str = None, target_key: str = None, session_key: str = None) -> float:
+        """
+        Wait until a send is allowed in every scope
+
+        Reservation happens without yielding, so concurrent callers are
+        served first-come first-served - except for the global scope of
+        session sends, which is queued fairly across sessions.
+
+        Args:
+            account_key: Sending account
+            target_key: Target channel
+            session_key: Session the send belongs to (enables fair queuing)
+
+        Returns:
+            float: Seconds waited
+        """
+        waited = 0.0
+        global_bucket = self._bucket(('global',), self.global_rate) if session_key is not None else None
+        if global_bucket:
+            waited = await self.fair_queue.acquire(session_key, global_bucket)
+
+        wait, buckets = self.reserve(account_key, target_key, include_global=global_bucket is None)
+        if wait <= 0:
+            return waited
+
+        if wait >= 5:
+            logger.warning(f"Rate limit hit (account={account_key}). Waiting {wait:.1f}s")
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            for bucket in buckets:
+                bucket.refund()
+            raise
+        return waited + wait
@@ -0,0 +1,240 @@
+"""
+Rate Profiles
+Per-account send rate profiles: ready-made presets and calibrated limits
+"""
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from telethon.errors import FloodWaitError
+
+from ..config import Config
+from ..utils.logger import logger, add_breadcrumb, capture_exception
+
+
+# Sustained messages per minute of each preset
+PRESETS = {
+    'safe': 10,
+    'balanced': 20,
+    'aggressive': 40
+}
+
+
+def profile_from_rate(rate_per_minute: float, preset: str) -> Dict:
+    """
+    Build a profile around a sustained send rate
+
+    The account's token bucket gets the rate itself; its pacing delay
+    never goes below one send interval, starts at two and may back off
+    to four (at least Config.PACING_MAX_DELAY).
+
+    Args:
+        rate_per_minute: Sustained messages per minute
+        preset: Preset name, or 'calibrated'
+
+    Returns:
+        Dict: Profile
+    """
+    interval = 60.0 / rate_per_minute
+    return {
+        'preset': preset,
+        'messages_per_minute': round(rate_per_minute, 1),
+        'initial_delay': round(interval * 2, 2),
+        'min_delay': round(interval, 2),
+        'max_delay': round(max(Config.PACING_MAX_DELAY, interval * 4), 2)
+    }
+
+
+class RateProfiles:
+    """
+    Rate profiles of all accounts, saved in JSON
+
+    An account without a profile uses the Config.RATE_PROFILE preset if
+    one is set, otherwise the global Config limits. The process-wide
+    MAX_MSG_PER_MIN limit applies on top of every profile.
+    """
+
+    def __init__(self, profiles_file: str):
+        """
+        Initialize Rate Profiles
+
+        Args:
+            profiles_file: Path to the profiles JSON file
+        """
+        self.profiles_file = profiles_file
+        self.profiles: Dict[str, Dict] = {}
+        self.load_profiles()
+
+    def load_profiles(self) -> Dict[str, Dict]:
+        """
+        Load profiles from JSON file
+
+        Returns:
+            Dict[str, Dict]: account_id -> profile
+        """
+        if not os.path.exists(self.profiles_file):
+            self.profiles = {}
+            return self.profiles
+
+        try:
+            with open(self.profiles_file, 'r', encoding='utf-8') as f:
+                self.profiles = json.load(f).get('profiles', {})
+            logger.info(f"Loaded {len(self.profiles)} rate profiles")
+        except Exception as e:
+            logger.error(f"Error loading rate profiles: {e}")
+            capture_exception(e, extra_data={"profiles_file": self.profiles_file})
+            self.profiles = {}
+        return self.profiles
+
+    def save_profiles(self) -> bool:
+        """
+        Save profiles to JSON file
+
+        Returns:
+            bool: True if saved successfully
+        """
+        try:
+            data = {
+                'profiles': self.profiles,
+                'last_updated': datetime.now().isoformat()
+            }
+            tmp_path = f'{self.profiles_file}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.profiles_file)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving rate profiles: {e}")
+            capture_exception(e, extra_data={"profiles_file": self.profiles_file})
+            return False
+
+    def get(self, account_id: str) -> Optional[Dict]:
+        """Profile of an account (the default preset if it has none)"""
+        profile = self.profiles.get(account_id)
+        if profile is None and Config.RATE_PROFILE in PRESETS:
+            profile = profile_from_rate(PRESETS[Config.RATE_PROFILE], Config.RATE_PROFILE)
+        return profile
+
+    def set_profile(self, account_id: str, profile: Dict) -> bool:
+        self.profiles[account_id] = profile
+        add_breadcrumb("Rate profile set", {"account_id": account_id, "preset": profile.get('preset')})
+        return self.save_profiles()
+
+    def set_preset(self, account_id: str, preset: str) -> bool:
+        """
+        Give an account a ready-made profile
+
+        Args:
+            account_id: Account ID
+            preset: 'safe', 'balanced' or 'aggressive'
+        """
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown rate preset: {preset}")
+        return self.set_profile(account_id, profile_from_rate(PRESETS[preset], preset))
+
+    def remove(self, account_id: str) -> bool:
+        if self.profiles.pop(account_id, None) is None:
+            return False
+        return self.save_profiles()
+
+    def apply(self, account_id: str, rate_limiter, pacer) -> bool:
+        """
+        Configure an account's rate limit and pacing from its profile
+
+        Returns:
+            bool: True if the account has a profile
+        """
+        profile = self.get(account_id)
+        if not profile:
+            return False
+        rate_limiter.set_account_rate(account_id, profile['messages_per_minute'])
+        pacer.configure(
+            account_id,
+            initial=profile['initial_delay'],
+            min_delay=profile['min_delay'],
+            max_delay=profile['max_delay']
+        )
+        return True
+
+
+class RateCalibrator:
+    """
+    Finds an account's send rate limit by probing a scratch target
+
+    Sends `probes_per_step` probe messages at each rate, starting at
+    `start_rate` and multiplying it by `growth` until the first FloodWait
+    (or `max_rate`). The profile uses `margin` times the last rate that
+    got through without one.
+    """
+
+    def __init__(self, start_rate: float = None, growth: float = 1.25, probes_per_step: int = 5,
+                 max_rate: float = None, margin: float = 0.8):
+        """
+        Initialize calibrator
+
+        Args:
+            start_rate: First probe rate (messages per minute)
+            growth: Rate multiplier between steps
+            probes_per_step: Probes sent at each rate
+            max_rate: Stop ramping here even without a FloodWait
+            margin: Fraction of the last good rate used for the profile
+        """
+        self.start_rate = Config.CALIBRATION_START_RATE if start_rate is None else start_rate
+        self.growth = growth
+        self.probes_per_step = probes_per_step
+        self.max_rate = Config.CALIBRATION_MAX_RATE if max_rate is None else max_rate
+        self.margin = margin
+        # Set after run(): (rate, seconds) of the FloodWait that ended calibration
+        self.flood_wait: Optional[tuple] = None
+
+    async def run(self, client, target, status_callback: Callable[[str], None], cleanup: bool = True) -> Dict:
+        """
+        Ramp up until the first FloodWait and build a profile
+
+        Args:
+            client: Account client
+            target: Resolved scratch target (probe messages are posted there)
+            status_callback: Progress text callback
+            cleanup: Delete the probe messages afterwards
+
+        Returns:
+            Dict: Calibrated profile
+        """
+        rate = self.start_rate
+        last_good = None
+        probe_ids: List[int] = []
+        self.flood_wait = None
+
+        while rate <= self.max_rate and self.flood_wait is None:
+            status_callback(f"Calibrating: trying {rate:.0f} msg/min...")
+            for _ in range(self.probes_per_step):
+                try:
+                    probe = await client.send_message(target, f"Rate calibration probe {len(probe_ids) + 1}")
+                    probe_ids.append(probe.id)
+                except FloodWaitError as e:
+                    self.flood_wait = (rate, e.seconds)
+                    break
+                await asyncio.sleep(60.0 / rate)
+            else:
+                last_good = rate
+                rate *= self.growth
+
+        if self.flood_wait:
+            logger.info(f"Calibration hit FloodWait ({self.flood_wait[1]}s) at {self.flood_wait[0]:.0f} msg/min")
+        if cleanup and probe_ids:
+            try:
+                await client.delete_messages(target, probe_ids)
+            except Exception as e:
+                logger.warning(f"Could not delete calibration probes: {e}")
+
+        # Flooded at the very first rate: settle below it
+        safe_rate = (last_good if last_good else self.start_rate / 2) * self.margin
+        profile = profile_from_rate(safe_rate, 'calibrated')
+        profile.update({
+            'calibrated_at': datetime.now().isoformat(),
+            'flood_at_rate': round(self.flood_wait[0], 1) if self.flood_wait else None
+        })
+        status_callback(f"Calibrated: {profile['messages_per_minute']} msg/min")
+        return profile
@@ -0,0 +1,546 @@
+"""
+SQLite Progress Manager
+Progress tracking backed by a single SQLite database (WAL mode)
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..utils.logger import logger, add_breadcrumb, capture_exception
+from ..utils.interval_set import IntervalSet
+from ..utils.sqlite_writer import BackgroundWriter, connect_wal
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pairs (
+    key TEXT PRIMARY KEY,
+    source_id TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    last_message_id INTEGER NOT NULL DEFAULT 0,
+    source_max_id INTEGER NOT NULL DEFAULT 0,
+    last_updated REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pairs_updated ON pairs(last_updated);
+CREATE INDEX IF NOT EXISTS idx_pairs_pending ON pairs(source_max_id - last_message_id);
+
+CREATE TABLE IF NOT EXISTS sent_ranges (
+    key TEXT NOT NULL,
+    start_id INTEGER NOT NULL,
+    end_id INTEGER NOT NULL,
+    PRIMARY KEY (key, start_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (key, name)
+) WITHOUT ROWID;
+"""
+
+_KEY_RE = re.compile(r'^channel_(.+)_to_(.+)$')
+
+
+class SQLiteProgressManager:
+    """
+    Drop-in alternative to ProgressManager (same public methods)
+
+    Tables:
+    - pairs: one row per source→target pair (watermark, source head, last update)
+    - sent_ranges: sent message IDs as [start_id, end_id] ranges
+    - counters: named per-pair totals (total_sent, total_skipped)
+
+    All writes run on one background thread and are committed in batches;
+    reads use a separate connection (WAL lets them run alongside writes)
+    after waiting for writes already queued, so callers read their own
+    writes.
+    """
+
+    WRITE_BATCH = 200  # Max queued writes committed in one transaction
+
+    def __init__(self, db_path: str, json_dir: Optional[str] = None):
+        """
+        Initialize SQLite Progress Manager
+
+        Args:
+            db_path: Database file path
+            json_dir: Directory of JSON progress files to import on first run
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        is_new = not os.path.exists(db_path)
+
+        self._read_conn = connect_wal(db_path)
+        self._read_conn.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+
+        self._writer = BackgroundWriter(db_path, self.WRITE_BATCH, name="progress-sqlite-writer")
+
+        if is_new and json_dir and os.path.isdir(json_dir):
+            self.import_json_progress(json_dir)
+
+        add_breadcrumb("SQLiteProgressManager initialized")
+
+    def _submit(self, fn: Callable[[sqlite3.Connection], object]) -> Future:
+        return self._writer.submit(fn)
+
+    def flush(self) -> bool:
+        """
+        Wait until every queued write is committed
+
+        Returns:
+            bool: True if every write queued since the last flush was committed
+        """
+        return self._writer.flush()
+
+    def close(self):
+        """Flush, stop the writer and close connections"""
+        self._writer.close()
+        with self._read_lock:
+            self._read_conn.close()
+
+    def _read(self, sql: str, params=()) -> List[tuple]:
+        self.flush()
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    # ---- range helpers (writer thread) ----
+
+    @staticmethod
+    def _add_range(conn: sqlite3.Connection, key: str, start: int, end: int):
+        """Merge [start, end] into sent_ranges (joins overlapping/adjacent ranges)"""
+        row = conn.execute(
+            "SELECT start_id, end_id FROM sent_ranges WHERE key = ? AND start_id < ? "
+            "ORDER BY start_id DESC LIMIT 1", (key, start)
+        ).fetchone()
+        if row and row[1] >= start - 1:
+            start = row[0]
+
+        rows = conn.execute(
+            "SELECT start_id, end_id FROM sent_ranges WHERE key = ? AND start_id BETWEEN ? AND ? "
+            "ORDER BY start_id", (key, start, end + 1)
+        ).fetchall()
+        if rows:
+            end = max(end, max(e for _, e in rows))
+            conn.execute(
+                "DELETE FROM sent_ranges WHERE key = ? AND start_id BETWEEN ? AND ?",
+                (key, start, rows[-1][0])
+            )
+        conn.execute("INSERT INTO sent_ranges (key, start_id, end_id) VALUES (?, ?, ?)", (key, start, end))
+
+    @staticmethod
+    def _contains(conn: sqlite3.Connection, key: str, message_id: int) -> bool:
+        row = conn.execute(
+            "SELECT end_id FROM sent_ranges WHERE key = ? AND start_id <= ? "
+            "ORDER BY start_id DESC LIMIT 1", (key, message_id)
+        ).fetchone()
+        return bool(row) and row[0] >= message_id
+
+    def _ensure_pair(self, conn: sqlite3.Connection, key: str, source_id: str, target_id: str):
+        conn.execute(
+            "INSERT OR IGNORE INTO pairs (key, source_id, target_id) VALUES (?, ?, ?)",
+            (key, str(source_id), str(target_id))
+        )
+
+    # ---- ProgressManager API ----
+
+    def get_progress_key(self, source_id: str, target_id: str) -> str:
+        """
+        Create unique key for source→target channel pair
+
+        Args:
+            source_id: Source channel ID
+            target_id: Target channel ID
+
+        Returns:
+            str: Unique progress key
+        """
+        return f"channel_{source_id}_to_{target_id}"
+
+    def _empty_progress(self) -> Dict:
+        return {
+            'sent_message_ids': IntervalSet(),
+            'last_message_id': 0,
+            'total_sent': 0,
+            'total_skipped': 0,
+            'last_updated': None
+        }
+
+    def _rows_to_progress(self, pair_row, ranges, counters: Dict[str, int]) -> Dict:
+        last_message_id, last_updated = pair_row
+        return {
+            'sent_message_ids': IntervalSet.from_ranges(ranges),
+            'last_message_id': last_message_id,
+            'total_sent': counters.get('total_sent', 0),
+            'total_skipped': counters.get('total_skipped', 0),
+            'last_updated': datetime.fromtimestamp(last_updated).isoformat() if last_updated else None
+        }
+
+    def load_progress(self, source_id: str, target_id: str) -> Dict:
+        """
+        Load progress for specific channel pair
+
+        Args:
+            source_id: Source channel ID
+            target_id: Target channel ID
+
+        Returns:
+            Dict: Progress data with sent_message_ids (IntervalSet) and last_message_id
+        """
+        key = self.get_progress_key(source_id, target_id)
+
+        try:
+            rows = self._read("SELECT last_message_id, last_updated FROM pairs WHERE key = ?", (key,))
+            if not rows:
+                logger.info(f"No progress found for {key}, starting fresh")
+                return self._empty_progress()
+
+            with self._read_lock:
+                ranges = self._read_conn.execute(
+                    "SELECT start_id, end_id FROM sent_ranges WHERE key = ? ORDER BY start_id", (key,)
+                ).fetchall()
+                counters = dict(self._read_conn.execute(
+                    "SELECT name, value FROM counters WHERE key = ?", (key,)
+                ).fetchall())
+
+            progress = self._rows_to_progress(rows[0], ranges, counters)
+            logger.info(f"Loaded progress for {key}: {progress['total_sent']} messages sent")
+            add_breadcrumb("Progress loaded", {"key": key, "total_sent": progress['total_sent']})
+            return progress
+
+        except Exception as e:
+            logger.error(f"Error loading progress for {key}: {e}")
+            capture_exception(e, extra_data={"key": key, "source_id": source_id, "target_id": target_id, "context": "load_progress"})
+            return self._empty_progress()
+
+    def _write_full(self, conn: sqlite3.Connection, key: str, source_id: str, target_id: str,
+                    ranges: List[List[int]], last_message_id: int, total_sent: int,
+                    total_skipped: int, last_updated: float):
+        self._ensure_pair(conn, key, source_id, target_id)
+        conn.execute(
+            "UPDATE pairs SET last_message_id = ?, last_updated = ? WHERE key = ?",
+            (last_message_id, last_updated, key)
+        )
+        conn.execute("DELETE FROM sent_ranges WHERE key = ?", (key,))
+        conn.executemany(
+            "INSERT INTO sent_ranges (key, start_id, end_id) VALUES (?, ?, ?)",
+            [(key, s, e) for s, e in ranges]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO counters (key, name, value) VALUES (?, ?, ?)",
+            [(key, 'total_sent', total_sent), (key, 'total_skipped', total_skipped)]
+        )
+
+    def save_progress(self, source_id: str, target_id: str,
+                     sent_message_ids, last_message_id: int,
+                     total_sent: int = 0, total_skipped: int = 0):
+        """
+        Save progress for specific channel pair (queued; see flush)
+
+        Args:
+            source_id: Source channel ID
+            target_id: Target channel ID
+            sent_message_ids: Sent message IDs (IntervalSet or any iterable of ints)
+            last_message_id: Last processed message ID
+            total_sent: Total messages sent
+            total_skipped: Total messages skipped
+
+        Returns:
+            bool: True if queued successfully
+        """
+        key = self.get_progress_key(source_id, target_id)
+
+        try:
+            if not isinstance(sent_message_ids, IntervalSet):
+                sent_message_ids = IntervalSet(sent_message_ids)
+            ranges = sent_message_ids.to_ranges()
+            now = time.time()
+
+            self._submit(lambda conn: self._write_full(
+                conn, key, source_id, target_id, ranges,
+                last_message_id, total_sent, total_skipped, now
+            ))
+
+            logger.info(f"Saved progress for {key}: {total_sent} sent, {total_skipped} skipped")
+            add_breadcrumb("Progress saved", {
+                "key": key,
+                "total_sent": total_sent,
+                "total_skipped": total_skipped
+            })
+            return True
+
+        except Exception as e:
+            logger.error(f"Error saving progress for {key}: {e}")
+            capture_exception(e, extra_data={"key": key, "source_id": source_id, "target_id": target_id, "total_sent": total_sent, "context": "save_progress"})
+            return False
+
+    def update_progress(self, source_id: str, target_id: str, message_id: int):
+        """
+        Update progress with new message
+
+        Args:
+            source_id: Source channel ID
+            target_id: Target channel ID
+            message_id: Message ID that was sent
+        """
+        key = self.get_progress_key(source_id, target_id)
+
+        def write(conn):
+            self._ensure_pair(conn, key, source_id, target_id)
+            if self._contains(conn, key, message_id):
+                return
+            self._add_range(conn, key, message_id, message_id)
+            conn.execute(
+                "INSERT INTO counters (key, name, value) VALUES (?, 'total_sent', 1) "
+                "ON CONFLICT (key, name) DO UPDATE SET value = value + 1", (key,)
+            )
+            conn.execute(
+                "UPDATE pairs SET last_message_id = MAX(last_message_id, ?), last_updated = ? WHERE key = ?",
+                (message_id, time.time(), key)
+            )
+
+        self._submit(write)
+
+    def append_progress(self, source_id: str, target_id: str, message_ids: Iterable[int],
+                        last_message_id: int, total_sent: int = 0, total_skipped: int = 0) -> bool:
+        """
+        Record newly sent IDs and the new watermark (queued; see flush)
+
+        Incremental form of save_progress (see ProgressManager.append_progress):
+        sent ranges at or below the watermark are dropped.
+
+        Returns:
+            bool: True if queued successfully
+        """
+        key = self.get_progress_key(source_id, target_id)
+        ranges = IntervalSet(m for m in message_ids if m > last_message_id).to_ranges()
+        now = time.time()
+
+        def write(conn):
+            self._ensure_pair(conn, key, source_id, target_id)
+            for start, end in ranges:
+                self._add_range(conn, key, start, end)
+            conn.execute("DELETE FROM sent_ranges WHERE key = ? AND end_id <= ?", (key, last_message_id))
+            conn.execute(
+                "UPDATE sent_ranges SET start_id = ? WHERE key = ? AND start_id <= ?",
+                (last_message_id + 1, key, last_message_id)
+            )
+            conn.execute(
+                "UPDATE pairs SET last_message_id = ?, last_updated = ? WHERE key = ?",
+                (last_message_id, now, key)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO counters (key, name, value) VALUES (?, ?, ?)",
+                [(key, 'total_sent', total_sent), (key, 'total_skipped', total_skipped)]
+            )
+
+        try:
+            self._submit(write)
+            return True
+        except Exception as e:
+            logger.error(f"Error appending progress for {key}: {e}")
+            capture_exception(e, extra_data={"key": key, "source_id": source_id, "target_id": target_id, "context": "append_progress"})
+            return False
+
+    def record_source_head(self, source_id: str, target_id: str, message_id: int):
+        """
+        Remember the newest message ID seen in the source
+
+        Pairs whose source head is past their watermark are "pending"
+        (see get_pending_pairs).
+        """
+        key = self.get_progress_key(source_id, target_id)
+
+        def write(conn):
+            self._ensure_pair(conn, key, source_id, target_id)
+            conn.execute(
+                "UPDATE pairs SET source_max_id = MAX(source_max_id, ?) WHERE key = ?",
+                (message_id, key)
+            )
+
+        self._submit(write)
+
+    def get_all_progress(self) -> Dict[str, Dict]:
+        """
+        Get a summary of every channel pair
+
+        Returns:
+            Dict[str, Dict]: key -> last_message_id, total_sent, total_skipped,
+            last_updated, range_count (same shape as ProgressManager, minus size)
+        """
+        try:
+            rows = self._read(
+                "SELECT p.key, p.last_message_id, p.last_updated, "
+                "(SELECT value FROM counters c WHERE c.key = p.key AND c.name = 'total_sent'), "
+                "(SELECT value FROM counters c WHERE c.key = p.key AND c.name = 'total_skipped'), "
+                "(SELECT COUNT(*) FROM sent_ranges r WHERE r.key = p.key) "
+                "FROM pairs p ORDER BY p.key"
+            )
+            all_progress = {
+                key: {
+                    'last_message_id': last_id,
+                    'total_sent': total_sent or 0,
+                    'total_skipped': total_skipped or 0,
+                    'last_updated': datetime.fromtimestamp(updated).isoformat() if updated else None,
+                    'range_count': range_count
+                }
+                for key, last_id, updated, total_sent, total_skipped, range_count in rows
+            }
+            logger.info(f"Loaded {len(all_progress)} progress records")
+            return all_progress
+
+        except Exception as e:
+            logger.error(f"Error getting all progress: {e}")
+            capture_exception(e, extra_data={"context": "get_all_progress"})
+            return {}
+
+    def get_recent_pairs(self, days: int) -> List[str]:
+        """
+        Keys of pairs updated in the last N days (newest first)
+
+        Args:
+            days: Age limit in days
+        """
+        cutoff = time.time() - days * 24 * 60 * 60
+        rows = self._read(
+            "SELECT key FROM pairs WHERE last_updated >= ? ORDER BY last_updated DESC", (cutoff,)
+        )
+        return [key for key, in rows]
+
+    def get_pending_pairs(self) -> List[Dict]:
+        """
+        Pairs whose source has messages past the saved watermark
+
+        Returns:
+            List[Dict]: key, source_id, target_id, last_message_id, source_max_id
+        """
+        rows = self._read(
+            "SELECT key, source_id, target_id, last_message_id, source_max_id FROM pairs "
+            "WHERE source_max_id - last_message_id > 0 ORDER BY key"
+        )
+        return [
+            {'key': key, 'source_id': source_id, 'target_id': target_id,
+             'last_message_id': last_id, 'source_max_id': max_id}
+            for key, source_id, target_id, last_id, max_id in rows
+        ]
+
+    @staticmethod
+    def _delete_key(conn: sqlite3.Connection, key: str) -> bool:
+        existed = conn.execute("DELETE FROM pairs WHERE key = ?", (key,)).rowcount > 0
+        conn.execute("DELETE FROM sent_ranges WHERE key = ?", (key,))
+        conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+        return existed
+
+    def clear_progress(self, source_id: str, target_id: str) -> bool:
+        """
+        Clear progress for specific channel pair
+
+        Args:
+            source_id: Source channel ID
+            target_id: Target channel ID
+
+        Returns:
+            bool: True if cleared successfully
+        """
+        key = self.get_progress_key(source_id, target_id)
+
+        try:
+            if self._submit(lambda conn: self._delete_key(conn, key)).result():
+                logger.info(f"Cleared progress for {key}")
+                add_breadcrumb("Progress cleared", {"key": key})
+                return True
+            logger.warning(f"No progress to clear for {key}")
+            return False
+
+        except Exception as e:
+            logger.error(f"Error clearing progress for {key}: {e}")
+            capture_exception(e, extra_data={"key": key, "source_id": source_id, "target_id": target_id, "context": "clear_progress"})
+            return False
+
+    def cleanup_old_progress(self, days: int = 30) -> int:
+        """
+        Cleanup progress older than specified days
+
+        Args:
+            days: Number of days to keep
+
+        Returns:
+            int: Number of pairs deleted
+        """
+        cutoff = time.time() - days * 24 * 60 * 60
+
+        def write(conn):
+            keys = [key for key, in conn.execute(
+                "SELECT key FROM pairs WHERE last_updated < ?", (cutoff,)
+            ).fetchall()]
+            for key in keys:
+                self._delete_key(conn, key)
+            return len(keys)
+
+        try:
+            deleted = self._submit(write).result()
+            if deleted > 0:
+                logger.info(f"Deleted {deleted} old progress records")
+                add_breadcrumb("Old progress cleaned", {"deleted": deleted})
+            return deleted
+
+        except Exception as e:
+            logger.error(f"Error cleaning old progress: {e}")
+            capture_exception(e, extra_data={"days": days, "context": "cleanup_old_progress"})
+            return 0
+
+    def import_json_progress(self, json_dir: str) -> int:
+        """
+        Import JSON progress files (ProgressManager format, incl. journals)
+
+        Pairs already in the database are left untouched.
+
+        Args:
+            json_dir: ProgressManager directory
+
+        Returns:
+            int: Number of pairs imported
+        """
+        from .progress_manager import ProgressManager
+
+        imported = 0
+        try:
+            json_manager = ProgressManager(json_dir)
+            for key in json_manager.get_all_progress():
+                match = _KEY_RE.match(key)
+                if not match:
+                    continue
+                source_id, target_id = match.groups()
+                progress = json_manager.load_progress(source_id, target_id)
+                last_updated = progress.get('last_updated')
+                last_updated = datetime.fromisoformat(last_updated).timestamp() if last_updated else time.time()
+                ranges = progress['sent_message_ids'].to_ranges()
+
+                def write(conn, key=key, source_id=source_id, target_id=target_id,
+                          ranges=ranges, progress=progress, last_updated=last_updated):
+                    if conn.execute("SELECT 1 FROM pairs WHERE key = ?", (key,)).fetchone():
+                        return False
+                    self._write_full(
+                        conn, key, source_id, target_id, ranges,
+                        progress['last_message_id'], progress['total_sent'],
+                        progress['total_skipped'], last_updated
+                    )
+                    return True
+
+                if self._submit(write).result():
+                    imported += 1
+
+            if imported:
+                logger.info(f"Imported {imported} JSON progress files into {self.db_path}")
+                add_breadcrumb("Progress imported", {"imported": imported})
+            return imported
+
+        except Exception as e:
+            logger.error(f"Error importing JSON progress: {e}")
+            capture_exception(e, extra_data={"json_dir": json_dir, "context": "import_json_progress"})
+            return imported
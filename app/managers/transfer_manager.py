@@ -3,20 +3,25 @@ Transfer Manager
 Manages message transfers between channels
 """
 import asyncio
-import random
+import hashlib
+from collections import Counter, deque
 import time
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from telethon import TelegramClient
-from telethon.errors import FloodWaitError
+from typing import List, Dict, Optional, Tuple
+from telethon import TelegramClient, events
+from telethon.errors import FloodWaitError, SlowModeWaitError, ChatForwardsRestrictedError, MessageNotModifiedError
 
 from ..config import Config
 from ..utils.logger import logger, add_breadcrumb, capture_exception, set_transfer_context
-from ..utils.helpers import download_media, upload_media
+from ..utils.helpers import relay_upload_media
 from telethon.tl.types import Message, MessageMediaPhoto, MessageMediaDocument, MessageMediaWebPage
 
 
 from .base_session import BaseSession
+from .rate_limiter import RateLimiter
+from .client_scheduler import ClientScheduler
+from .checkpoint import CheckpointTracker
+from .pacing import AccountPacer
+from .rate_profiles import RateCalibrator
 
 class TransferSession(BaseSession):
     """
@@ -27,10 +32,43 @@ class TransferSession(BaseSession):
         # Extend stats specific to Transfer
         self.stats.update({
             'total_sent': 0,
-            'consecutive_successes': 0
+            'consecutive_successes': 0,
+            'rate_limit_wait': 0.0,
+            'flood_waits': 0,
+            'relay_peak_buffer_bytes': 0,
+            'peak_rss_bytes': 0,
+            'inflight_bytes': 0,
+            'peak_inflight_bytes': 0,
+            'total_edited': 0,
+            'total_deleted': 0,
+            'intents_recovered': 0,
+            'account_pace': {},  # account_key -> current delay between sends (seconds)
+            'fair_share': 0.0  # Fraction of recent global send capacity this session got
         })
+        # client -> account key (set when the transfer starts)
+        self.account_keys: Dict[TelegramClient, str] = {}
+        # Set when the source forbids forwarding (copy falls back to re-sending)
+        self.copy_forward_disabled = False
+        # Resume point (set when a ProgressManager is attached)
+        self.checkpoint: Optional[CheckpointTracker] = None
+        # MessageMap pair key (set when a MessageMap is attached)
+        self.map_key: Optional[str] = None
+        # IntentLog pair key (set when an IntentLog is attached and resuming)
+        self.intent_key: Optional[str] = None
+        # Newest target message ID this pair is known to have (bounds intent reconciling)
+        self.last_target_id = 0
+        # New source messages from the update stream (live mode only)
+        self.live_queue: Optional[asyncio.Queue] = None
 
-    def update_stats(self, sent=0, skipped=0, errors=0, success=False):
+    def stop(self):
+        super().stop()
+        if self.live_queue is not None:
+            # Wake the live follower so the pipeline can drain and finish
+            self.live_queue.put_nowait(None)
+
+    def update_stats(self, sent=0, skipped=0, errors=0, success=False, message_ids=None):
+        if sent and message_ids and self.checkpoint:
+            self.checkpoint.mark_sent(message_ids)
         self.stats['total_sent'] += sent
         self.stats['total_skipped'] += skipped
         self.stats['total_errors'] += errors
@@ -47,14 +85,40 @@ class TransferManager:
     Manages multiple message transfer sessions
     """
     
-    def __init__(self):
-        """Initialize Transfer Manager"""
-        self.messages_per_minute = 0
-        self.minute_start_time = None
-        self.max_messages_per_minute = Config.MAX_MESSAGES_PER_MINUTE
-        self.client_flood_wait = {} 
+    def __init__(self, progress_manager=None, message_map=None, intent_log=None, rate_profiles=None,
+                 cooldown_store=None):
+        """
+        Initialize Transfer Manager
+        
+        Args:
+            progress_manager: Optional ProgressManager for resume checkpoints
+            message_map: Optional MessageMap recording source -> target message IDs
+            intent_log: Optional IntentLog making resumed sends exactly-once
+            rate_profiles: Optional RateProfiles with per-account send limits
+            cooldown_store: Optional CooldownStore keeping cooldowns across restarts
+        """
+        self.progress_manager = progress_manager
+        self.message_map = message_map
+        self.intent_log = intent_log
+        self.rate_profiles = rate_profiles
+        self.rate_limiter = RateLimiter()
+        self.client_flood_wait: Dict[str, float] = {}  # account_key -> monotonic release time
+        self.pacer = AccountPacer()  # Adaptive per-account delay between sends
         self.sessions: Dict[str, TransferSession] = {}
         
+        # Admission control: at most max_concurrent sessions run, the rest wait in FIFO order
+        self.max_concurrent = Config.MAX_CONCURRENT_TRANSFERS
+        self._active = set()  # running session IDs
+        self._pending = deque()  # (session_id, future, status_callback) waiting to start
+        
+        self.cooldown_store = cooldown_store
+        self._fallback_keys = set()  # client_<id> keys of clients without an account ID (not saved)
+        self._cooldowns_dirty = False
+        self._cooldown_saver: Optional[asyncio.Task] = None
+        if cooldown_store:
+            # FloodWaits from before a restart still apply
+            self.restore_cooldown_state(cooldown_store.load())
+        
         add_breadcrumb("TransferManager initialized")
     
     def create_session(self, session_id: str, transfer_config: Dict) -> None:
@@ -70,31 +134,129 @@ class TransferManager:
         return self.sessions.get(session_id)
 
     def stop_transfer(self, session_id: str):
-        """Stop a specific session"""
+        """Stop a specific session (a queued one leaves the queue)"""
         session = self.get_session(session_id)
         if session:
             session.stop()
             logger.info(f"Stopped session {session_id}")
+        for entry in list(self._pending):
+            if entry[0] == session_id:
+                self._pending.remove(entry)
+                if not entry[1].done():
+                    entry[1].set_result(False)
+                self._report_queue()
+
+    def get_queue_position(self, session_id: str) -> int:
+        """1-based position of a session waiting to start, 0 if it is not queued"""
+        for position, (pending_id, _, _) in enumerate(self._pending, 1):
+            if pending_id == session_id:
+                return position
+        return 0
+
+    def set_max_concurrent(self, limit: int):
+        """Change how many sessions may run at once (queued ones start if there is room)"""
+        self.max_concurrent = max(1, limit)
+        self._admit_pending()
+
+    async def _admit(self, session, status_callback) -> bool:
+        """
+        Wait for a free session slot
+        
+        Returns:
+            bool: True once the session may run, False if it was stopped while queued
+        """
+        if len(self._active) < self.max_concurrent and not self._pending:
+            self._active.add(session.session_id)
+            return True
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((session.session_id, future, status_callback))
+        self._report_queue()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.result():
+                # Admitted just as we were cancelled - give the slot back
+                self._release(session.session_id)
+            else:
+                self._pending = deque(entry for entry in self._pending if entry[1] is not future)
+                self._report_queue()
+            raise
+
+    def _release(self, session_id: str):
+        """Free a session's slot and start the next queued sessions"""
+        self._active.discard(session_id)
+        self._admit_pending()
+
+    def _admit_pending(self):
+        admitted = False
+        while self._pending and len(self._active) < self.max_concurrent:
+            session_id, future, _ = self._pending.popleft()
+            if future.done():
+                continue
+            self._active.add(session_id)
+            future.set_result(True)
+            admitted = True
+        if admitted:
+            self._report_queue()
+
+    def _report_queue(self):
+        """Tell every queued session its current position"""
+        for position, (session_id, _, status_callback) in enumerate(self._pending, 1):
+            session = self.get_session(session_id)
+            if session:
+                session.status = f"Queued ({position})"
+            status_callback(session_id, f"Queued: position {position} of {len(self._pending)} "
+                                        f"({len(self._active)} running)")
 
     async def start_mass_transfer(self, session_id: str, clients: List[TelegramClient], status_callback):
         """
         Run a specific transfer session
+        
+        Pipelined: a scanner task reads the source history into a bounded
+        queue while sender workers drain it, so reads and sends overlap.
+        The scanner blocks when the queue is full (backpressure).
+        
+        With config 'live', the session does not end after the backfill:
+        new source messages from the update stream feed the same queue
+        (and edits are applied to mapped copies) until the session is
+        stopped. The handlers are registered before the backfill starts,
+        so nothing posted meanwhile is missed; messages both scanned and
+        received live are sent once.
+        
+        At most max_concurrent sessions run at once (a live session holds
+        its slot until stopped); later ones wait in FIFO order and get
+        their queue position through status_callback.
         """
         session = self.get_session(session_id)
         if not session:
             logger.error(f"Session {session_id} not found")
             return
 
+        if not await self._admit(session, status_callback):
+            status_callback(session_id, "Stopped before start")
+            return
+
         try:
             config = session.config
             source = config['source']
             target = config['target']
             start_id = config.get('start_id', 0)
             file_types = config.get('file_types', [])
+            mode = config.get('mode', 'copy')
             
             # Set transfer context for Sentry
             set_transfer_context(session_id, source_channel=str(source), target_channel=str(target))
             
+            self._assign_account_keys(session, clients)
+            
+            # Share of the global send rate against concurrent sessions
+            self.rate_limiter.fair_queue.register(
+                session_id,
+                weight=config.get('weight', Config.FAIR_DEFAULT_WEIGHT),
+                priority=config.get('priority', Config.FAIR_LIVE_PRIORITY if config.get('live') else 0)
+            )
+            
             # 1. Resolve Entities
             status_callback(session_id, "Resolving channels...")
             primary = clients[0]
@@ -106,6 +268,30 @@ class TransferManager:
                 capture_exception(e, extra_data={"source": source, "target": target, "context": "resolve_channels"})
                 raise Exception(f"Failed to resolve channel ({source} -> {target}): {e}. Make sure the account is a member.")
             
+            # Resume from the saved checkpoint of this source/target pair
+            if self.progress_manager and config.get('resume', True):
+                session.checkpoint = CheckpointTracker(
+                    self.progress_manager, self._entity_key(source_entity), self._entity_key(target_entity)
+                )
+                if session.checkpoint.watermark > start_id:
+                    start_id = session.checkpoint.watermark
+                    status_callback(session_id, f"Resuming after ID {start_id}...")
+            
+            if self.message_map:
+                session.map_key = self.message_map.pair_key(
+                    self._entity_key(source_entity), self._entity_key(target_entity)
+                )
+            
+            # Sends cut short by a crash: find out which reached the target before re-sending
+            if self.intent_log and session.checkpoint:
+                session.intent_key = self.intent_log.pair_key(
+                    self._entity_key(source_entity), self._entity_key(target_entity)
+                )
+                session.last_target_id = await asyncio.get_running_loop().run_in_executor(
+                    None, self.intent_log.last_target, session.intent_key
+                )
+                await self._reconcile_intents(session, primary, target_entity, status_callback)
+            
             # 2. Iterate Messages
             status_callback(session_id, f"Scanning from ID {start_id}...")
             add_breadcrumb("transfer", "Starting message iteration", "info", {"session_id": session_id, "start_id": start_id})
@@ -114,33 +300,54 @@ class TransferManager:
             if start_id > 0:
                 kwargs['min_id'] = start_id
             
-            batch_size = 20
-            batch = []
+            live_handlers = []
+            if config.get('live'):
+                live_handlers = self._attach_live_handlers(session, primary, source_entity, target_entity)
             
-            # Simple round-robin index for this session
-            client_index = 0
+            queue = asyncio.Queue(maxsize=Config.TRANSFER_QUEUE_SIZE)
+            if config.get('parallel_accounts', Config.PARALLEL_ACCOUNTS) and len(clients) > 1:
+                # One sender per account, each with its own pacing, sharing the queue
+                status_callback(session_id, f"Starting {len(clients)} account senders...")
+                workers = [
+                    asyncio.create_task(self._account_worker(
+                        session, client, queue, source, target, file_types, mode, status_callback,
+                        entities=(source_entity, target_entity) if client is primary else None
+                    ))
+                    for client in clients
+                ]
+            else:
+                workers = [
+                    asyncio.create_task(self._send_worker(
+                        session, clients, queue, source_entity, target_entity, file_types, mode, status_callback
+                    ))
+                    for _ in range(max(1, Config.TRANSFER_SENDER_WORKERS))
+                ]
+            scanner = asyncio.create_task(self._scan_messages(
+                session, primary, source_entity, kwargs, queue, file_types, len(workers), status_callback
+            ))
             
-            async for message in primary.iter_messages(source_entity, **kwargs):
-                if not session.is_running:
-                    status_callback(session_id, "Stopped.")
-                    break
-
-                batch.append(message)
-                
-                if len(batch) >= batch_size:
-                    status_callback(session_id, f"Processing batch {message.id}...")
-                    
-                    # Process batch
-                    await self.process_batch(session, clients, batch, source_entity, target_entity, file_types, mode=session.config.get('mode', 'copy'))
-                    batch = [] # Clear batch
-                    
-                    # Update status text
-                    s = session.stats
-                    status_callback(session_id, f"Running: Sent {s['total_sent']} | Errors {s['total_errors']}")
-
-            # Process remaining
-            if batch and session.is_running:
-                await self.process_batch(session, clients, batch, source_entity, target_entity, file_types, mode=session.config.get('mode', 'copy'))
+            try:
+                # Supervise scanner and senders together: if one fails, nothing would
+                # drain (or fill) the bounded queue and the others would block forever
+                done, _ = await asyncio.wait([scanner, *workers], return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    if not task.cancelled() and task.exception():
+                        raise task.exception()
+            finally:
+                # A task failed or we were cancelled - don't leave orphan tasks
+                for task in [scanner, *workers]:
+                    if not task.done():
+                        task.cancel()
+                for callback in live_handlers:
+                    primary.remove_event_handler(callback)
+                if session.checkpoint:
+                    await self._save_checkpoint(session, force=True)
+                if self.message_map:
+                    await asyncio.get_running_loop().run_in_executor(None, self.message_map.flush)
+                saver = self.queue_cooldown_save()
+                if saver:
+                    await asyncio.shield(saver)
+                self.rate_limiter.fair_queue.unregister(session_id)
             
             if session.is_running:
                 session.status = "Completed"
@@ -158,43 +365,987 @@ class TransferManager:
             session.status = f"Error: {str(e)}"
             status_callback(session_id, f"Error: {str(e)}")
             session.is_running = False
+        finally:
+            self._release(session_id)
+
+    def _assign_account_keys(self, session, clients):
+        """Accounts are identified by their account ID when the caller provides it"""
+        account_ids = session.config.get('account_ids') or []
+        session.account_keys = {
+            client: (account_ids[i] if i < len(account_ids) else self._fallback_key(client))
+            for i, client in enumerate(clients)
+        }
+        if self.rate_profiles:
+            for account_key in session.account_keys.values():
+                self.rate_profiles.apply(account_key, self.rate_limiter, self.pacer)
 
-    async def process_batch(self, session, clients, messages, source, target, file_types, mode='copy'):
-        """Process a batch of messages for a session"""
+    async def calibrate_account(self, client: TelegramClient, account_id: str, target, status_callback,
+                                calibrator: RateCalibrator = None) -> Optional[Dict]:
+        """
+        Measure an account's send limit on a scratch target and save it as its profile
         
-        for message in messages:
+        Probe messages are posted to the target (and deleted afterwards),
+        so it must be a chat nobody minds; the FloodWait that ends the
+        ramp is honoured by the transfers that follow.
+        
+        Args:
+            client: Account client
+            account_id: Account ID (profile key)
+            target: Scratch target channel/chat
+            status_callback: Callback(text)
+            calibrator: Optional RateCalibrator with custom ramp settings
+            
+        Returns:
+            Optional[Dict]: Saved profile, or None on error
+        """
+        calibrator = calibrator or RateCalibrator()
+        try:
+            target_entity = await self.get_entity_robust(client, target)
+            add_breadcrumb("transfer", "Rate calibration started", "info", {"account": account_id})
+            profile = await calibrator.run(client, target_entity, status_callback)
+        except Exception as e:
+            logger.error(f"Calibration error ({account_id}): {e}")
+            capture_exception(e, extra_data={"account": account_id, "context": "calibrate_account"})
+            status_callback(f"Error: {e}")
+            return None
+        
+        if calibrator.flood_wait:
+            # The account is flood-waited now - park it like any other FloodWait
+            release = time.monotonic() + calibrator.flood_wait[1]
+            self.client_flood_wait[account_id] = max(self.client_flood_wait.get(account_id, 0.0), release)
+            saver = self.queue_cooldown_save()
+            if saver:
+                await saver
+        if self.rate_profiles:
+            self.rate_profiles.set_profile(account_id, profile)
+            self.rate_profiles.apply(account_id, self.rate_limiter, self.pacer)
+        logger.info(f"Account {account_id} calibrated at {profile['messages_per_minute']} msg/min")
+        return profile
+
+    async def start_sync(self, session_id: str, clients: List[TelegramClient], status_callback):
+        """
+        Apply later source edits and deletions to an already mirrored pair
+        
+        Walks the mapped source IDs (MessageMap) in chunks of
+        SYNC_CHUNK_SIZE with one get_messages call per chunk. Messages
+        edited since the last completed sync get their target copy edited;
+        messages gone from the source get their target copies deleted in
+        batches. Config 'start_id'/'max_id' narrow the walked window.
+        
+        Source reads only wait out FloodWaits; the send rate limits and
+        pacing apply to the edits and deletions. Like a transfer, a sync
+        takes a session slot (see max_concurrent) and a fair share of the
+        global send rate.
+        """
+        session = self.get_session(session_id)
+        if not session:
+            logger.error(f"Session {session_id} not found")
+            return
+        
+        if not await self._admit(session, status_callback):
+            status_callback(session_id, "Stopped before start")
+            return
+        
+        try:
+            if not self.message_map:
+                raise Exception("Sync needs a message map (nothing records which target message is which)")
+            
+            config = session.config
+            source = config['source']
+            target = config['target']
+            set_transfer_context(session_id, source_channel=str(source), target_channel=str(target))
+            self._assign_account_keys(session, clients)
+            self.rate_limiter.fair_queue.register(
+                session_id,
+                weight=config.get('weight', Config.FAIR_DEFAULT_WEIGHT),
+                priority=config.get('priority', 0)
+            )
+            
+            status_callback(session_id, "Resolving channels...")
+            try:
+                source_entity = await self.get_entity_robust(clients[0], source)
+                target_entity = await self.get_entity_robust(clients[0], target)
+            except Exception as e:
+                capture_exception(e, extra_data={"source": source, "target": target, "context": "resolve_channels"})
+                raise Exception(f"Failed to resolve channel ({source} -> {target}): {e}. Make sure the account is a member.")
+            
+            key = self.message_map.pair_key(self._entity_key(source_entity), self._entity_key(target_entity))
+            session.map_key = key
+            scheduler = self.create_scheduler(session, clients)
+            read_scheduler = self.create_scheduler(session, clients, paced=False)
+            loop = asyncio.get_running_loop()
+            
+            last_sync = await loop.run_in_executor(None, self.message_map.get_last_sync, key) or 0.0
+            started = time.time()
+            after = config.get('start_id', 0)
+            max_id = config.get('max_id')
+            checked = 0
+            status_callback(session_id, "Checking for edits and deletions...")
+            
+            while session.is_running:
+                chunk = await loop.run_in_executor(None, self.message_map.get_chunk, key, after, Config.SYNC_CHUNK_SIZE)
+                if max_id:
+                    chunk = {sid: tids for sid, tids in chunk.items() if sid <= max_id}
+                if not chunk:
+                    break
+                ids = list(chunk)
+                after = ids[-1]
+                
+                ran, messages = await self._read_on_client(
+                    session, read_scheduler,
+                    lambda client: client.get_messages(source_entity, ids=ids)
+                )
+                if not ran:
+                    break
+                
+                edited = [
+                    m for m in messages
+                    if m is not None and m.edit_date and m.edit_date.timestamp() > last_sync
+                ]
+                deleted = [sid for sid, m in zip(ids, messages) if m is None]
+                await self._apply_edits(session, scheduler, target_entity, edited, chunk)
+                await self._apply_deletes(session, scheduler, target_entity, deleted, chunk)
+                
+                checked += len(ids)
+                s = session.stats
+                status_callback(session_id, f"Syncing: checked {checked} | edited {s['total_edited']} | deleted {s['total_deleted']}")
+            
+            if session.is_running:
+                self.message_map.set_last_sync(key, started)
+                await loop.run_in_executor(None, self.message_map.flush)
+                session.status = "Completed"
+                status_callback(session_id, "Sync completed!")
+                add_breadcrumb("transfer", "Sync completed", "info", {
+                    "session_id": session_id,
+                    "checked": checked,
+                    "edited": session.stats['total_edited'],
+                    "deleted": session.stats['total_deleted']
+                })
+                session.is_running = False
+        
+        except Exception as e:
+            logger.error(f"Sync {session_id} error: {e}")
+            capture_exception(e, extra_data={"session_id": session_id, "context": "start_sync"})
+            session.status = f"Error: {str(e)}"
+            status_callback(session_id, f"Error: {str(e)}")
+            session.is_running = False
+        finally:
+            self.rate_limiter.fair_queue.unregister(session_id)
+            self._release(session_id)
+
+    def attach_sync_handlers(self, session_id: str, client: TelegramClient, source_entity, target_entity) -> List:
+        """
+        Apply edits/deletions from the update stream while connected
+        
+        Registers MessageEdited / MessageDeleted handlers on the source
+        chat that push changes to the mapped target messages immediately.
+        
+        Returns:
+            List: Registered handlers (pass to client.remove_event_handler to detach)
+        """
+        session = self.get_session(session_id)
+        key = self.message_map.pair_key(self._entity_key(source_entity), self._entity_key(target_entity))
+        session.map_key = key
+        if not session.account_keys:
+            self._assign_account_keys(session, [client])
+        scheduler = self.create_scheduler(session, [client])
+        loop = asyncio.get_running_loop()
+        
+        async def on_edited(event):
+            chunk = await loop.run_in_executor(None, self.message_map.get_range, key, event.message.id, event.message.id)
+            await self._apply_edits(session, scheduler, target_entity, [event.message], chunk)
+        
+        async def on_deleted(event):
+            ids = sorted(event.deleted_ids or [])
+            if not ids:
+                # Update without message IDs - nothing to map
+                return
+            chunk = await loop.run_in_executor(None, self.message_map.get_range, key, ids[0], ids[-1])
+            await self._apply_deletes(session, scheduler, target_entity, [i for i in ids if i in chunk], chunk)
+        
+        client.add_event_handler(on_edited, events.MessageEdited(chats=source_entity))
+        client.add_event_handler(on_deleted, events.MessageDeleted(chats=source_entity))
+        return [on_edited, on_deleted]
+
+    async def _scan_messages(self, session, client, source, iter_kwargs, queue, file_types, workers_count, status_callback):
+        """
+        Producer: walk source history and feed allowed work units to the queue.
+        
+        A unit is a list of messages: a single message, or all members of
+        an album (same grouped_id), so albums are never split between
+        sends. Ends by putting one None sentinel per worker.
+        """
+        album = []
+        last_id = iter_kwargs.get('min_id', 0)
+        async for message in client.iter_messages(source, **iter_kwargs):
             if not session.is_running:
+                status_callback(session.session_id, "Stopped.")
                 break
-                
-            # Filter Logic
-            if not self.is_message_allowed(message, file_types):
-                session.update_stats(skipped=1)
+            last_id = max(last_id, message.id)
+            
+            # Album members arrive consecutively - the album ends at the first other message
+            if album and message.grouped_id != album[0].grouped_id:
+                await self._enqueue_unit(session, queue, album, registered=True)
+                album = []
+            
+            # Filter Logic - only allowed messages reach the senders
+            if not self._accept(session, message, file_types):
+                continue
+            
+            if message.grouped_id:
+                self._buffer_album_member(session, album, message)
+                continue
+            
+            await self._enqueue_unit(session, queue, [message])
+        
+        if album and session.is_running:
+            await self._enqueue_unit(session, queue, album, registered=True)
+        self._record_source_head(session, last_id)
+        
+        if session.live_queue is not None and session.is_running:
+            status_callback(session.session_id, f"Live: following new messages after ID {last_id}...")
+            await self._follow_live(session, queue, file_types, last_id)
+        
+        for _ in range(workers_count):
+            await queue.put(None)
+
+    def _record_source_head(self, session, message_id: int):
+        """Remember the newest source ID scanned, for progress backends that track pending pairs"""
+        record = getattr(self.progress_manager, 'record_source_head', None)
+        if record and session.checkpoint and message_id:
+            record(session.checkpoint.source_key, session.checkpoint.target_key, message_id)
+
+    def _accept(self, session, message, file_types) -> bool:
+        """Scanner filter: False (and counted as skipped) for filtered or already sent messages"""
+        already_sent = session.checkpoint and session.checkpoint.already_sent(message.id)
+        if already_sent or not self.is_message_allowed(message, file_types):
+            session.update_stats(skipped=1)
+            if session.checkpoint:
+                session.checkpoint.scanned([message.id])
+                session.checkpoint.processed([message.id])
+            return False
+        return True
+
+    async def _follow_live(self, session, queue, file_types, last_id):
+        """
+        Producer after the backfill: feed messages from the update stream
+        
+        Messages at or below last_id were already handled by the scan.
+        An album is complete once a different message arrives or no
+        member arrived for LIVE_ALBUM_WAIT seconds.
+        """
+        album = []
+        while session.is_running:
+            try:
+                message = await asyncio.wait_for(
+                    session.live_queue.get(), timeout=Config.LIVE_ALBUM_WAIT if album else None
+                )
+            except asyncio.TimeoutError:
+                await self._enqueue_unit(session, queue, album, registered=True)
+                album = []
+                continue
+            if message is None:
+                break  # stopped
+            if message.id <= last_id:
+                continue  # seen by the backfill (or a duplicate update)
+            last_id = message.id
+            
+            if album and message.grouped_id != album[0].grouped_id:
+                await self._enqueue_unit(session, queue, album, registered=True)
+                album = []
+            if not self._accept(session, message, file_types):
+                continue
+            if message.grouped_id:
+                self._buffer_album_member(session, album, message)
+                continue
+            await self._enqueue_unit(session, queue, [message])
+        
+        if album and session.is_running:
+            await self._enqueue_unit(session, queue, album, registered=True)
+
+    def _attach_live_handlers(self, session, client, source_entity, target_entity) -> List:
+        """
+        Subscribe to new and edited messages of the source
+        
+        New messages go to session.live_queue (consumed by _follow_live);
+        edits are applied to the mapped target copies through the same
+        scheduler and rate limiter when a MessageMap is attached.
+        
+        Returns:
+            List: Registered callbacks (for remove_event_handler)
+        """
+        session.live_queue = asyncio.Queue()
+        
+        async def on_new(event):
+            session.live_queue.put_nowait(event.message)
+        
+        client.add_event_handler(on_new, events.NewMessage(chats=source_entity))
+        handlers = [on_new]
+        
+        if self.message_map and session.map_key:
+            scheduler = self.create_scheduler(session, [client])
+            loop = asyncio.get_running_loop()
+            
+            async def on_edited(event):
+                mapping = await loop.run_in_executor(
+                    None, self.message_map.get_range, session.map_key, event.message.id, event.message.id
+                )
+                await self._apply_edits(session, scheduler, target_entity, [event.message], mapping)
+            
+            client.add_event_handler(on_edited, events.MessageEdited(chats=source_entity))
+            handlers.append(on_edited)
+        return handlers
+
+    def _buffer_album_member(self, session, album, message):
+        """
+        Hold an album member until its album is complete
+        
+        It is registered with the checkpoint right away, so a later member
+        that is skipped (and processed at once) cannot move the watermark
+        past it while it is still buffered.
+        """
+        album.append(message)
+        if session.checkpoint:
+            session.checkpoint.scanned([message.id])
+
+    async def _enqueue_unit(self, session, queue, unit, registered=False):
+        """Hand a unit to the senders (registered: its IDs are already scanned)"""
+        if session.checkpoint and not registered:
+            session.checkpoint.scanned([m.id for m in unit])
+        # Blocks while the queue is full (backpressure)
+        await queue.put(unit)
+        session.stats['last_scanned_id'] = unit[-1].id
+
+    def _group_units(self, messages) -> List[List[Message]]:
+        """Split consecutive messages into units, keeping album members together"""
+        units = []
+        for message in messages:
+            if units and message.grouped_id and units[-1][0].grouped_id == message.grouped_id:
+                units[-1].append(message)
+            else:
+                units.append([message])
+        return units
+
+    async def _send_worker(self, session, clients, queue, source, target, file_types, mode, status_callback):
+        """Consumer: drain the queue and send units until the None sentinel"""
+        scheduler = self.create_scheduler(session, clients)
+        processed = 0
+        carry = None
+        while True:
+            if carry is not None:
+                unit, carry = carry, None
+            else:
+                unit = await queue.get()
+            if unit is None:
+                return
+            
+            # Keep draining after stop so the scanner never blocks on a full queue
+            if not session.is_running:
                 continue
+            
+            batched = self._uses_batch_forward(session, mode)
+            if batched:
+                # One RPC forwards a run of up to FORWARD_BATCH_SIZE messages (whole albums only)
+                batch = list(unit)
+                finished, carry = self._drain_batch(queue, batch, Config.FORWARD_BATCH_SIZE)
+                if mode == 'copy':
+                    _, unsent = await self.process_copy_batch(session, scheduler, batch, source, target, file_types)
+                    unsent_ids = {m.id for m in unsent}
+                    done = [m for m in batch if m.id not in unsent_ids]
+                else:
+                    result = await self.process_forward_batch(session, scheduler, batch, source, target)
+                    done = [] if result is None else batch
+                count = len(batch)
+            else:
+                finished = False
+                result = await self.process_unit(session, scheduler, unit, source, target, file_types, mode)
+                count = len(unit)
+                # None: stopped while waiting for a send slot, so the unit stays below the watermark
+                done = [] if result is None else unit
+            
+            if session.checkpoint and done:
+                session.checkpoint.processed([m.id for m in done])
+                await self._save_checkpoint(session)
+            
+            if (processed + count) // Config.TRANSFER_STATUS_INTERVAL > processed // Config.TRANSFER_STATUS_INTERVAL:
+                s = session.stats
+                status_callback(session.session_id, f"Running: Sent {s['total_sent']} | Errors {s['total_errors']}")
+            processed += count
+            
+            if finished:
+                return
 
+    def _drain_batch(self, queue, batch, limit):
+        """
+        Move already-queued units into batch without waiting
+        
+        Returns:
+            Tuple[bool, Optional[List]]: (True if this worker's None sentinel was
+            consumed, unit that did not fit and must be sent next)
+        """
+        while len(batch) < limit:
+            try:
+                unit = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return False, None
+            if unit is None:
+                return True, None
+            if len(batch) + len(unit) > limit:
+                return False, unit
+            batch.extend(unit)
+        return False, None
+
+    async def _account_worker(self, session, client, queue, source, target, file_types, mode, status_callback, entities=None):
+        """
+        Sender bound to a single account
+        
+        Channel access hashes are per account, so each account resolves
+        the entities itself unless they were already resolved with it.
+        """
+        if entities:
+            source_entity, target_entity = entities
+        else:
+            try:
+                source_entity = await self.get_entity_robust(client, source)
+                target_entity = await self.get_entity_robust(client, target)
+            except Exception as e:
+                # This account can't see the channels - leave the work to the others
+                logger.warning(f"Account sender disabled for session {session.session_id}: {e}")
+                capture_exception(e, extra_data={"session_id": session.session_id, "context": "account_worker_resolve"})
+                return
+        
+        await self._send_worker(session, [client], queue, source_entity, target_entity, file_types, mode, status_callback)
+
+    async def _run_on_client(self, session, scheduler, target, send):
+        """
+        Run send(client) on the next free account
+        
+        A FloodWait parks the account in the scheduler and the call is
+        retried on the next free account. One rate-limit token is taken
+        per attempt (i.e. per RPC). Each outcome is fed back to the
+        account's pacing controller, which sets how long the scheduler
+        keeps the account idle before its next send.
+        
+        Returns:
+            Tuple[bool, Any]: (True, send result), or (False, None) if there is
+            no account at all (or the session stopped while waiting)
+        """
+        while session.is_running:
             # Get Client
-            client = await self.get_next_client(clients)
+            client, wait = self.get_next_client(scheduler)
             if not client:
-                session.update_stats(errors=1)
+                if not wait:
+                    return False, None
+                # Every account is flood-waited or pacing - sleep until the first is free
+                logger.debug(f"All accounts busy, waiting {wait:.1f}s")
+                await asyncio.sleep(wait)
                 continue
             
-            # Rate Limit (Global)
-            await self.check_global_rate_limit()
+            account_key = session.account_keys.get(client)
+            
+            # Rate Limit (global / account / account+target)
+            session.stats['rate_limit_wait'] += await self.check_rate_limit(account_key, target, session.session_id)
+            session.stats['fair_share'] = round(self.rate_limiter.fair_queue.share(session.session_id), 3)
             
-            # Transfer
+            started = time.monotonic()
             try:
-                success = await self.transfer_single_message(client, message, source, target, file_types, mode)
-                if success:
-                    session.update_stats(sent=1, success=True)
-                    add_breadcrumb("transfer", "Message transferred", "debug", {"message_id": message.id, "mode": mode})
-                else:
-                    session.update_stats(errors=1, success=False)
+                result = await send(client)
+            except FloodWaitError as e:
+                self.report_flood_wait(scheduler, account_key, e.seconds)
+                session.stats['flood_waits'] += 1
+                session.stats['account_pace'][account_key] = round(self.pacer.delay(account_key), 2)
+                continue
+            except SlowModeWaitError as e:
+                # Slow mode holds back this account in this chat only; the limiter waits it out
+                self.report_target_cooldown(account_key, target, e.seconds)
+                continue
+            except Exception:
+                self.pacer.record_error(account_key)
+                raise
+            # Relayed media takes long by nature - only its success counts
+            timed = session.config.get('mode') != 'download_upload'
+            self.pacer.record_success(account_key, time.monotonic() - started if timed else None)
+            session.stats['account_pace'][account_key] = round(self.pacer.delay(account_key), 2)
+            return True, result
+        return False, None
+
+    async def _read_on_client(self, session, scheduler, read):
+        """
+        Run read(client) on the next account not in FloodWait
+        
+        Reads take no send rate-limit tokens and skip pacing; a FloodWait
+        parks the account (for sends too) and the read is retried.
+        
+        Returns:
+            Tuple[bool, Any]: (True, read result), or (False, None) if there is
+            no account at all (or the session stopped while waiting)
+        """
+        while session.is_running:
+            client, wait = self.get_next_client(scheduler)
+            if not client:
+                if not wait:
+                    return False, None
+                logger.debug(f"All accounts in FloodWait, waiting {wait:.1f}s")
+                await asyncio.sleep(wait)
+                continue
+            
+            try:
+                return True, await read(client)
+            except FloodWaitError as e:
+                self.report_flood_wait(scheduler, session.account_keys.get(client), e.seconds, pace=False)
+                session.stats['flood_waits'] += 1
+        return False, None
+
+    async def process_unit(self, session, scheduler, unit, source, target, file_types, mode='copy'):
+        """Send a work unit: a single message, or a whole album in one request"""
+        if len(unit) == 1:
+            return await self.process_message(session, scheduler, unit[0], source, target, file_types, mode)
+        return await self.process_album(session, scheduler, unit, source, target, mode)
+
+    async def process_album(self, session, scheduler, album, source, target, mode='copy'):
+        """
+        Send album members (same grouped_id) as one request
+        
+        Returns:
+            Optional[bool]: True if the album was sent, None if the session
+            stopped before it was attempted
+        """
+        intent = await self._begin_intent(session, album)
+        try:
+            ran, sent = await self._run_on_client(
+                session, scheduler, target,
+                lambda client: self.transfer_album(client, album, source, target, mode, stats=session.stats)
+            )
+        except Exception as e:
+            logger.error(f"Album transfer error: {e}")
+            capture_exception(e, extra_data={
+                "grouped_id": album[0].grouped_id, "message_ids": [m.id for m in album], "mode": mode,
+                "context": "process_album"
+            })
+            session.update_stats(errors=len(album), success=False)
+            return False
+        finally:
+            self._end_intent(session, intent)
+        
+        if sent:
+            session.update_stats(sent=len(album), success=True, message_ids=[m.id for m in album])
+            self._record_mapping(session, album, sent)
+            add_breadcrumb("transfer", "Album transferred", "debug", {"grouped_id": album[0].grouped_id, "count": len(album), "mode": mode})
+            return True
+        if not ran and not session.is_running:
+            return None
+        session.update_stats(errors=len(album), success=False)
+        return False
+
+    async def process_message(self, session, scheduler, message, source, target, file_types, mode='copy'):
+        """
+        Send a single (already filtered) message for a session
+        
+        A FloodWait parks the account in the scheduler and the message is
+        retried on the next free account instead of counting as an error.
+        
+        Returns:
+            Optional[bool]: True if the message was sent, None if the session
+            stopped before it was attempted
+        """
+        intent = await self._begin_intent(session, [message])
+        try:
+            ran, sent = await self._run_on_client(
+                session, scheduler, target,
+                lambda client: self.transfer_single_message(client, message, source, target, file_types, mode, stats=session.stats)
+            )
+        except Exception as e:
+            logger.error(f"Transfer error: {e}")
+            capture_exception(e, extra_data={"message_id": message.id, "mode": mode, "context": "process_message"})
+            session.update_stats(errors=1, success=False)
+            return False
+        finally:
+            self._end_intent(session, intent)
+        
+        if sent:
+            session.update_stats(sent=1, success=True, message_ids=[message.id])
+            self._record_mapping(session, [message], sent)
+            add_breadcrumb("transfer", "Message transferred", "debug", {"message_id": message.id, "mode": mode})
+            return True
+        if not ran and not session.is_running:
+            return None
+        session.update_stats(errors=1, success=False)
+        return False
+
+    def _uses_batch_forward(self, session, mode) -> bool:
+        """Forward mode always batches; copy mode batches via drop-author forwards unless disabled"""
+        if mode == 'forward':
+            return True
+        if mode == 'copy':
+            return (session.config.get('copy_via_forward', Config.COPY_VIA_FORWARD)
+                    and not session.copy_forward_disabled)
+        return False
+
+    async def process_forward_batch(self, session, scheduler, messages, source, target,
+                                    drop_author=False, drop_captions=False, count_failures=True):
+        """
+        Forward a run of messages with one multi-ID forward_messages call
+        
+        Order is preserved (IDs are sent ascending in one request) and every
+        message is accounted for individually in the session stats.
+        With drop_author the forward arrives without attribution, like a copy.
+        
+        Args:
+            count_failures: If False, failed messages are returned to the caller
+                instead of being counted as errors (for fallback handling)
+        
+        Returns:
+            Optional[int]: Number of messages forwarded (None if the session
+            stopped before the batch was attempted), or the list of failed
+            and unattempted messages when count_failures is False
+        """
+        kwargs = {}
+        if drop_author:
+            kwargs['drop_author'] = True
+            if drop_captions:
+                kwargs['drop_media_captions'] = True
+        
+        intent = await self._begin_intent(session, messages)
+        try:
+            ran, results = await self._run_on_client(
+                session, scheduler, target,
+                lambda client: client.forward_messages(target, [m.id for m in messages], source, **kwargs)
+            )
+        except Exception as e:
+            logger.error(f"Batch forward error ({len(messages)} messages): {e}")
+            capture_exception(e, extra_data={
+                "first_id": messages[0].id, "last_id": messages[-1].id, "context": "process_forward_batch"
+            })
+            if not count_failures:
+                raise
+            session.update_stats(errors=len(messages), success=False)
+            return 0
+        finally:
+            self._end_intent(session, intent)
+        
+        if not ran:
+            if not count_failures:
+                return list(messages)
+            if not session.is_running:
+                return None
+            session.update_stats(errors=len(messages), success=False)
+            return 0
+        
+        if not isinstance(results, list):
+            results = [results]
+        sent = 0
+        failed = []
+        for i, message in enumerate(messages):
+            if i < len(results) and results[i] is not None:
+                sent += 1
+                session.update_stats(sent=1, success=True, message_ids=[message.id])
+            elif count_failures:
+                # Deleted in source meanwhile, or not forwardable
+                session.update_stats(errors=1, success=False)
+            else:
+                failed.append(message)
+        
+        self._record_mapping(session, messages, results)
+        add_breadcrumb("transfer", "Batch forwarded", "debug", {
+            "first_id": messages[0].id, "count": len(messages), "sent": sent, "drop_author": drop_author
+        })
+        return sent if count_failures else failed
+
+    async def process_copy_batch(self, session, scheduler, messages, source, target, file_types) -> Tuple[int, List[Message]]:
+        """
+        Copy a run of messages server-side (forward with drop_author)
+        
+        Messages the batch forward cannot handle fall back to the
+        per-message copy path. If the source forbids forwarding, batch
+        copying is disabled for the rest of the session.
+        
+        Returns:
+            Tuple[int, List[Message]]: (Number of messages copied, messages
+            not attempted because the session stopped first)
+        """
+        drop_captions = session.config.get('drop_captions', False)
+        try:
+            failed = await self.process_forward_batch(
+                session, scheduler, messages, source, target,
+                drop_author=True, drop_captions=drop_captions, count_failures=False
+            )
+        except Exception as e:
+            if isinstance(e, ChatForwardsRestrictedError):
+                logger.warning(f"Source forbids forwarding - session {session.session_id} copies one by one")
+                session.copy_forward_disabled = True
+            failed = messages
+        
+        sent = len(messages) - len(failed)
+        unsent = []
+        for unit in self._group_units(failed):
+            if not session.is_running:
+                unsent.extend(unit)
+                continue
+            result = await self.process_unit(session, scheduler, unit, source, target, file_types, 'copy')
+            if result is None:
+                unsent.extend(unit)
+            elif result:
+                sent += len(unit)
+        return sent, unsent
+
+    async def _apply_edits(self, session, scheduler, target, messages, mapping) -> int:
+        """
+        Copy the current text of edited source messages onto their target copies
+        
+        Forwarded copies cannot be edited, so forward-mode pairs only get
+        deletions.
+        
+        Args:
+            messages: Edited source messages
+            mapping: source_id -> target IDs
+        
+        Returns:
+            int: Number of target messages edited
+        """
+        if session.config.get('mode', 'copy') == 'forward':
+            return 0
+        edited = 0
+        for message in messages:
+            target_ids = mapping.get(message.id)
+            if not target_ids:
+                continue
+            try:
+                ran, _ = await self._run_on_client(
+                    session, scheduler, target,
+                    lambda client: client.edit_message(target, target_ids[0], message.text or '')
+                )
+            except MessageNotModifiedError:
+                continue
             except Exception as e:
-                logger.error(f"Transfer error: {e}")
-                capture_exception(e, extra_data={"message_id": message.id, "mode": mode, "context": "process_batch"})
+                logger.error(f"Sync edit error: {e}")
+                capture_exception(e, extra_data={"message_id": message.id, "target_id": target_ids[0], "context": "sync_edit"})
                 session.update_stats(errors=1, success=False)
-            
-            # Delay
-            await asyncio.sleep(self.calculate_delay(session.stats['consecutive_successes']))
+                continue
+            if ran:
+                edited += 1
+                session.stats['total_edited'] += 1
+        return edited
+
+    async def _apply_deletes(self, session, scheduler, target, source_ids, mapping) -> int:
+        """
+        Delete the target copies of source messages that no longer exist
+        
+        Args:
+            source_ids: Deleted source message IDs
+            mapping: source_id -> target IDs
+        
+        Returns:
+            int: Number of target messages deleted
+        """
+        target_ids = [tid for sid in source_ids for tid in mapping.get(sid, [])]
+        deleted = 0
+        failed = False
+        for i in range(0, len(target_ids), Config.SYNC_CHUNK_SIZE):
+            batch = target_ids[i:i + Config.SYNC_CHUNK_SIZE]
+            try:
+                ran, _ = await self._run_on_client(
+                    session, scheduler, target,
+                    lambda client: client.delete_messages(target, batch)
+                )
+            except Exception as e:
+                logger.error(f"Sync delete error ({len(batch)} messages): {e}")
+                capture_exception(e, extra_data={"target_ids": batch[:10], "context": "sync_delete"})
+                session.update_stats(errors=len(batch), success=False)
+                failed = True
+                continue
+            if not ran:
+                return deleted
+            deleted += len(batch)
+        
+        # Keep the mappings on failure so the next sync retries
+        if source_ids and not failed:
+            session.stats['total_deleted'] += len(source_ids)
+            self.message_map.remove(session.map_key, source_ids)
+        return deleted
+
+    def _fingerprint(self, message) -> str:
+        """
+        Content fingerprint shared by a source message and its target copy
+        
+        Text (caption) plus media kind; documents add their size, which
+        survives both re-send and re-upload. Photos are re-encoded on
+        upload, so only their kind is used.
+        """
+        media = getattr(message, 'media', None)
+        if getattr(message, 'document', None) is not None:
+            kind = f"d{getattr(message.document, 'size', '')}"
+        elif getattr(message, 'photo', None) is not None:
+            kind = "p"
+        elif media is not None and not isinstance(media, MessageMediaWebPage):
+            kind = "m"
+        else:
+            kind = "t"
+        text = getattr(message, 'text', None) or ''
+        return hashlib.sha1(f"{kind}\n{text}".encode('utf-8')).hexdigest()[:16]
+
+    async def _begin_intent(self, session, messages) -> Optional[int]:
+        """Durably record the send about to happen (no-op without an IntentLog)"""
+        if not session.intent_key:
+            return None
+        future = self.intent_log.begin(
+            session.intent_key, [m.id for m in messages], [self._fingerprint(m) for m in messages],
+            session.last_target_id
+        )
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception as e:
+            # Never block sending on the log - this send is just not covered
+            logger.error(f"Intent log write failed: {e}")
+            capture_exception(e, extra_data={"context": "begin_intent"})
+            return None
+
+    def _end_intent(self, session, intent_id: Optional[int]):
+        """
+        Hand a finished send's intent to the checkpoint
+        
+        The sent IDs only become durable with the next flushed checkpoint;
+        until then the intent has to survive a crash or the send is repeated.
+        """
+        if intent_id is not None:
+            session.checkpoint.defer_intent(intent_id)
+
+    async def _save_checkpoint(self, session, force=False) -> bool:
+        """
+        Save the session's checkpoint and resolve the intents it covers
+        
+        Intents are resolved only after the progress flush succeeded. If it
+        fails they stay in the log and are reconciled on the next run.
+        
+        Args:
+            force: Save and flush now instead of every PROGRESS_SAVE_INTERVAL messages
+        
+        Returns:
+            bool: True if a checkpoint was saved
+        """
+        checkpoint = session.checkpoint
+        saved = checkpoint.save(session.stats) if force else checkpoint.maybe_save(session.stats)
+        intents = checkpoint.take_intents() if saved else []
+        if not (force or intents):
+            return saved
+        
+        # Flush without blocking the loop
+        flushed = await asyncio.get_running_loop().run_in_executor(None, self.progress_manager.flush)
+        if flushed and intents:
+            self.intent_log.resolve(intents, session.intent_key, session.last_target_id)
+        return saved
+
+    async def _reconcile_intents(self, session, client, target, status_callback) -> int:
+        """
+        Match intents left by an interrupted run against the target
+        
+        Fetches the newest INTENT_RECONCILE_LIMIT target messages and
+        pairs pending source messages 1:1, in send order, with target
+        messages of the same fingerprint. Only target messages newer than
+        the intent's bound (the newest target message known when it was
+        written) and not yet mapped to a source message can match. If a
+        fingerprint has more such target messages than intents sending
+        it, the match is ambiguous and those messages are re-sent.
+        Matched messages are marked sent (and mapped), so the scan skips
+        them instead of sending duplicates; the rest are sent normally.
+        
+        Returns:
+            int: Number of messages confirmed as already delivered
+        """
+        loop = asyncio.get_running_loop()
+        pending = await loop.run_in_executor(None, self.intent_log.pending, session.intent_key)
+        if not pending:
+            return 0
+        
+        status_callback(session.session_id, f"Checking {len(pending)} unconfirmed sends...")
+        try:
+            recent = await client.get_messages(target, limit=Config.INTENT_RECONCILE_LIMIT)
+        except Exception as e:
+            # Keep the intents for the next attempt; messages may be re-sent this time
+            logger.error(f"Could not reconcile pending sends: {e}")
+            capture_exception(e, extra_data={"session_id": session.session_id, "context": "reconcile_intents"})
+            return 0
+        
+        recent = sorted((m for m in recent if m is not None), key=lambda m: m.id)
+        bound = min(intent['after_target_id'] for intent in pending)
+        # Copies already mapped belong to checkpointed sends
+        mapped = set()
+        if self.message_map and session.map_key:
+            ids = [m.id for m in recent if m.id > bound]
+            mapped = await loop.run_in_executor(None, lambda: {
+                target_id for target_id in ids
+                if self.message_map.get_source(session.map_key, target_id) is not None
+            })
+        
+        # Allow for clock skew between this device and Telegram
+        oldest = min(intent['created'] for intent in pending) - 60
+        available: Dict[str, List] = {}
+        for message in recent:
+            if message.id <= bound or message.id in mapped:
+                continue
+            if message.date and message.date.timestamp() >= oldest:
+                available.setdefault(self._fingerprint(message), []).append(message)
+        
+        wanted = Counter(fingerprint for intent in pending for fingerprint in intent['fingerprints'])
+        ambiguous = {fingerprint for fingerprint, messages in available.items() if len(messages) > wanted[fingerprint]}
+        
+        confirmed = []
+        mappings = []
+        last_match = 0
+        for intent in pending:
+            for source_id, fingerprint in zip(intent['source_ids'], intent['fingerprints']):
+                if fingerprint in ambiguous:
+                    continue
+                # Copies land in send order, each after its intent was written
+                floor = max(last_match, intent['after_target_id'])
+                candidates = available.get(fingerprint, [])
+                match = next((m for m in candidates if m.id > floor), None)
+                if match is None:
+                    continue
+                candidates.remove(match)
+                last_match = match.id
+                mappings.append((source_id, match.id))
+                confirmed.append(source_id)
+        
+        # Anything sent from here on lands after what the target holds now
+        if recent:
+            session.last_target_id = max(session.last_target_id, recent[-1].id)
+        
+        if confirmed:
+            session.update_stats(sent=len(confirmed), message_ids=confirmed)
+            session.stats['intents_recovered'] += len(confirmed)
+            if self.message_map and session.map_key:
+                self.message_map.record(session.map_key, mappings)
+        # Resolved once the confirmed IDs are flushed with the checkpoint
+        for intent in pending:
+            session.checkpoint.defer_intent(intent['intent_id'])
+        await self._save_checkpoint(session, force=True)
+        
+        logger.info(f"Reconciled {len(pending)} pending intents: {len(confirmed)} already delivered")
+        add_breadcrumb("transfer", "Intents reconciled", "info", {
+            "session_id": session.session_id, "pending": len(pending), "confirmed": len(confirmed)
+        })
+        return len(confirmed)
+
+    def _record_mapping(self, session, messages, results):
+        """
+        Remember which target message each sent source message became
+        
+        Args:
+            messages: Source messages
+            results: Sent message(s) aligned with messages (None for unsent ones)
+        """
+        if not isinstance(results, list):
+            results = [results]
+        target_ids = [getattr(result, 'id', None) or 0 for result in results if result is not None]
+        session.last_target_id = max([session.last_target_id] + target_ids)
+        if not (self.message_map and session.map_key):
+            return
+        mappings = [
+            (message.id, result.id)
+            for message, result in zip(messages, results)
+            if result is not None and getattr(result, 'id', None)
+        ]
+        self.message_map.record(session.map_key, mappings)
 
     def is_message_allowed(self, message, file_types):
         """Check if message matches allowed types"""
@@ -212,16 +1363,22 @@ class TransferManager:
             
         return False
 
-    async def transfer_single_message(self, client, message, source, target, file_types: List[str] = None, mode: str = 'copy'):
+    async def transfer_single_message(self, client, message, source, target, file_types: List[str] = None, mode: str = 'copy',
+                                      stats: Dict = None):
         """
         Actual transfer logic
         Modes: 'forward', 'copy', 'download_upload'
+        
+        Args:
+            stats: Optional session stats (media relay records peak memory here)
+            
+        Returns:
+            The sent target message (truthy), or False if nothing was sent
         """
         try:
             # --- 1. Forward Mode ---
             if mode == 'forward':
-                await client.forward_messages(target, message, source)
-                return True
+                return await client.forward_messages(target, message, source)
 
             # --- 2. Copy Mode (No Credit) ---
             elif mode == 'copy':
@@ -229,8 +1386,7 @@ class TransferManager:
                 if message.media:
                     # Handle WebPage (Link Previews) separately - treated as text
                     if isinstance(message.media, MessageMediaWebPage):
-                        await client.send_message(target, message.text or '')
-                        return True
+                        return await client.send_message(target, message.text or '')
 
                     # Actual Files
                     file_to_send = message.media
@@ -240,102 +1396,221 @@ class TransferManager:
                         file_to_send = message.document
                     
                     try:
-                        await client.send_file(
+                        return await client.send_file(
                             target,
                             file=file_to_send,
                             caption=message.text or ''
                         )
-                        return True
                     except TypeError as e:
                          # Fallback for unsupported media types in send_file
                          logger.warning(f"Unsupported media for send_file: {type(message.media)}. Sending text only.")
                          capture_exception(e, extra_data={"message_id": message.id, "media_type": str(type(message.media)), "context": "send_file_fallback"})
                          if message.text:
-                             await client.send_message(target, message.text)
-                             return True
+                             return await client.send_message(target, message.text)
                          return False
 
                 # Text
                 elif message.text:
-                    await client.send_message(target, message.text)
-                    return True
+                    return await client.send_message(target, message.text)
 
             # --- 3. Download & Upload Mode (Cleanest) ---
             elif mode == 'download_upload':
-                if message.media:
-                    # Download
-                    logger.info("Downloading media for clean upload...")
-                    file_bytes = await download_media(client, message)
+                if message.media and not isinstance(message.media, MessageMediaWebPage):
+                    # Stream download -> upload (peak memory is a few chunks, not the file)
+                    logger.info("Relaying media for clean upload...")
+                    media = await relay_upload_media(client, message, stats=stats)
                     
-                    if file_bytes:
-                        # Upload
-                        await upload_media(client, target, file_bytes, caption=message.text)
-                        return True
+                    if media:
+                        return await client.send_file(target, media, caption=message.text or '')
                     else:
-                        logger.warning("Failed to download media")
+                        logger.warning("Failed to relay media")
                         return False
                 
                 elif message.text:
                     # Text is same as copy
-                    await client.send_message(target, message.text)
-                    return True
+                    return await client.send_message(target, message.text)
             
             return False
             
+        except (FloodWaitError, SlowModeWaitError):
+            # Not a failure - the caller parks this account and retries elsewhere
+            raise
         except Exception as e:
             logger.error(f"Transfer error ({mode}): {e}")
             capture_exception(e, extra_data={"message_id": message.id if hasattr(message, 'id') else None, "mode": mode, "context": "transfer_single_message"})
             raise e
 
-    async def check_global_rate_limit(self):
-        """Global rate limiter implementation"""
-        if self.minute_start_time is None:
-            self.minute_start_time = datetime.now()
-            
-        elapsed = (datetime.now() - self.minute_start_time).total_seconds()
+    async def transfer_album(self, client, messages, source, target, mode: str = 'copy', stats: Dict = None):
+        """
+        Album transfer logic - one multi-file send_file (or one forward) per album
+        Modes: 'forward', 'copy', 'download_upload'
         
-        if elapsed >= 60:
-            self.messages_per_minute = 0
-            self.minute_start_time = datetime.now()
+        Returns:
+            List of sent target messages aligned with messages, or False
+        """
+        try:
+            if mode == 'forward':
+                return await client.forward_messages(target, [m.id for m in messages], source)
             
-        if self.messages_per_minute >= self.max_messages_per_minute:
-            wait = 60 - elapsed
-            if wait > 0:
-                logger.warning(f"Global Rate Limit Hit. Waiting {wait:.1f}s")
-                await asyncio.sleep(wait)
-                self.messages_per_minute = 0
-                self.minute_start_time = datetime.now()
-        
-        self.messages_per_minute += 1
-
-    async def get_next_client(self, clients):
-        """Get next available client (FloodWait safe)"""
-        # Simple random/round-robin for now
-        # Ideally track FloodWait per client_id globally
-        import random
-        valid_clients = []
-        now = datetime.now()
-        
-        for c in clients:
-            cid = id(c)
-            # Check FloodWait
-            if cid in self.client_flood_wait:
-                if now < self.client_flood_wait[cid]:
-                    continue # Still waiting
-                else:
-                    del self.client_flood_wait[cid]
-            valid_clients.append(c)
+            captions = [m.text or '' for m in messages]
+            if mode == 'download_upload':
+                logger.info(f"Relaying album ({len(messages)} files) for clean upload...")
+                files = []
+                for message in messages:
+                    media = await relay_upload_media(client, message, stats=stats)
+                    if not media:
+                        logger.warning(f"Failed to relay album member {message.id}")
+                        return False
+                    files.append(media)
+            else:
+                files = [m.photo or m.document or m.media for m in messages]
             
-        if not valid_clients:
-            return None
+            return await client.send_file(target, files, caption=captions)
             
-        return random.choice(valid_clients)
+        except (FloodWaitError, SlowModeWaitError):
+            raise
+        except Exception as e:
+            logger.error(f"Album transfer error ({mode}): {e}")
+            capture_exception(e, extra_data={"message_ids": [m.id for m in messages], "mode": mode, "context": "transfer_album"})
+            raise e
+
+    async def check_rate_limit(self, account_key: str = None, target=None, session_id: str = None) -> float:
+        """
+        Wait for a send slot in the global, account and (account, target) buckets
+        
+        With a session ID, the global slot is shared fairly with other sessions.
+        
+        Returns:
+            float: Seconds waited
+        """
+        target_key = self._entity_key(target) if target is not None else None
+        return await self.rate_limiter.acquire(account_key, target_key, session_id)
+
+    def create_scheduler(self, session, clients, paced: bool = True) -> ClientScheduler:
+        """
+        Build a client scheduler over the session's accounts, sharing FloodWait state
+        
+        Args:
+            paced: Space each account's calls by its pacing delay (sends); reads skip it
+        """
+        for client in clients:
+            if client not in session.account_keys:
+                session.account_keys[client] = self._fallback_key(client)
+        return ClientScheduler(
+            {session.account_keys[c]: c for c in clients},
+            self.client_flood_wait,
+            pacer=self.pacer if paced else None
+        )
+
+    def _fallback_key(self, client) -> str:
+        """Account key for a client without an account ID (valid for this process only)"""
+        key = f"client_{id(client):x}"
+        self._fallback_keys.add(key)
+        return key
+
+    def get_next_client(self, scheduler: ClientScheduler):
+        """
+        Get next available client (FloodWait safe)
+        
+        Returns:
+            Tuple[Optional[TelegramClient], float]: Client, or None and seconds until one is free
+        """
+        return scheduler.next_client()
+
+    def report_flood_wait(self, scheduler: ClientScheduler, account_key: str, seconds: float, pace: bool = True):
+        """
+        Park an account until its FloodWait expires and slow down its pace
+        
+        Args:
+            pace: Feed the FloodWait to the account's send pacing (False for reads)
+        """
+        scheduler.report_flood_wait(account_key, seconds)
+        if pace:
+            self.pacer.record_flood_wait(account_key, seconds)
+        logger.warning(f"FloodWait on account {account_key}: {seconds}s")
+        add_breadcrumb("transfer", "FloodWait", "warning", {"account": account_key, "seconds": seconds})
+        self.queue_cooldown_save()
+
+    def report_target_cooldown(self, account_key: str, target, seconds: float):
+        """Hold back an account's sends to one target (e.g. slow mode)"""
+        self.rate_limiter.block(account_key, self._entity_key(target), seconds)
+        logger.warning(f"Slow mode on account {account_key} in {self._entity_key(target)}: {seconds}s")
+        self.queue_cooldown_save()
+
+    def get_cooldown_state(self) -> Dict:
+        """
+        Cooldowns and pacing state of every account, with wall-clock release times
+        
+        Clients without an account ID are left out: their keys mean
+        nothing after a restart.
+        
+        Returns:
+            Dict: {'accounts': {key: {flood_wait_until, delay, error_rate}},
+            'targets': {"account|target": cooldown_until}}
+        """
+        now, wall = time.monotonic(), time.time()
+        accounts: Dict[str, Dict] = {}
+        for key, controller in self.pacer.controllers.items():
+            if key not in self._fallback_keys:
+                accounts[key] = {'delay': round(controller.delay, 3), 'error_rate': round(controller.error_rate, 4)}
+        for key, release in self.client_flood_wait.items():
+            if release > now and key not in self._fallback_keys:
+                accounts.setdefault(key, {})['flood_wait_until'] = wall + (release - now)
+        targets = {
+            f"{account_key}|{target_key}": wall + left
+            for (account_key, target_key), left in self.rate_limiter.active_cooldowns().items()
+            if account_key not in self._fallback_keys
+        }
+        return {'accounts': accounts, 'targets': targets}
+
+    def restore_cooldown_state(self, state: Dict):
+        """Re-apply saved cooldowns (still running) and pacing state"""
+        now, wall = time.monotonic(), time.time()
+        for key, account in state.get('accounts', {}).items():
+            until = account.get('flood_wait_until')
+            if until and until > wall:
+                release = now + (until - wall)
+                self.client_flood_wait[key] = max(self.client_flood_wait.get(key, 0.0), release)
+            self.pacer.restore(key, account.get('delay'), account.get('error_rate'))
+        for pair, until in state.get('targets', {}).items():
+            account_key, _, target_key = pair.partition('|')
+            if until > wall:
+                self.rate_limiter.block(account_key, target_key, until - wall)
+        if self.client_flood_wait:
+            logger.info(f"Restored FloodWait cooldowns for {len(self.client_flood_wait)} accounts")
+
+    def save_cooldowns(self) -> bool:
+        """Write cooldown/pacing state to the cooldown store (if any)"""
+        if not self.cooldown_store:
+            return False
+        return self.cooldown_store.save(self.get_cooldown_state())
+
+    def queue_cooldown_save(self) -> Optional[asyncio.Task]:
+        """
+        Save cooldown/pacing state in an executor (for use on the event loop)
+        
+        Saves requested while one is running are merged into one more save
+        of the latest state.
+        
+        Returns:
+            Optional[asyncio.Task]: Finishes once the state is written (None without a store)
+        """
+        if not self.cooldown_store:
+            return None
+        self._cooldowns_dirty = True
+        if self._cooldown_saver is None or self._cooldown_saver.done():
+            self._cooldown_saver = asyncio.ensure_future(self._write_cooldowns())
+        return self._cooldown_saver
+
+    async def _write_cooldowns(self):
+        loop = asyncio.get_running_loop()
+        while self._cooldowns_dirty:
+            self._cooldowns_dirty = False
+            await loop.run_in_executor(None, self.cooldown_store.save, self.get_cooldown_state())
 
-    def calculate_delay(self, consecutive_successes):
-        """Smart delay"""
-        if consecutive_successes > 10:
-            return random.uniform(Config.SMART_DELAY_MIN, Config.SMART_DELAY_MIN + 0.5)
-        return random.uniform(Config.SMART_DELAY_MIN + 1, Config.SMART_DELAY_MAX)
+    def _entity_key(self, entity) -> str:
+        """Stable key for a resolved channel (its ID), used for progress files"""
+        return str(getattr(entity, 'id', entity))
 
     async def get_entity_robust(self, client, entity_id):
         """Try to resolve entity, refreshing dialogs if needed"""
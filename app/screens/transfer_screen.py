@@ -33,6 +33,7 @@ from kivymd.uix.appbar import (
 )
 from kivymd.toast import toast
 
+from ..config import Config
 from ..managers.transfer_manager import TransferManager
 from ..managers.account_manager import AccountManager
 from ..managers.progress_manager import ProgressManager
@@ -146,6 +147,20 @@ class TransferScreen(Screen):
         self.accounts_grid = MDGridLayout(cols=1, adaptive_height=True, spacing="5dp")
         top_content.add_widget(self.accounts_grid)
         
+        # Parallel senders (one per account)
+        parallel_box = MDBoxLayout(adaptive_height=True)
+        self.parallel_check = MDCheckbox(active=Config.PARALLEL_ACCOUNTS, size_hint=(None, None), size=("30dp","30dp"))
+        parallel_box.add_widget(self.parallel_check)
+        parallel_box.add_widget(MDLabel(text="Send in parallel from all accounts (order may vary)", font_style="Label", role="medium"))
+        top_content.add_widget(parallel_box)
+        
+        # Live mirror (keep following the source after the backfill)
+        live_box = MDBoxLayout(adaptive_height=True)
+        self.live_check = MDCheckbox(active=False, size_hint=(None, None), size=("30dp","30dp"))
+        live_box.add_widget(self.live_check)
+        live_box.add_widget(MDLabel(text="Keep mirroring new messages (until stopped)", font_style="Label", role="medium"))
+        top_content.add_widget(live_box)
+        
         # Files
         top_content.add_widget(MDLabel(text="File Types:", font_style="Label", role="large", adaptive_height=True))
         files_grid = MDGridLayout(cols=3, adaptive_height=True, spacing="5dp")
@@ -272,9 +287,12 @@ class TransferScreen(Screen):
         self.update_task_status(session_id, "Connecting accounts...")
         
         clients = []
+        client_account_ids = []
         for aid in account_ids:
             client = self.account_manager.get_client(aid)
-            if client: clients.append(client)
+            if client:
+                clients.append(client)
+                client_account_ids.append(aid)
             
         if not clients:
             self.update_task_status(session_id, "Failed: No clients")
@@ -285,7 +303,10 @@ class TransferScreen(Screen):
             'source': source,
             'target': target,
             'start_id': start_id,
-            'file_types': [k for k,v in self.type_checks.items() if v.active]
+            'file_types': [k for k,v in self.type_checks.items() if v.active],
+            'parallel_accounts': self.parallel_check.active,
+            'live': self.live_check.active,
+            'account_ids': client_account_ids
         }
         
         # Register session
@@ -0,0 +1,118 @@
+"""
+Byte budget
+Process-wide limit on media bytes held in memory at once
+"""
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from ..config import Config
+from .logger import logger
+
+
+class ByteBudget:
+    """
+    Async counting semaphore measured in bytes
+
+    Waiters are served strictly first-come first-served, so a large file
+    at the head of the queue is not starved by a stream of small ones.
+    Requests larger than the whole budget are clamped to it (they run
+    alone instead of never running).
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize budget
+
+        Args:
+            capacity: Maximum bytes in flight
+        """
+        self.capacity = max(1, int(capacity))
+        self.in_use = 0
+        self.peak = 0
+        self._waiters = deque()  # (nbytes, future)
+
+    def _clamp(self, nbytes: int) -> int:
+        return min(max(0, int(nbytes or 0)), self.capacity)
+
+    def _grant(self, nbytes: int):
+        self.in_use += nbytes
+        self.peak = max(self.peak, self.in_use)
+
+    def _wake(self):
+        while self._waiters:
+            nbytes, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self.in_use + nbytes > self.capacity:
+                break
+            self._waiters.popleft()
+            self._grant(nbytes)
+            future.set_result(nbytes)
+
+    async def acquire(self, nbytes: int) -> int:
+        """
+        Wait until nbytes fit in the budget
+
+        Returns:
+            int: Bytes actually reserved (pass this to release)
+        """
+        nbytes = self._clamp(nbytes)
+        if not self._waiters and self.in_use + nbytes <= self.capacity:
+            self._grant(nbytes)
+            return nbytes
+
+        logger.info(f"Waiting for media budget ({nbytes} bytes, {self.in_use}/{self.capacity} in use)")
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((nbytes, future))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled - give it back
+                self.release(nbytes)
+            else:
+                self._wake()
+            raise
+
+    def release(self, nbytes: int):
+        """Return bytes reserved by acquire"""
+        self.in_use = max(0, self.in_use - nbytes)
+        self._wake()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int, stats: Optional[dict] = None):
+        """
+        async with budget.reserve(n): ... - holds n bytes for the block
+        
+        Args:
+            nbytes: Bytes to hold
+            stats: Optional session stats to record usage into
+        """
+        granted = await self.acquire(nbytes)
+        self.record(stats)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+            self.record(stats)
+
+    def record(self, stats: Optional[dict]):
+        """Copy current/peak usage into session stats"""
+        if stats is None:
+            return
+        stats['inflight_bytes'] = self.in_use
+        stats['peak_inflight_bytes'] = max(stats.get('peak_inflight_bytes', 0), self.peak)
+
+
+_media_budget: Optional[ByteBudget] = None
+
+
+def get_media_budget() -> ByteBudget:
+    """Shared budget for all media relaying/downloading sessions"""
+    global _media_budget
+    if _media_budget is None:
+        _media_budget = ByteBudget(Config.MAX_INFLIGHT_MEDIA_BYTES)
+    return _media_budget
@@ -1,15 +1,24 @@
 """
 Helper utilities for channels, file types, and media
 """
+import os
 import re
 from typing import List, Dict, Optional
 from telethon import TelegramClient
-from telethon.tl.types import Channel, Chat
+from telethon.errors import FloodWaitError
+from telethon.tl.types import (
+    Channel, Chat, Document, DocumentAttributeFilename,
+    InputMediaUploadedDocument, InputMediaUploadedPhoto
+)
 
 
 from .logger import logger, add_breadcrumb, capture_exception
+from .byte_budget import get_media_budget
 import asyncio
 
+# Telegram download/upload parts are at most 512 KB
+RELAY_CHUNK_SIZE = 512 * 1024
+
 def fire_and_forget(coro, context: str = ""):
     """
     Run an async task and log errors if it fails.
@@ -190,14 +199,18 @@ def filter_by_file_type(message, file_types: Dict[str, bool]) -> bool:
 
 
 async def download_media(client: TelegramClient, message, 
-                        file_path: str = None) -> Optional[bytes]:
+                        file_path: str = None, stats: Dict = None) -> Optional[bytes]:
     """
     Download media from message
     
+    In-memory downloads hold the file size in the shared media budget
+    while downloading, so concurrent sessions wait instead of OOMing.
+    
     Args:
         client: Telegram client
         message: Message with media
         file_path: Optional file path to save
+        stats: Optional session stats (budget usage is recorded)
         
     Returns:
         Optional[bytes]: Downloaded file bytes or None
@@ -207,13 +220,19 @@ async def download_media(client: TelegramClient, message,
             logger.warning("Message has no media")
             return None
         
+        budget = get_media_budget()
+        
         # Download
         if file_path:
-            await client.download_media(message.media, file=file_path)
+            # Written to disk chunk by chunk - only a transfer window is in memory
+            async with budget.reserve(2 * RELAY_CHUNK_SIZE, stats):
+                await client.download_media(message.media, file=file_path)
             logger.info(f"Downloaded media to {file_path}")
             return None
         else:
-            file_bytes = await client.download_media(message.media, file=bytes)
+            size = message.file.size if getattr(message, 'file', None) else None
+            async with budget.reserve(size or RELAY_CHUNK_SIZE, stats):
+                file_bytes = await client.download_media(message.media, file=bytes)
             logger.info(f"Downloaded media ({len(file_bytes)} bytes)")
             return file_bytes
             
@@ -224,7 +243,7 @@ async def download_media(client: TelegramClient, message,
 
 
 async def upload_media(client: TelegramClient, target_entity,
-                      file_data, caption: str = None):
+                      file_data, caption: str = None, stats: Dict = None):
     """
     Upload media to channel
     
@@ -233,16 +252,21 @@ async def upload_media(client: TelegramClient, target_entity,
         target_entity: Target channel
         file_data: File bytes or path
         caption: Optional caption
+        stats: Optional session stats (budget usage is recorded)
         
     Returns:
         bool: True if uploaded successfully
     """
     try:
-        await client.send_file(
-            target_entity,
-            file_data,
-            caption=caption or ''
-        )
+        # Bytes are already in memory; paths are read part by part
+        nbytes = len(file_data) if isinstance(file_data, (bytes, bytearray)) else 2 * RELAY_CHUNK_SIZE
+        budget = get_media_budget()
+        async with budget.reserve(nbytes, stats):
+            await client.send_file(
+                target_entity,
+                file_data,
+                caption=caption or ''
+            )
         
         logger.info("Uploaded media successfully")
         add_breadcrumb("Media uploaded")
@@ -252,3 +276,134 @@ async def upload_media(client: TelegramClient, target_entity,
         logger.error(f"Error uploading media: {e}")
         capture_exception(e, extra_data={"context": "upload_media"})
         return False
+
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Current resident memory of this process
+    
+    Returns:
+        Optional[int]: RSS in bytes, or None if not available on this platform
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current, but better than nothing (kB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return None
+
+
+def _record_peak(stats: Optional[Dict], key: str, value: Optional[int]):
+    if stats is not None and value is not None and value > stats.get(key, 0):
+        stats[key] = value
+
+
+class MediaRelayStream:
+    """
+    Read-only file-like view over a Telegram download
+    
+    Pulls chunks from `client.iter_download` only when `read` needs them,
+    so at most one upload part plus one download chunk is held in memory.
+    Telethon's upload_file awaits `read` when it returns a coroutine.
+    """
+    
+    def __init__(self, chunks, size: int, name: str = None, stats: Dict = None):
+        """
+        Args:
+            chunks: Async iterator of bytes (client.iter_download)
+            size: Exact total size in bytes
+            name: File name reported to Telegram
+            stats: Optional session stats to record peak buffer/RSS into
+        """
+        self._chunks = chunks.__aiter__()
+        self._buffer = bytearray()
+        self._eof = False
+        self.size = size
+        self.name = name
+        self.stats = stats
+        self.peak_buffered = 0
+    
+    async def read(self, n: int = -1) -> bytes:
+        while not self._eof and (n < 0 or len(self._buffer) < n):
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self._eof = True
+                break
+            self._buffer.extend(chunk)
+            self.peak_buffered = max(self.peak_buffered, len(self._buffer))
+        
+        _record_peak(self.stats, 'relay_peak_buffer_bytes', self.peak_buffered)
+        _record_peak(self.stats, 'peak_rss_bytes', current_rss_bytes())
+        
+        if n < 0:
+            n = len(self._buffer)
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        return data
+
+
+async def relay_upload_media(client: TelegramClient, message, stats: Dict = None):
+    """
+    Re-upload message media as a fresh file, without buffering it whole
+    
+    Documents (videos, files, audio) are streamed: each downloaded chunk
+    is fed straight into a chunked upload. Photos are small and are
+    relayed through memory.
+    
+    Args:
+        client: Telegram client
+        message: Message with media
+        stats: Optional session stats (peak buffer / RSS are recorded)
+        
+    Returns:
+        Optional[InputMedia]: Uploaded media ready for send_file, or None
+    """
+    budget = get_media_budget()
+    try:
+        if message.document and isinstance(message.document, Document) and message.document.size:
+            document = message.document
+            name = message.file.name or f"file_{message.id}{message.file.ext or ''}"
+            # One upload part plus one download chunk
+            async with budget.reserve(2 * RELAY_CHUNK_SIZE, stats):
+                stream = MediaRelayStream(
+                    client.iter_download(document, chunk_size=RELAY_CHUNK_SIZE, request_size=RELAY_CHUNK_SIZE),
+                    document.size, name=name, stats=stats
+                )
+                handle = await client.upload_file(
+                    stream, file_size=document.size, file_name=name,
+                    part_size_kb=RELAY_CHUNK_SIZE // 1024
+                )
+            attributes = list(document.attributes)
+            if not any(isinstance(a, DocumentAttributeFilename) for a in attributes):
+                attributes.append(DocumentAttributeFilename(name))
+            logger.info(f"Relayed media stream ({document.size} bytes, peak buffer {stream.peak_buffered})")
+            return InputMediaUploadedDocument(
+                file=handle,
+                mime_type=document.mime_type or 'application/octet-stream',
+                attributes=attributes
+            )
+        
+        if message.photo:
+            async with budget.reserve(message.file.size or RELAY_CHUNK_SIZE, stats):
+                file_bytes = await client.download_media(message.media, file=bytes)
+                _record_peak(stats, 'relay_peak_buffer_bytes', len(file_bytes))
+                _record_peak(stats, 'peak_rss_bytes', current_rss_bytes())
+                handle = await client.upload_file(file_bytes, file_name='photo.jpg')
+            return InputMediaUploadedPhoto(file=handle)
+        
+        logger.warning(f"Media type not relayable: {type(message.media)}")
+        return None
+        
+    except FloodWaitError:
+        # Let the transfer engine park the account and retry
+        raise
+    except Exception as e:
+        logger.error(f"Error relaying media: {e}")
+        capture_exception(e, extra_data={"context": "relay_upload_media", "message_id": getattr(message, 'id', None)})
+        return None
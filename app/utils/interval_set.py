@@ -0,0 +1,128 @@
+"""
+Interval set
+Compact set of integers (message IDs) stored as sorted disjoint ranges
+"""
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Optional
+
+
+class IntervalSet:
+    """
+    Set of ints stored as sorted, non-adjacent closed ranges [start, end]
+
+    A fully transferred channel of 1M messages is a single range. Lookup
+    and insert locate the range with a binary search.
+
+    Serialized form (JSON friendly): [[start, end], ...]
+    """
+
+    def __init__(self, values: Optional[Iterable[int]] = None):
+        """
+        Args:
+            values: Optional initial integers (any order, duplicates ok)
+        """
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._count = 0
+        if values:
+            self.update(values)
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[Iterable[int]]) -> 'IntervalSet':
+        """Build from the serialized [[start, end], ...] form"""
+        result = cls()
+        for start, end in ranges:
+            result.add_range(int(start), int(end))
+        return result
+
+    def to_ranges(self) -> List[List[int]]:
+        """Serialize as [[start, end], ...]"""
+        return [[s, e] for s, e in zip(self._starts, self._ends)]
+
+    def __contains__(self, value) -> bool:
+        i = bisect_right(self._starts, value) - 1
+        return i >= 0 and self._ends[i] >= value
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end + 1)
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({self.to_ranges()})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, IntervalSet):
+            return self._starts == other._starts and self._ends == other._ends
+        return NotImplemented
+
+    def copy(self) -> 'IntervalSet':
+        """Independent copy"""
+        result = IntervalSet()
+        result._starts = list(self._starts)
+        result._ends = list(self._ends)
+        result._count = self._count
+        return result
+
+    @property
+    def range_count(self) -> int:
+        """Number of stored ranges"""
+        return len(self._starts)
+
+    def max(self) -> Optional[int]:
+        """Largest member, or None if empty"""
+        return self._ends[-1] if self._ends else None
+
+    def add(self, value: int) -> bool:
+        """
+        Add one integer
+
+        Returns:
+            bool: True if it was not already present
+        """
+        if value in self:
+            return False
+        self.add_range(value, value)
+        return True
+
+    def remove_below(self, value: int):
+        """Drop every integer below value"""
+        # Ranges entirely below value
+        i = bisect_right(self._ends, value - 1)
+        removed = sum(end - start + 1 for start, end in zip(self._starts[:i], self._ends[:i]))
+        del self._starts[:i]
+        del self._ends[:i]
+        if self._starts and self._starts[0] < value:
+            removed += value - self._starts[0]
+            self._starts[0] = value
+        self._count -= removed
+
+    def update(self, values: Iterable[int]):
+        """Add many integers"""
+        for value in values:
+            self.add(value)
+
+    def add_range(self, start: int, end: int):
+        """Add every integer in [start, end], merging overlapping/adjacent ranges"""
+        if end < start:
+            return
+        # First range that could touch [start, end] (its end >= start - 1)
+        i = bisect_right(self._starts, start) - 1
+        if i < 0 or self._ends[i] < start - 1:
+            i += 1
+        # Ranges i..j-1 overlap or are adjacent and get merged
+        j = i
+        removed = 0
+        while j < len(self._starts) and self._starts[j] <= end + 1:
+            start = min(start, self._starts[j])
+            end = max(end, self._ends[j])
+            removed += self._ends[j] - self._starts[j] + 1
+            j += 1
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+        self._count += (end - start + 1) - removed
@@ -0,0 +1,130 @@
+"""
+SQLite background writer
+Runs database writes on one thread and commits them in batches
+"""
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+from .logger import logger, capture_exception
+
+
+def connect_wal(db_path: str) -> sqlite3.Connection:
+    """Open a connection in WAL mode (autocommit; transactions are explicit)"""
+    conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class BackgroundWriter:
+    """
+    Single writer thread for one SQLite database
+
+    submit(fn) queues fn(conn) and returns a Future. Queued writes are
+    committed together (up to `batch` per transaction), each inside its
+    own savepoint so one failing write does not undo the others. Futures
+    resolve after the commit; flush() reports whether every write since
+    the previous flush made it to disk.
+    """
+
+    def __init__(self, db_path: str, batch: int = 200, name: str = "sqlite-writer"):
+        """
+        Start the writer thread
+
+        Args:
+            db_path: Database file path
+            batch: Max queued writes committed in one transaction
+            name: Thread name
+        """
+        self.db_path = db_path
+        self.batch = batch
+        self._writes: "queue.Queue" = queue.Queue()
+        # Set by the writer thread when a write or commit fails, cleared by flush()
+        self._failed = False
+        self._thread = threading.Thread(target=self._write_loop, name=name, daemon=True)
+        self._thread.start()
+
+    def _write_loop(self):
+        conn = connect_wal(self.db_path)
+        while True:
+            tasks = [self._writes.get()]
+            while len(tasks) < self.batch:
+                try:
+                    tasks.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            conn.execute("BEGIN")
+            results = []
+            for task in tasks:
+                if task is None:
+                    stop = True
+                    continue
+                fn, future = task
+                conn.execute("SAVEPOINT task")
+                try:
+                    results.append((future, fn(conn), None))
+                    conn.execute("RELEASE task")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO task")
+                    conn.execute("RELEASE task")
+                    logger.error(f"Database write failed ({self.db_path}): {e}")
+                    capture_exception(e, extra_data={"db_path": self.db_path, "context": "sqlite_write"})
+                    self._failed = True
+                    results.append((future, None, e))
+            try:
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.error(f"Database commit failed ({self.db_path}): {e}")
+                capture_exception(e, extra_data={"db_path": self.db_path, "context": "sqlite_commit"})
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                self._failed = True
+                results = [(future, None, e) for future, _, _ in results]
+
+            # Resolve only after commit so waiters see durable data
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            if stop:
+                conn.close()
+                return
+
+    def submit(self, fn: Callable[[sqlite3.Connection], object]) -> Future:
+        """Queue fn(conn) on the writer thread"""
+        future = Future()
+        self._writes.put((fn, future))
+        return future
+
+    def _take_status(self, conn) -> bool:
+        """Report and clear the failure flag (runs on the writer thread)"""
+        failed, self._failed = self._failed, False
+        return not failed
+
+    def flush(self) -> bool:
+        """
+        Wait until every queued write is committed
+
+        Returns:
+            bool: True if every write queued since the last flush was committed
+        """
+        if not self._thread.is_alive():
+            return False
+        try:
+            return self.submit(self._take_status).result()
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        """Commit queued writes and stop the thread"""
+        if self._thread.is_alive():
+            self._writes.put(None)
+            self._thread.join()
@@ -0,0 +1,25 @@
+"""
+Shared fixtures
+"""
+import pytest
+
+from app.managers.pacing import AccountPacer
+from app.managers.rate_limiter import RateLimiter
+from app.managers.transfer_manager import TransferManager
+
+
+@pytest.fixture
+def make_manager():
+    """Factory of TransferManagers without pacing sleeps or rate limits (same arguments as TransferManager)"""
+    def make(*args, **kwargs):
+        manager = TransferManager(*args, **kwargs)
+        manager.rate_limiter = RateLimiter(global_rate=0, account_rate=0, target_rate=0)
+        manager.pacer = AccountPacer(initial=0, min_delay=0, max_delay=0)
+        return manager
+    return make
+
+
+@pytest.fixture
+def transfer_manager(make_manager):
+    """TransferManager without pacing sleeps or rate limits"""
+    return make_manager()
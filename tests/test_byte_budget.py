@@ -0,0 +1,63 @@
+"""
+Basic tests for the shared media ByteBudget
+"""
+import asyncio
+
+from app.utils.byte_budget import ByteBudget
+
+
+def test_budget_blocks_until_released():
+    """A request that does not fit waits for a release"""
+    async def scenario():
+        budget = ByteBudget(100)
+        first = await budget.acquire(80)
+        waiter = asyncio.create_task(budget.acquire(50))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        budget.release(first)
+        assert await waiter == 50
+        assert budget.in_use == 50
+        assert budget.peak == 80
+
+    asyncio.run(scenario())
+
+
+def test_budget_is_fifo():
+    """A small request does not overtake a waiting large one"""
+    async def scenario():
+        budget = ByteBudget(100)
+        held = await budget.acquire(60)
+        large = asyncio.create_task(budget.acquire(90))
+        await asyncio.sleep(0)
+        small = asyncio.create_task(budget.acquire(20))
+        await asyncio.sleep(0)
+        assert not small.done()
+
+        budget.release(held)
+        await large
+        assert not small.done()
+
+    asyncio.run(scenario())
+
+
+def test_oversized_request_is_clamped():
+    """Files larger than the budget run alone instead of never"""
+    async def scenario():
+        budget = ByteBudget(100)
+        assert await budget.acquire(10_000) == 100
+
+    asyncio.run(scenario())
+
+
+def test_reserve_records_stats():
+    """Context manager records current and peak usage"""
+    async def scenario():
+        budget = ByteBudget(100)
+        stats = {}
+        async with budget.reserve(40, stats):
+            assert stats['inflight_bytes'] == 40
+        assert stats['inflight_bytes'] == 0
+        assert stats['peak_inflight_bytes'] == 40
+
+    asyncio.run(scenario())
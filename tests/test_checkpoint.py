@@ -0,0 +1,65 @@
+"""
+Basic tests for CheckpointTracker
+"""
+import pytest
+
+from app.managers.checkpoint import CheckpointTracker
+from app.managers.progress_manager import ProgressManager
+
+
+@pytest.fixture
+def progress_manager(tmp_path):
+    return ProgressManager(str(tmp_path))
+
+
+def test_watermark_is_contiguous(progress_manager):
+    """Out-of-order completion only advances the watermark over a contiguous prefix"""
+    tracker = CheckpointTracker(progress_manager, "1", "2")
+    tracker.scanned([10, 11, 12, 13])
+
+    tracker.processed([12])
+    assert tracker.watermark == 0
+    tracker.processed([10])
+    assert tracker.watermark == 10
+    tracker.processed([11])
+    assert tracker.watermark == 12
+    tracker.processed([13])
+    assert tracker.watermark == 13
+
+
+def test_save_interval(progress_manager):
+    """Progress is written every save_interval processed messages"""
+    tracker = CheckpointTracker(progress_manager, "1", "2", save_interval=3)
+    tracker.scanned([1, 2, 3])
+    tracker.mark_sent([1, 2])
+
+    tracker.processed([1, 2])
+    assert tracker.maybe_save({'total_sent': 2}) is False
+    tracker.processed([3])
+    assert tracker.maybe_save({'total_sent': 2}) is True
+
+    reloaded = CheckpointTracker(progress_manager, "1", "2")
+    assert reloaded.watermark == 3
+    assert reloaded.already_sent(2)
+    assert reloaded.base_sent == 2
+
+
+def test_saves_append_to_journal(progress_manager, tmp_path):
+    """Checkpoint saves journal only the new IDs; skipped IDs leave no gaps"""
+    tracker = CheckpointTracker(progress_manager, "1", "2")
+    tracker.scanned(range(1, 101))
+    sent = [i for i in range(1, 101) if i % 3]  # every third message filtered out
+    tracker.mark_sent(sent)
+    tracker.processed(range(1, 101))
+    tracker.mark_sent([105])
+    assert tracker.save({'total_sent': len(sent) + 1, 'total_skipped': 33})
+    progress_manager.flush()
+
+    assert not (tmp_path / "channel_1_to_2.json").exists()
+    assert (tmp_path / "channel_1_to_2.journal").read_text() == "a 105\nw 100 68 33\n"
+
+    reloaded = CheckpointTracker(ProgressManager(str(tmp_path)), "1", "2")
+    assert reloaded.watermark == 100
+    assert reloaded.sent_ids.to_ranges() == [[105, 105]]
+    assert reloaded.already_sent(99) and reloaded.already_sent(105)
+    assert not reloaded.already_sent(101)
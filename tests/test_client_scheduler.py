@@ -0,0 +1,94 @@
+"""
+Basic tests for the FloodWait-aware ClientScheduler
+"""
+import pytest
+
+from app.managers.client_scheduler import ClientScheduler
+from app.managers.pacing import AccountPacer
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_round_robin(clock):
+    """Free accounts rotate in order"""
+    scheduler = ClientScheduler({'a': 'A', 'b': 'B', 'c': 'C'}, clock=clock)
+    picks = []
+    for _ in range(6):
+        clock.now += 1
+        picks.append(scheduler.next_client()[0])
+    assert picks == ['A', 'B', 'C', 'A', 'B', 'C']
+
+
+def test_flood_waited_account_is_skipped(clock):
+    """An account under FloodWait is not picked until released"""
+    scheduler = ClientScheduler({'a': 'A', 'b': 'B'}, clock=clock)
+    scheduler.report_flood_wait('a', 30)
+
+    for _ in range(3):
+        clock.now += 1
+        assert scheduler.next_client() == ('B', 0.0)
+
+    clock.now += 30
+    picks = {scheduler.next_client()[0] for _ in range(2)}
+    assert picks == {'A', 'B'}
+    assert 'a' not in scheduler.flood_wait
+
+
+def test_returns_wait_when_all_busy(clock):
+    """Scheduler reports how long until the earliest account is free"""
+    scheduler = ClientScheduler({'a': 'A', 'b': 'B'}, clock=clock)
+    scheduler.report_flood_wait('a', 50)
+    scheduler.report_flood_wait('b', 20)
+
+    client, wait = scheduler.next_client()
+    assert client is None
+    assert wait == pytest.approx(20)
+
+
+def test_flood_state_is_shared(clock):
+    """FloodWait is tracked per account across schedulers"""
+    shared = {}
+    first = ClientScheduler({'a': 'A'}, shared, clock=clock)
+    second = ClientScheduler({'a': 'A2', 'b': 'B'}, shared, clock=clock)
+    first.report_flood_wait('a', 10)
+
+    assert second.next_client() == ('B', 0.0)
+    assert second.next_client()[0] == 'B'
+
+
+def test_empty_scheduler():
+    """No accounts -> (None, 0)"""
+    assert ClientScheduler({}).next_client() == (None, 0.0)
+
+
+def test_pacing_gap_between_sends(clock):
+    """With a pacer, an account waits its delay before it is picked again"""
+    pacer = AccountPacer(initial=2.0, min_delay=0.5, max_delay=8.0)
+    scheduler = ClientScheduler({'a': 'A'}, clock=clock, pacer=pacer)
+
+    assert scheduler.next_client() == ('A', 0.0)
+    assert scheduler.next_client() == (None, 2.0)
+
+    clock.now += 2.0
+    assert scheduler.next_client() == ('A', 0.0)
+
+
+def test_pacing_is_shared_between_schedulers(clock):
+    pacer = AccountPacer(initial=3.0, min_delay=0.5, max_delay=8.0)
+    first = ClientScheduler({'a': 'A'}, clock=clock, pacer=pacer)
+    second = ClientScheduler({'a': 'A2', 'b': 'B'}, clock=clock, pacer=pacer)
+
+    assert first.next_client() == ('A', 0.0)
+    assert second.next_client() == ('B', 0.0)
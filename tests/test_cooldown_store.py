@@ -0,0 +1,128 @@
+"""
+Tests for cooldown state kept across restarts
+"""
+import asyncio
+import json
+import time
+import pytest
+from telethon.errors import FloodWaitError, SlowModeWaitError
+
+from app.managers.cooldown_store import CooldownStore
+from app.managers.rate_limiter import RateLimiter
+from app.managers.transfer_manager import TransferManager
+from tests.test_transfer_manager import FakeClient, FakeMessage
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CooldownStore(str(tmp_path / 'cooldowns.json'))
+
+
+def test_load_drops_expired_cooldowns(store):
+    now = time.time()
+    store.save({
+        'accounts': {
+            'acc1': {'flood_wait_until': now + 300, 'delay': 4.0, 'error_rate': 0.2},
+            'acc2': {'flood_wait_until': now - 5, 'delay': 1.0, 'error_rate': 0.0}
+        },
+        'targets': {'acc1|dst': now + 60, 'acc2|dst': now - 1}
+    })
+
+    state = store.load()
+    assert state['accounts']['acc1']['flood_wait_until'] == pytest.approx(now + 300)
+    assert 'flood_wait_until' not in state['accounts']['acc2']
+    assert state['accounts']['acc2']['delay'] == 1.0
+    assert list(state['targets']) == ['acc1|dst']
+
+
+def test_flood_wait_survives_restart(store):
+    """A FloodWait hit before a restart keeps the account parked afterwards"""
+    class FloodedClient(FakeClient):
+        async def send_message(self, target, text):
+            raise FloodWaitError(request=None, capture=600)
+
+    manager = TransferManager(cooldown_store=store)
+    manager.rate_limiter = RateLimiter(global_rate=0, account_rate=0, target_rate=0)
+    flooded, healthy = FloodedClient([FakeMessage(1)]), FakeClient()
+    manager.create_session("t", {'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False,
+                                 'account_ids': ['acc_f', 'acc_h']})
+    asyncio.run(manager.start_mass_transfer("t", [flooded, healthy], lambda sid, text: None))
+
+    saved = json.load(open(store.state_file))
+    assert saved['accounts']['acc_f']['flood_wait_until'] > time.time() + 590
+    assert saved['accounts']['acc_f']['error_rate'] > 0
+
+    # "Restart": a fresh manager over the same store
+    restarted = TransferManager(cooldown_store=store)
+    assert restarted.client_flood_wait['acc_f'] - time.monotonic() > 590
+    assert restarted.pacer.delay('acc_f') == pytest.approx(manager.pacer.delay('acc_f'), abs=1e-3)
+    assert restarted.pacer.delay('acc_f') > restarted.pacer.delay('acc_h')
+
+    restarted.create_session("t2", {'account_ids': ['acc_f', 'acc_h']})
+    session = restarted.get_session("t2")
+    restarted._assign_account_keys(session, [flooded, healthy])
+    scheduler = restarted.create_scheduler(session, [flooded, healthy])
+    assert restarted.get_next_client(scheduler)[0] is healthy
+
+
+def test_slow_mode_blocks_only_the_pair(store):
+    manager = TransferManager(cooldown_store=store)
+    manager.rate_limiter.block('acc1', 'dst', 120)
+    manager.save_cooldowns()
+
+    restarted = TransferManager(cooldown_store=store)
+    limiter = restarted.rate_limiter
+    limiter.global_rate = limiter.account_rate = limiter.target_rate = 0
+
+    wait, _ = limiter.reserve('acc1', 'dst')
+    assert 115 < wait <= 120
+    assert limiter.reserve('acc1', 'other')[0] == 0.0
+    assert limiter.reserve('acc2', 'dst')[0] == 0.0
+
+
+def test_slow_mode_error_is_waited_out(store, make_manager):
+    """SlowModeWait holds back the pair in the limiter and the send is retried"""
+    class SlowClient(FakeClient):
+        async def send_message(self, target, text):
+            if not self.sent and not getattr(self, 'slowed', False):
+                self.slowed = True
+                raise SlowModeWaitError(request=None, capture=0)
+            return await super().send_message(target, text)
+
+    manager = make_manager(cooldown_store=store)
+    client = SlowClient([FakeMessage(1)])
+    manager.create_session("t", {'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False,
+                                 'account_ids': ['acc1']})
+    asyncio.run(manager.start_mass_transfer("t", [client], lambda sid, text: None))
+
+    assert client.sent == ["msg 1"]
+    assert manager.get_session("t").stats['total_errors'] == 0
+
+
+def test_only_real_accounts_saved_off_the_loop(store, make_manager):
+    """Clients without an account ID are not persisted; saves run outside the event loop thread"""
+    import threading
+
+    class FloodedClient(FakeClient):
+        async def send_message(self, target, text):
+            raise FloodWaitError(request=None, capture=600)
+
+    class RecordingStore(CooldownStore):
+        threads = []
+
+        def save(self, state):
+            self.threads.append(threading.current_thread())
+            return super().save(state)
+
+    recording = RecordingStore(store.state_file)
+    manager = make_manager(cooldown_store=recording)
+    healthy, flooded = FakeClient([FakeMessage(i) for i in range(1, 4)]), FloodedClient()
+    manager.create_session("t", {'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False,
+                                 'account_ids': ['acc_h']})
+    asyncio.run(manager.start_mass_transfer("t", [healthy, flooded], lambda sid, text: None))
+
+    assert healthy.sent == ["msg 1", "msg 2", "msg 3"]
+    assert manager.get_session("t").stats['flood_waits'] == 1
+    assert recording.threads and threading.main_thread() not in recording.threads
+    saved = json.load(open(store.state_file))
+    assert list(saved['accounts']) == ['acc_h']
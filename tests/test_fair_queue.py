@@ -0,0 +1,102 @@
+"""
+Tests for weighted fair queuing of the global send rate
+"""
+import asyncio
+import pytest
+
+from app.managers.fair_queue import FairQueue
+from app.managers.rate_limiter import RateLimiter, TokenBucket
+
+
+def fast_bucket():
+    """One token every 5 ms, no burst"""
+    bucket = TokenBucket(12000, burst=1)
+    bucket.tokens = 0
+    return bucket
+
+
+async def flood(queue, bucket, session_key, count, granted):
+    async def one():
+        await queue.acquire(session_key, bucket)
+        granted.append(session_key)
+    await asyncio.gather(*(one() for _ in range(count)))
+
+
+def test_capacity_split_by_weight():
+    queue = FairQueue(max_wait=60, window=40)
+    queue.register('archive', weight=1)
+    queue.register('urgent', weight=3)
+    bucket = fast_bucket()
+    granted = []
+
+    async def scenario():
+        await asyncio.gather(
+            flood(queue, bucket, 'archive', 40, granted),
+            flood(queue, bucket, 'urgent', 40, granted)
+        )
+    asyncio.run(scenario())
+
+    first = granted[:40]
+    assert first.count('urgent') == pytest.approx(30, abs=2)
+    assert len(granted) == 80
+    assert sum(queue.shares().values()) == pytest.approx(1.0)
+
+
+def test_priority_served_first_but_not_starved():
+    queue = FairQueue(max_wait=0.1, window=400)
+    queue.register('live', priority=1)
+    queue.register('backfill', priority=0)
+    bucket = TokenBucket(60000, burst=1)  # One token per ms
+    bucket.tokens = -50  # Nothing free for 50 ms, so every request is queued before the first grant
+    granted = []
+
+    async def scenario():
+        await asyncio.gather(
+            flood(queue, bucket, 'backfill', 5, granted),
+            flood(queue, bucket, 'live', 300, granted)
+        )
+    asyncio.run(scenario())
+
+    # Live requests go first, but the backfill gets through before the live queue drains
+    assert granted[:20] == ['live'] * 20
+    assert granted.index('backfill') < len(granted) - 5
+
+
+def test_cancelled_waiter_is_skipped():
+    queue = FairQueue(max_wait=60)
+    bucket = fast_bucket()
+
+    async def scenario():
+        waiter = asyncio.ensure_future(queue.acquire('a', bucket))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        return await asyncio.wait_for(queue.acquire('b', bucket), 1)
+    assert asyncio.run(scenario()) >= 0
+    assert queue.shares() == {'b': 1.0}
+
+
+def test_rate_limiter_queues_sessions_fairly():
+    limiter = RateLimiter(global_rate=12000, account_rate=0, target_rate=0, burst=1)
+    limiter.fair_queue.register('s1', weight=1)
+    limiter.fair_queue.register('s2', weight=1)
+
+    async def scenario():
+        async def send(session_key):
+            await limiter.acquire('acc', 'dst', session_key)
+        await asyncio.gather(*(send(key) for key in ['s1'] * 10 + ['s2'] * 10))
+    asyncio.run(scenario())
+
+    assert limiter.fair_queue.share('s1') == pytest.approx(0.5)
+    # Sends without a session still use the plain global bucket
+    assert limiter.reserve('acc', 'dst')[1]
+
+
+def test_free_token_taken_when_nothing_queued():
+    """With an idle queue a request of any priority is served at once"""
+    queue = FairQueue(max_wait=60)
+    queue.register('live', priority=1)
+    queue.register('backfill', priority=0)
+    bucket = TokenBucket(60, burst=1)
+
+    assert asyncio.run(queue.acquire('backfill', bucket)) == 0.0
+    assert queue.shares() == {'backfill': 1.0}
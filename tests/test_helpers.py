@@ -0,0 +1,51 @@
+"""
+Basic tests for helper utilities
+"""
+import asyncio
+
+from app.utils.helpers import MediaRelayStream
+
+
+async def fake_download(total, chunk):
+    """Async chunk iterator like client.iter_download"""
+    sent = 0
+    while sent < total:
+        size = min(chunk, total - sent)
+        yield bytes([sent % 251]) * size
+        sent += size
+
+
+def test_relay_stream_reads_exact_parts():
+    """read(n) returns exactly n bytes until the last part"""
+    stats = {}
+    stream = MediaRelayStream(fake_download(10_000, 3_000), 10_000, stats=stats)
+
+    async def read_all():
+        parts = []
+        while True:
+            part = await stream.read(4_096)
+            if not part:
+                return parts
+            parts.append(part)
+
+    parts = asyncio.run(read_all())
+    assert [len(p) for p in parts] == [4_096, 4_096, 1_808]
+
+
+def test_relay_stream_bounded_buffer():
+    """Peak buffer stays around one part plus one chunk, not the file size"""
+    stats = {}
+    total = 50 * 1024 * 1024
+    stream = MediaRelayStream(fake_download(total, 512 * 1024), total, stats=stats)
+
+    async def drain():
+        read = 0
+        while True:
+            part = await stream.read(512 * 1024)
+            if not part:
+                return read
+            read += len(part)
+
+    assert asyncio.run(drain()) == total
+    assert stream.peak_buffered <= 1024 * 1024
+    assert stats['relay_peak_buffer_bytes'] == stream.peak_buffered
@@ -0,0 +1,78 @@
+"""
+Tests for IntentLog
+"""
+import pytest
+
+from app.managers.intent_log import IntentLog
+
+
+@pytest.fixture
+def intent_log(tmp_path):
+    """IntentLog on a temp database"""
+    log = IntentLog(str(tmp_path / "intents.db"))
+    yield log
+    log.close()
+
+
+def test_begin_complete(intent_log):
+    """Completed intents are not pending"""
+    key = intent_log.pair_key("1", "2")
+    first = intent_log.begin(key, [10], ["aa"]).result()
+    second = intent_log.begin(key, [11, 12], ["bb", "cc"]).result()
+    intent_log.complete(first)
+
+    pending = intent_log.pending(key)
+    assert [p['intent_id'] for p in pending] == [second]
+    assert pending[0]['source_ids'] == [11, 12]
+    assert pending[0]['fingerprints'] == ["bb", "cc"]
+    assert intent_log.pending(intent_log.pair_key("1", "3")) == []
+
+
+def test_pending_survives_restart(intent_log, tmp_path):
+    """An intent written before a crash is visible to the next run"""
+    key = intent_log.pair_key("1", "2")
+    intent_log.begin(key, [10], ["aa"]).result()
+
+    reopened = IntentLog(str(tmp_path / "intents.db"))
+    pending = reopened.pending(key)
+    assert [p['source_ids'] for p in pending] == [[10]]
+    reopened.resolve([p['intent_id'] for p in pending])
+    assert reopened.pending(key) == []
+    reopened.close()
+
+
+def test_resolve_raises_mark(intent_log):
+    """Intents keep their target bound; resolving raises the pair's mark, never lowers it"""
+    key = intent_log.pair_key("1", "2")
+    first = intent_log.begin(key, [10], ["aa"], after_target_id=500).result()
+    second = intent_log.begin(key, [11], ["bb"], after_target_id=501).result()
+    assert [p['after_target_id'] for p in intent_log.pending(key)] == [500, 501]
+    assert intent_log.last_target(key) == 0
+
+    intent_log.resolve([second], key, 502)
+    intent_log.resolve([first], key, 501)
+    assert intent_log.last_target(key) == 502
+    assert intent_log.last_target(intent_log.pair_key("1", "3")) == 0
+
+
+def test_upgrades_log_without_bounds(tmp_path):
+    """Intents written before bounds existed read back with bound 0"""
+    import json
+    import sqlite3
+
+    db_path = str(tmp_path / "intents.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE intents (intent_id INTEGER PRIMARY KEY, key TEXT NOT NULL, "
+        "source_ids TEXT NOT NULL, fingerprints TEXT NOT NULL, created REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO intents (key, source_ids, fingerprints, created) VALUES (?, ?, ?, ?)",
+                 ("channel_1_to_2", json.dumps([10]), json.dumps(["aa"]), 1.0))
+    conn.commit()
+    conn.close()
+
+    log = IntentLog(db_path)
+    try:
+        assert [(p['source_ids'], p['after_target_id']) for p in log.pending("channel_1_to_2")] == [([10], 0)]
+    finally:
+        log.close()
@@ -0,0 +1,58 @@
+"""
+Basic tests for IntervalSet
+"""
+import random
+
+from app.utils.interval_set import IntervalSet
+
+
+def test_add_and_contains():
+    """Membership follows added values"""
+    ids = IntervalSet()
+    assert ids.add(5) is True
+    assert ids.add(5) is False
+    assert 5 in ids
+    assert 4 not in ids
+    assert len(ids) == 1
+
+
+def test_adjacent_values_merge():
+    """Adjacent and bridging inserts merge into one range"""
+    ids = IntervalSet([1, 2, 3, 10, 11])
+    assert ids.to_ranges() == [[1, 3], [10, 11]]
+
+    ids.add_range(4, 9)
+    assert ids.to_ranges() == [[1, 11]]
+    assert len(ids) == 11
+
+
+def test_round_trip():
+    """Serialized ranges rebuild the same set"""
+    ids = IntervalSet([1, 2, 3, 8, 100])
+    assert IntervalSet.from_ranges(ids.to_ranges()) == ids
+    assert ids.max() == 100
+
+
+def test_remove_below():
+    """Values below the cut are dropped, a straddling range is trimmed"""
+    ids = IntervalSet([1, 2, 3, 7, 8, 9, 20])
+    ids.remove_below(8)
+    assert ids.to_ranges() == [[8, 9], [20, 20]]
+    assert len(ids) == 3
+
+    ids.remove_below(100)
+    assert not ids
+
+
+def test_matches_python_set():
+    """Random inserts behave like a plain set"""
+    rng = random.Random(42)
+    ids, reference = IntervalSet(), set()
+    for _ in range(2000):
+        value = rng.randint(0, 500)
+        assert ids.add(value) == (value not in reference)
+        reference.add(value)
+
+    assert list(ids) == sorted(reference)
+    assert len(ids) == len(reference)
+    assert all((v in ids) == (v in reference) for v in range(-5, 510))
@@ -0,0 +1,166 @@
+"""
+Tests for JobScheduler (periodic incremental catch-up)
+"""
+import asyncio
+import os
+import time
+import pytest
+
+from app.config import Config
+from app.managers import download_manager as download_module
+from app.managers.download_manager import DownloadManager
+from app.managers.job_scheduler import JobScheduler
+from tests.test_transfer_manager import FakeClient, FakeMessage
+
+
+class FakeAccounts:
+    """AccountManager stand-in serving fixed clients"""
+    def __init__(self, clients):
+        self.clients = clients
+
+    def get_client(self, account_id):
+        return self.clients.get(account_id)
+
+
+@pytest.fixture
+def jobs_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CATCHUP_JITTER', 0)
+    monkeypatch.setattr(Config, 'CATCHUP_ACCOUNT_STAGGER', 0)
+    return str(tmp_path / 'transfers.json')
+
+
+def run_due_jobs(scheduler):
+    """Start every due job and wait for the runs to finish"""
+    async def scenario():
+        tasks = scheduler.run_due()
+        await asyncio.gather(*tasks)
+        return len(tasks)
+    return asyncio.run(scenario())
+
+
+def test_jobs_persist(jobs_file):
+    """Saved jobs survive a restart"""
+    scheduler = JobScheduler(jobs_file, FakeAccounts({}))
+    job_id = scheduler.add_job('transfer', 'src', ['acc1'], target='dst', interval=600)
+
+    reloaded = JobScheduler(jobs_file, FakeAccounts({}))
+    job = reloaded.get_job(job_id)
+    assert job['source'] == 'src'
+    assert job['interval'] == 600
+    assert job['last_message_id'] == 0
+
+    assert reloaded.remove_job(job_id)
+    assert JobScheduler(jobs_file, FakeAccounts({})).get_jobs() == []
+
+
+def test_add_job_validates(jobs_file):
+    scheduler = JobScheduler(jobs_file, FakeAccounts({}))
+    with pytest.raises(ValueError):
+        scheduler.add_job('mirror', 'src', ['acc1'])
+    with pytest.raises(ValueError):
+        scheduler.add_job('transfer', 'src', ['acc1'])
+
+
+def test_transfer_job_reads_only_new_messages(jobs_file, transfer_manager):
+    """Each run starts after the last message the previous run reached"""
+    client = FakeClient([FakeMessage(i) for i in range(1, 6)])
+    scheduler = JobScheduler(jobs_file, FakeAccounts({'acc1': client}), transfer_manager)
+    job_id = scheduler.add_job('transfer', 'src', ['acc1'], target='dst', mode='forward', interval=600)
+
+    assert run_due_jobs(scheduler) == 1
+    job = scheduler.get_job(job_id)
+    assert job['last_message_id'] == 5
+    assert job['next_run'] >= job['last_run'] + 600
+    assert [i for batch in client.forwarded for i in batch] == [1, 2, 3, 4, 5]
+
+    # Not due yet
+    assert run_due_jobs(scheduler) == 0
+
+    client.history += [FakeMessage(6), FakeMessage(7)]
+    client.forwarded.clear()
+    job['next_run'] = 0
+    run_due_jobs(scheduler)
+
+    assert [i for batch in client.forwarded for i in batch] == [6, 7]
+    assert JobScheduler(jobs_file, FakeAccounts({})).get_job(job_id)['last_message_id'] == 7
+
+
+def test_download_job_reads_only_new_messages(jobs_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'DOWNLOADS_DIR', str(tmp_path / 'downloads'), raising=False)
+    monkeypatch.setattr(download_module.random, 'uniform', lambda a, b: 0)
+    client = FakeClient([FakeMessage(i) for i in range(1, 4)])
+    scheduler = JobScheduler(jobs_file, FakeAccounts({'acc1': client}), download_manager=DownloadManager())
+    job_id = scheduler.add_job('download', 'src', ['acc1'], file_types={'text': True})
+
+    run_due_jobs(scheduler)
+    client.history.append(FakeMessage(4))
+    scheduler.get_job(job_id)['next_run'] = 0
+    run_due_jobs(scheduler)
+
+    session = scheduler.download_manager.get_session(f"job_{job_id}")
+    assert session.stats['total_downloaded'] == 1  # Second run saw only message 4
+    assert scheduler.get_job(job_id)['last_message_id'] == 4
+    folders = os.listdir(tmp_path / 'downloads')
+    assert len(folders) == 1
+    assert sorted(os.listdir(tmp_path / 'downloads' / folders[0])) == [f"msg_{i}.txt" for i in range(1, 5)]
+
+
+def test_download_job_retries_failed_download(jobs_file, tmp_path, monkeypatch):
+    """A failed download holds the job's resume point back, so the next run retries it"""
+    from telethon.tl.types import MessageMediaPhoto
+
+    monkeypatch.setattr(Config, 'DOWNLOADS_DIR', str(tmp_path / 'downloads'), raising=False)
+    monkeypatch.setattr(download_module.random, 'uniform', lambda a, b: 0)
+    photo = FakeMessage(2)
+    photo.media = MessageMediaPhoto()
+
+    class FlakyClient(FakeClient):
+        attempts = 0
+
+        async def download_media(self, message, file=None):
+            self.attempts += 1
+            if self.attempts == 1:
+                raise ConnectionError("connection lost")
+            return file
+
+    client = FlakyClient([FakeMessage(1), photo, FakeMessage(3)])
+    scheduler = JobScheduler(jobs_file, FakeAccounts({'acc1': client}), download_manager=DownloadManager())
+    job_id = scheduler.add_job('download', 'src', ['acc1'], file_types={'text': True, 'images': True})
+
+    run_due_jobs(scheduler)
+    assert scheduler.get_job(job_id)['last_message_id'] == 1
+
+    scheduler.get_job(job_id)['next_run'] = 0
+    run_due_jobs(scheduler)
+    assert client.attempts == 2
+    assert scheduler.get_job(job_id)['last_message_id'] == 3
+
+
+def test_account_runs_one_job_at_a_time(jobs_file, transfer_manager, monkeypatch):
+    """Due jobs sharing an account are staggered instead of starting together"""
+    monkeypatch.setattr(Config, 'CATCHUP_ACCOUNT_STAGGER', 3600)
+    client = FakeClient([FakeMessage(1)])
+    scheduler = JobScheduler(jobs_file, FakeAccounts({'acc1': client, 'acc2': client}), transfer_manager)
+    scheduler.add_job('transfer', 'a', ['acc1'], target='dst', mode='forward')
+    scheduler.add_job('transfer', 'b', ['acc1'], target='dst', mode='forward')
+    scheduler.add_job('transfer', 'c', ['acc2'], target='dst', mode='forward')
+    for job in scheduler.get_jobs():
+        job['next_run'] = 0
+
+    assert run_due_jobs(scheduler) == 2  # One per account
+    assert run_due_jobs(scheduler) == 0  # acc1 still inside its stagger gap
+
+    scheduler._account_free_at.clear()
+    assert run_due_jobs(scheduler) == 1
+    assert all(job['last_run'] and job['last_run'] <= time.time() for job in scheduler.get_jobs())
+
+
+def test_job_without_connected_account_is_rescheduled(jobs_file):
+    scheduler = JobScheduler(jobs_file, FakeAccounts({}))
+    job_id = scheduler.add_job('transfer', 'src', ['acc1'], target='dst', interval=60)
+
+    run_due_jobs(scheduler)
+
+    job = scheduler.get_job(job_id)
+    assert job['last_status'] == "Skipped: no connected accounts"
+    assert job['next_run'] > time.time()
@@ -0,0 +1,54 @@
+"""
+Tests for MessageMap
+"""
+import pytest
+
+from app.managers.message_map import MessageMap
+
+
+@pytest.fixture
+def message_map(tmp_path):
+    """MessageMap on a temp database"""
+    mapping = MessageMap(str(tmp_path / "message_map.db"))
+    yield mapping
+    mapping.close()
+
+
+def test_point_and_reverse_lookup(message_map):
+    """Source -> targets and target -> source"""
+    key = message_map.pair_key("1", "2")
+    message_map.record(key, [(10, 110), (11, 111), (11, 112)])
+
+    assert message_map.get_targets(key, 11) == [111, 112]
+    assert message_map.get_targets(key, 99) == []
+    assert message_map.get_source(key, 112) == 11
+    assert message_map.count(key) == 2
+
+
+def test_range_lookup_is_per_pair(message_map):
+    """Range queries only see the requested pair"""
+    key = message_map.pair_key("1", "2")
+    other = message_map.pair_key("1", "3")
+    message_map.record(key, [(i, 1000 + i) for i in range(1, 501)])
+    message_map.record(other, [(5, 5)])
+
+    result = message_map.get_range(key, 100, 199)
+    assert list(result) == list(range(100, 200))
+    assert result[150] == [1150]
+    assert message_map.get_range(other, 1, 10) == {5: [5]}
+
+
+def test_duplicates_remove_and_clear(message_map, tmp_path):
+    """Re-recording is idempotent; remove/clear forget mappings; data persists"""
+    key = message_map.pair_key("1", "2")
+    message_map.record(key, [(1, 101), (2, 102)])
+    message_map.record(key, [(1, 101)])
+    message_map.remove(key, [2])
+    assert message_map.get_range(key, 0, 10) == {1: [101]}
+
+    message_map.flush()
+    reopened = MessageMap(str(tmp_path / "message_map.db"))
+    assert reopened.get_targets(key, 1) == [101]
+    assert reopened.clear(key) == 1
+    assert reopened.count(key) == 0
+    reopened.close()
@@ -0,0 +1,43 @@
+"""
+Tests for the adaptive AIMD pacing controller
+"""
+import pytest
+
+from app.managers.pacing import PacingController, AccountPacer
+
+
+@pytest.fixture
+def controller():
+    return PacingController(initial=2.0, min_delay=0.5, max_delay=8.0, step=0.5,
+                            backoff=2.0, slow_backoff=1.5, slow_response=5.0)
+
+
+def test_success_shortens_delay_down_to_min(controller):
+    assert controller.on_success(0.2) == pytest.approx(1.5)
+    for _ in range(10):
+        controller.on_success(0.2)
+    assert controller.delay == pytest.approx(0.5)
+
+
+def test_flood_wait_backs_off_up_to_max(controller):
+    assert controller.on_flood_wait(30) == pytest.approx(4.0)
+    assert controller.on_flood_wait(30) == pytest.approx(8.0)
+    assert controller.on_flood_wait(30) == pytest.approx(8.0)
+
+
+def test_slow_response_backs_off(controller):
+    assert controller.on_success(6.0) == pytest.approx(3.0)
+    # Unmeasured sends count as normal successes
+    assert controller.on_success(None) == pytest.approx(2.5)
+
+
+def test_accounts_are_paced_independently():
+    pacer = AccountPacer(initial=2.0, min_delay=0.5, max_delay=8.0, step=0.5)
+    pacer.record_flood_wait('a', 10)
+    pacer.record_success('b', 0.1)
+
+    assert pacer.snapshot() == {'a': 4.0, 'b': 1.5}
+
+    pacer.mark_sent('a', 100.0)
+    assert pacer.next_send_at('a') == pytest.approx(104.0)
+    assert pacer.next_send_at('b') == 0.0
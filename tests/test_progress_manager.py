@@ -2,6 +2,7 @@
 Basic tests for ProgressManager
 """
 import os
+import json
 import tempfile
 import pytest
 
@@ -40,7 +41,7 @@ def test_save_load_progress(progress_manager):
     # Load progress
     progress = progress_manager.load_progress("123", "456")
     
-    assert progress['sent_message_ids'] == [1, 2, 3, 4, 5]
+    assert list(progress['sent_message_ids']) == [1, 2, 3, 4, 5]
     assert progress['last_message_id'] == 5
     assert progress['total_sent'] == 5
 
@@ -68,4 +69,172 @@ def test_clear_progress(progress_manager):
     
     # Load should return empty
     progress = progress_manager.load_progress("123", "456")
-    assert progress['sent_message_ids'] == []
+    assert len(progress['sent_message_ids']) == 0
+
+
+def test_sent_ids_stored_as_ranges(progress_manager, temp_dir):
+    """Contiguous IDs collapse into ranges on disk - nothing is trimmed"""
+    progress_manager.save_progress("123", "456", list(range(1, 20001)) + [30000], 30000, 20001, 0)
+    progress_manager.flush()
+
+    with open(os.path.join(temp_dir, "channel_123_to_456.json"), encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['sent_ranges'] == [[1, 20000], [30000, 30000]]
+
+    progress = progress_manager.load_progress("123", "456")
+    assert 1 in progress['sent_message_ids']
+    assert 25000 not in progress['sent_message_ids']
+    assert len(progress['sent_message_ids']) == 20001
+
+
+def test_legacy_list_is_migrated(progress_manager, temp_dir):
+    """Old files with a sent_message_ids list are converted on load"""
+    path = os.path.join(temp_dir, "channel_1_to_2.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'sent_message_ids': [3, 1, 2, 7], 'last_message_id': 7,
+                   'total_sent': 4, 'total_skipped': 0, 'last_updated': None}, f)
+
+    progress = progress_manager.load_progress("1", "2")
+    assert list(progress['sent_message_ids']) == [1, 2, 3, 7]
+
+    progress_manager.flush()
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['sent_ranges'] == [[1, 3], [7, 7]]
+    assert 'sent_message_ids' not in data
+
+
+def test_update_appends_to_journal(progress_manager, temp_dir):
+    """update_progress appends instead of rewriting the snapshot"""
+    progress_manager.save_progress("123", "456", [1, 2], 2, 2, 0)
+    progress_manager.flush()
+    progress_manager.update_progress("123", "456", 3)
+    progress_manager.update_progress("123", "456", 4)
+    progress_manager.flush()
+
+    with open(os.path.join(temp_dir, "channel_123_to_456.json"), encoding='utf-8') as f:
+        assert json.load(f)['sent_ranges'] == [[1, 2]]
+    with open(os.path.join(temp_dir, "channel_123_to_456.journal"), encoding='utf-8') as f:
+        assert f.read() == "s 3\ns 4\n"
+
+
+def test_journal_replayed_after_restart(temp_dir):
+    """A fresh manager (e.g. after a crash) sees snapshot + journal; torn lines are ignored"""
+    first = ProgressManager(temp_dir)
+    first.save_progress("123", "456", [1, 2], 2, 2, 0)
+    first.update_progress("123", "456", 3)
+    first.flush()
+    with open(os.path.join(temp_dir, "channel_123_to_456.journal"), 'a', encoding='utf-8') as f:
+        f.write("s 9")  # crash mid-append
+
+    progress = ProgressManager(temp_dir).load_progress("123", "456")
+    assert list(progress['sent_message_ids']) == [1, 2, 3]
+    assert progress['last_message_id'] == 3
+    assert progress['total_sent'] == 3
+
+
+def test_append_progress_journals_checkpoints(temp_dir):
+    """Checkpoints append new IDs and the watermark; IDs at or below it are dropped"""
+    manager = ProgressManager(temp_dir)
+    manager.append_progress("123", "456", [1, 2, 5], 2, 3, 1)
+    manager.append_progress("123", "456", [3, 6], 3, 5, 1)
+    manager.flush()
+
+    assert not os.path.exists(os.path.join(temp_dir, "channel_123_to_456.json"))
+    with open(os.path.join(temp_dir, "channel_123_to_456.journal"), encoding='utf-8') as f:
+        assert f.read() == "a 5\nw 2 3 1\na 6\nw 3 5 1\n"
+
+    for progress in (manager.load_progress("123", "456"), ProgressManager(temp_dir).load_progress("123", "456")):
+        assert list(progress['sent_message_ids']) == [5, 6]
+        assert progress['last_message_id'] == 3
+        assert progress['total_sent'] == 5
+        assert progress['total_skipped'] == 1
+
+
+def test_journal_compaction(temp_dir, monkeypatch):
+    """A flush that would push the journal past the threshold writes a snapshot instead"""
+    from app.config import Config
+    monkeypatch.setattr(Config, 'PROGRESS_COMPACT_THRESHOLD', 5)
+
+    manager = ProgressManager(temp_dir)
+    for message_id in range(1, 6):
+        manager.update_progress("123", "456", message_id)
+
+    manager.flush()
+
+    files = sorted(os.listdir(temp_dir))
+    assert files == ["channel_123_to_456.json", "index.json"]
+    with open(os.path.join(temp_dir, "channel_123_to_456.json"), encoding='utf-8') as f:
+        assert json.load(f)['sent_ranges'] == [[1, 5]]
+
+    manager.update_progress("123", "456", 6)
+    manager.flush()
+    progress = ProgressManager(temp_dir).load_progress("123", "456")
+    assert list(progress['sent_message_ids']) == [1, 2, 3, 4, 5, 6]
+
+
+def test_clear_removes_journal(progress_manager, temp_dir):
+    """clear_progress deletes journal-only progress too"""
+    progress_manager.update_progress("123", "456", 1)
+    assert progress_manager.clear_progress("123", "456") is True
+    assert os.listdir(temp_dir) == []
+
+
+def test_updates_are_write_behind(progress_manager, temp_dir, monkeypatch):
+    """Nothing touches disk until a flush; the in-memory record is current"""
+    from app.config import Config
+    monkeypatch.setattr(Config, 'PROGRESS_FLUSH_INTERVAL', 3600)
+
+    progress_manager.save_progress("123", "456", [1], 1, 1, 0)
+    progress_manager.update_progress("123", "456", 2)
+    assert os.listdir(temp_dir) == []
+    assert list(progress_manager.load_progress("123", "456")['sent_message_ids']) == [1, 2]
+
+    assert progress_manager.flush() is True
+    assert sorted(os.listdir(temp_dir)) == ["channel_123_to_456.json", "index.json"]
+    progress = ProgressManager(temp_dir).load_progress("123", "456")
+    assert list(progress['sent_message_ids']) == [1, 2]
+
+
+def test_get_all_progress_uses_index(progress_manager, temp_dir):
+    """Listing returns summaries from index.json"""
+    progress_manager.save_progress("1", "2", [1, 2, 3, 9], 9, 4, 0)
+    progress_manager.flush()
+    progress_manager.update_progress("1", "2", 10)  # not flushed yet
+
+    all_progress = progress_manager.get_all_progress()
+    assert list(all_progress) == ["channel_1_to_2"]
+    summary = all_progress["channel_1_to_2"]
+    assert summary['last_message_id'] == 10
+    assert summary['total_sent'] == 5
+    assert summary['range_count'] == 2
+    assert summary['size'] > 0
+
+    with open(os.path.join(temp_dir, "index.json"), encoding='utf-8') as f:
+        assert json.load(f)["channel_1_to_2"]['last_message_id'] == 9
+
+
+def test_index_rebuilt_when_missing(temp_dir):
+    """A lost index is rebuilt from the progress files"""
+    first = ProgressManager(temp_dir)
+    first.save_progress("1", "2", [1, 2], 2, 2, 0)
+    first.save_progress("3", "4", [5], 5, 1, 0)
+    first.flush()
+    os.remove(os.path.join(temp_dir, "index.json"))
+
+    all_progress = ProgressManager(temp_dir).get_all_progress()
+    assert sorted(all_progress) == ["channel_1_to_2", "channel_3_to_4"]
+    assert all_progress["channel_3_to_4"]['last_message_id'] == 5
+    assert os.path.exists(os.path.join(temp_dir, "index.json"))
+
+
+def test_cleanup_old_progress(progress_manager, temp_dir):
+    """Age-based cleanup reads last_updated from the index"""
+    progress_manager.save_progress("1", "2", [1], 1, 1, 0)
+    progress_manager.save_progress("3", "4", [1], 1, 1, 0)
+    progress_manager.flush()
+    progress_manager._index["channel_3_to_4"]['last_updated'] = "2000-01-01T00:00:00"
+
+    assert progress_manager.cleanup_old_progress(30) == 1
+    assert list(progress_manager.get_all_progress()) == ["channel_1_to_2"]
+    assert not os.path.exists(os.path.join(temp_dir, "channel_3_to_4.json"))
@@ -0,0 +1,103 @@
+"""
+Tests for per-account rate profiles and calibration
+"""
+import asyncio
+import pytest
+from telethon.errors import FloodWaitError
+
+from app.config import Config
+from app.managers.pacing import AccountPacer
+from app.managers.rate_limiter import RateLimiter
+from app.managers.rate_profiles import RateProfiles, RateCalibrator, PRESETS
+from app.managers.transfer_manager import TransferManager
+from tests.test_transfer_manager import FakeClient, FakeMessage
+
+
+class ProbeClient(FakeClient):
+    """Accepts `limit` probe sends, then answers with FloodWait"""
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.deleted = []
+
+    async def send_message(self, target, text):
+        if len(self.sent) >= self.limit:
+            raise FloodWaitError(request=None, capture=30)
+        self.sent.append(text)
+        return FakeMessage(len(self.sent), text)
+
+    async def delete_messages(self, target, message_ids):
+        self.deleted.extend(message_ids)
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    return RateProfiles(str(tmp_path / 'rate_profiles.json'))
+
+
+def test_preset_persists_and_applies(profiles, tmp_path):
+    profiles.set_preset('acc1', 'safe')
+    profile = RateProfiles(str(tmp_path / 'rate_profiles.json')).get('acc1')
+    assert profile['preset'] == 'safe'
+    assert profile['messages_per_minute'] == PRESETS['safe']
+
+    limiter = RateLimiter(global_rate=0, account_rate=20, target_rate=0)
+    pacer = AccountPacer()
+    assert profiles.apply('acc1', limiter, pacer)
+
+    assert limiter.account_rates['acc1'] == PRESETS['safe']
+    assert limiter._buckets_for('acc1')[0].rate == PRESETS['safe'] / 60.0
+    assert limiter._buckets_for('acc2')[0].rate == 20 / 60.0
+    assert pacer.controller('acc1').min_delay == pytest.approx(60.0 / PRESETS['safe'])
+    assert not profiles.apply('acc2', limiter, pacer)
+
+    with pytest.raises(ValueError):
+        profiles.set_preset('acc1', 'reckless')
+
+
+def test_default_preset_for_accounts_without_profile(profiles, monkeypatch):
+    assert profiles.get('acc1') is None
+    monkeypatch.setattr(Config, 'RATE_PROFILE', 'aggressive')
+    assert profiles.get('acc1')['messages_per_minute'] == PRESETS['aggressive']
+
+
+def test_apply_keeps_learned_delay(profiles):
+    pacer = AccountPacer(initial=6.0, min_delay=0.5, max_delay=60.0)
+    pacer.controller('acc1')
+    profiles.set_preset('acc1', 'aggressive')
+    profiles.apply('acc1', RateLimiter(), pacer)
+
+    controller = pacer.controller('acc1')
+    assert controller.min_delay == pytest.approx(1.5)
+    assert controller.delay == pytest.approx(6.0)
+
+
+def test_calibration_ramps_until_flood_wait():
+    """The profile is derived from the last rate that got through"""
+    client = ProbeClient(limit=7)
+    calibrator = RateCalibrator(start_rate=6000, growth=2, probes_per_step=3, max_rate=10 ** 6, margin=0.5)
+    statuses = []
+
+    profile = asyncio.run(calibrator.run(client, 'scratch', statuses.append))
+
+    # 3 probes at 6000/min, 3 at 12000/min, FloodWait on the 2nd probe at 24000/min
+    assert calibrator.flood_wait == (24000, 30)
+    assert profile['preset'] == 'calibrated'
+    assert profile['messages_per_minute'] == 6000
+    assert profile['flood_at_rate'] == 24000
+    assert client.deleted == list(range(1, 8))
+    assert statuses[-1] == "Calibrated: 6000.0 msg/min"
+
+
+def test_calibrate_account_saves_profile_and_parks_account(profiles):
+    manager = TransferManager(rate_profiles=profiles)
+    client = ProbeClient(limit=0)
+    calibrator = RateCalibrator(start_rate=6000, probes_per_step=2, max_rate=10 ** 6)
+
+    profile = asyncio.run(manager.calibrate_account(client, 'acc1', 'scratch', lambda text: None, calibrator))
+
+    # Flooded at once: settles below the start rate
+    assert profile['messages_per_minute'] == 6000 / 2 * 0.8
+    assert profiles.get('acc1') == profile
+    assert 'acc1' in manager.client_flood_wait
+    assert manager.rate_limiter.account_rates['acc1'] == profile['messages_per_minute']
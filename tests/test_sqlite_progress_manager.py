@@ -0,0 +1,124 @@
+"""
+Tests for SQLiteProgressManager
+"""
+import os
+import time
+import pytest
+
+from app.managers.progress_manager import ProgressManager
+from app.managers.sqlite_progress_manager import SQLiteProgressManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """SQLiteProgressManager on a temp database"""
+    manager = SQLiteProgressManager(str(tmp_path / "progress.db"))
+    yield manager
+    manager.close()
+
+
+def test_save_load_progress(db):
+    """Saved ranges, watermark and totals come back"""
+    db.save_progress("123", "456", [1, 2, 3, 7], 7, 4, 1)
+
+    progress = db.load_progress("123", "456")
+    assert list(progress['sent_message_ids']) == [1, 2, 3, 7]
+    assert progress['last_message_id'] == 7
+    assert progress['total_sent'] == 4
+    assert progress['total_skipped'] == 1
+    assert progress['last_updated'] is not None
+
+
+def test_update_progress_merges_ranges(db):
+    """Single updates join neighbouring ranges and ignore duplicates"""
+    for message_id in (1, 3, 2, 2, 10):
+        db.update_progress("123", "456", message_id)
+    db.flush()
+
+    with db._read_lock:
+        ranges = db._read_conn.execute(
+            "SELECT start_id, end_id FROM sent_ranges ORDER BY start_id"
+        ).fetchall()
+    assert ranges == [(1, 3), (10, 10)]
+
+    progress = db.load_progress("123", "456")
+    assert progress['total_sent'] == 4
+    assert progress['last_message_id'] == 10
+
+
+def test_append_progress_drops_ranges_below_watermark(db):
+    """Checkpoints add new IDs and trim everything the watermark passed"""
+    db.save_progress("123", "456", [1, 2, 3, 7, 8, 9], 3, 6, 0)
+    db.append_progress("123", "456", [10, 12], 8, 8, 2)
+
+    progress = db.load_progress("123", "456")
+    assert progress['sent_message_ids'].to_ranges() == [[9, 10], [12, 12]]
+    assert progress['last_message_id'] == 8
+    assert progress['total_sent'] == 8
+    assert progress['total_skipped'] == 2
+
+
+def test_clear_progress(db):
+    """Clearing removes the pair; clearing twice reports nothing to clear"""
+    db.save_progress("123", "456", [1, 2], 2, 2, 0)
+    assert db.clear_progress("123", "456") is True
+    assert db.clear_progress("123", "456") is False
+    assert len(db.load_progress("123", "456")['sent_message_ids']) == 0
+
+
+def test_recent_and_old_pairs(db):
+    """Indexed age queries: recent listing and cleanup"""
+    db.save_progress("1", "2", [1], 1, 1, 0)
+    db.save_progress("3", "4", [1], 1, 1, 0)
+    db.flush()
+    old = time.time() - 40 * 24 * 60 * 60
+    db._submit(lambda conn: conn.execute(
+        "UPDATE pairs SET last_updated = ? WHERE key = 'channel_3_to_4'", (old,)
+    )).result()
+
+    assert db.get_recent_pairs(7) == ["channel_1_to_2"]
+    assert db.cleanup_old_progress(30) == 1
+    assert list(db.get_all_progress()) == ["channel_1_to_2"]
+
+
+def test_pending_pairs(db):
+    """A pair is pending while the source head is past the watermark"""
+    db.save_progress("1", "2", [1, 2], 2, 2, 0)
+    db.record_source_head("1", "2", 5)
+    db.save_progress("3", "4", [1], 1, 1, 0)
+    db.record_source_head("3", "4", 1)
+
+    pending = db.get_pending_pairs()
+    assert [p['key'] for p in pending] == ["channel_1_to_2"]
+    assert pending[0]['source_max_id'] == 5
+
+
+
+def test_flush_reports_failed_writes(db):
+    """flush() is False once after a queued write failed, True when all committed"""
+    db.update_progress("123", "456", 1)
+    assert db.flush() is True
+
+    def broken(conn):
+        conn.execute("INSERT INTO missing_table VALUES (1)")
+    db._writer.submit(broken)
+    db.update_progress("123", "456", 2)
+    assert db.flush() is False
+    assert db.flush() is True
+    assert 2 in db.load_progress("123", "456")['sent_message_ids']
+
+def test_import_json_progress(tmp_path):
+    """Existing JSON progress is imported when the database is created"""
+    json_dir = tmp_path / "progress"
+    json_manager = ProgressManager(str(json_dir))
+    json_manager.save_progress("-100123", "-100456", [1, 2, 3, 9], 9, 4, 2)
+    json_manager.flush()
+
+    manager = SQLiteProgressManager(str(tmp_path / "progress.db"), str(json_dir))
+    try:
+        progress = manager.load_progress("-100123", "-100456")
+        assert list(progress['sent_message_ids']) == [1, 2, 3, 9]
+        assert progress['total_skipped'] == 2
+        assert os.path.exists(json_dir / "channel_-100123_to_-100456.json")
+    finally:
+        manager.close()
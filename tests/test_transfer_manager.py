@@ -0,0 +1,772 @@
+"""
+Basic tests for TransferManager pipeline (no network - fake clients)
+"""
+import asyncio
+import os
+import pytest
+
+from app.config import Config
+
+
+class FakeMessage:
+    """Minimal stand-in for a Telethon text message"""
+    def __init__(self, msg_id, text=None, grouped_id=None):
+        self.id = msg_id
+        self.text = text if text is not None else f"msg {msg_id}"
+        self.media = None
+        self.photo = self.video = self.audio = self.voice = self.document = None
+        self.grouped_id = grouped_id
+        if grouped_id:
+            self.media = self.photo = f"photo {msg_id}"
+
+
+class FakeClient:
+    """Records sends; serves a fixed message history"""
+    def __init__(self, history=None):
+        self.history = history or []
+        self.sent = []
+        self.forwarded = []
+        self.files = []
+
+    async def get_entity(self, entity_id):
+        return entity_id
+
+    async def iter_messages(self, entity, reverse=True, min_id=0, **kwargs):
+        for message in self.history:
+            if message.id > min_id:
+                await asyncio.sleep(0)
+                yield message
+
+    async def send_message(self, target, text):
+        await asyncio.sleep(0.001)
+        self.sent.append(text)
+        return FakeMessage(1000 + len(self.sent), text)
+
+    async def send_file(self, target, file, caption=None, **kwargs):
+        await asyncio.sleep(0.001)
+        self.files.append(file)
+        if isinstance(file, list):
+            return [FakeMessage(1000 + len(self.files) * 10 + i) for i in range(len(file))]
+        return FakeMessage(1000 + len(self.files))
+
+    async def forward_messages(self, target, message_ids, from_peer=None, **kwargs):
+        await asyncio.sleep(0.001)
+        self.forwarded.append(list(message_ids))
+        return [FakeMessage(2000 + i) for i in message_ids]
+
+    def add_event_handler(self, callback, event):
+        self.handlers = getattr(self, 'handlers', []) + [(callback, event)]
+
+    def remove_event_handler(self, callback):
+        self.handlers = [(c, e) for c, e in self.handlers if c is not callback]
+
+
+def run_session(manager, clients, config):
+    """Run one session to completion and return (session, statuses)"""
+    statuses = []
+    manager.create_session("task_test", config)
+    asyncio.run(manager.start_mass_transfer(
+        "task_test", clients, lambda sid, text: statuses.append(text)
+    ))
+    return manager.get_session("task_test"), statuses
+
+
+def test_pipeline_sends_all_in_order(transfer_manager, monkeypatch):
+    """Scanner and sender overlap through a small queue without losing order"""
+    monkeypatch.setattr(Config, 'TRANSFER_QUEUE_SIZE', 2)
+    client = FakeClient([FakeMessage(i) for i in range(1, 11)])
+
+    session, statuses = run_session(transfer_manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False
+    })
+
+    assert client.sent == [f"msg {i}" for i in range(1, 11)]
+    assert session.stats['total_sent'] == 10
+    assert session.status == "Completed"
+    assert statuses[-1] == "Completed Successfully!"
+
+
+def test_pipeline_respects_start_id(transfer_manager):
+    """Messages at or below start_id are not scanned"""
+    client = FakeClient([FakeMessage(i) for i in range(1, 6)])
+
+    session, _ = run_session(transfer_manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False, 'start_id': 3
+    })
+
+    assert client.sent == ["msg 4", "msg 5"]
+
+
+def test_pipeline_skips_filtered(transfer_manager):
+    """Filtered messages are counted as skipped by the scanner"""
+    client = FakeClient([FakeMessage(1), FakeMessage(2)])
+
+    session, _ = run_session(transfer_manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False, 'file_types': ['images']
+    })
+
+    assert client.sent == []
+    assert session.stats['total_skipped'] == 2
+
+
+def test_parallel_accounts_share_work(transfer_manager):
+    """Each account runs its own sender and together they send everything once"""
+    history = [FakeMessage(i) for i in range(1, 21)]
+    primary, second = FakeClient(history), FakeClient()
+
+    session, _ = run_session(transfer_manager, [primary, second], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False, 'parallel_accounts': True
+    })
+
+    assert sorted(primary.sent + second.sent, key=lambda t: int(t.split()[1])) == [f"msg {i}" for i in range(1, 21)]
+    assert primary.sent and second.sent
+    assert session.stats['total_sent'] == 20
+
+
+def test_flood_wait_retries_on_other_account(transfer_manager):
+    """A FloodWait parks the account and the message goes out on another one"""
+    from telethon.errors import FloodWaitError
+
+    class FloodedClient(FakeClient):
+        async def send_message(self, target, text):
+            raise FloodWaitError(request=None, capture=120)
+
+    flooded = FloodedClient([FakeMessage(i) for i in range(1, 4)])
+    healthy = FakeClient()
+
+    session, _ = run_session(transfer_manager, [flooded, healthy], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False, 'account_ids': ['acc_f', 'acc_h']
+    })
+
+    assert healthy.sent == ["msg 1", "msg 2", "msg 3"]
+    assert session.stats['total_errors'] == 0
+    assert session.stats['flood_waits'] == 1
+    assert 'acc_f' in transfer_manager.client_flood_wait
+    assert set(session.stats['account_pace']) == {'acc_f', 'acc_h'}
+
+
+def test_forward_mode_batches_ids(transfer_manager):
+    """Forward mode sends runs of IDs per request, in order, counted per message"""
+    client = FakeClient([FakeMessage(i) for i in range(1, 251)])
+
+    session, _ = run_session(transfer_manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'forward'
+    })
+
+    flat = [i for call in client.forwarded for i in call]
+    assert flat == list(range(1, 251))
+    assert max(len(call) for call in client.forwarded) <= 100
+    assert len(client.forwarded) < 250
+    assert session.stats['total_sent'] == 250
+
+
+def test_copy_mode_uses_drop_author_forward(transfer_manager):
+    """Copy mode batches server-side forwards without attribution"""
+    class RecordingClient(FakeClient):
+        async def forward_messages(self, target, message_ids, from_peer=None, **kwargs):
+            self.kwargs = kwargs
+            return await super().forward_messages(target, message_ids, from_peer)
+
+    client = RecordingClient([FakeMessage(i) for i in range(1, 6)])
+
+    session, _ = run_session(transfer_manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy'
+    })
+
+    assert [i for call in client.forwarded for i in call] == [1, 2, 3, 4, 5]
+    assert client.kwargs == {'drop_author': True}
+    assert client.sent == []
+    assert session.stats['total_sent'] == 5
+
+
+def test_copy_batch_falls_back_per_message(transfer_manager):
+    """Messages the batch forward could not copy are re-sent one by one"""
+    class PartialClient(FakeClient):
+        async def forward_messages(self, target, message_ids, from_peer=None, **kwargs):
+            await asyncio.sleep(0.001)
+            self.forwarded.append(list(message_ids))
+            return [None if i == 2 else FakeMessage(2000 + i) for i in message_ids]
+
+    client = PartialClient([FakeMessage(i) for i in range(1, 4)])
+
+    session, _ = run_session(transfer_manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy'
+    })
+
+    assert client.sent == ["msg 2"]
+    assert session.stats['total_sent'] == 3
+    assert session.stats['total_errors'] == 0
+
+
+def test_album_sent_as_one_request(transfer_manager):
+    """Album members are gathered by the scanner and sent in one send_file"""
+    history = [FakeMessage(1), FakeMessage(2, grouped_id=7), FakeMessage(3, grouped_id=7),
+               FakeMessage(4, grouped_id=7), FakeMessage(5)]
+    client = FakeClient(history)
+
+    session, _ = run_session(transfer_manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False
+    })
+
+    assert client.sent == ["msg 1", "msg 5"]
+    assert client.files == [["photo 2", "photo 3", "photo 4"]]
+    assert session.stats['total_sent'] == 5
+
+
+def test_forward_batches_never_split_albums(transfer_manager, monkeypatch):
+    """A batch that would overflow mid-album stops before the album"""
+    monkeypatch.setattr(Config, 'FORWARD_BATCH_SIZE', 4)
+    history = [FakeMessage(1), FakeMessage(2), FakeMessage(3, grouped_id=9),
+               FakeMessage(4, grouped_id=9), FakeMessage(5, grouped_id=9), FakeMessage(6)]
+    client = FakeClient(history)
+
+    run_session(transfer_manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'forward'
+    })
+
+    assert [i for call in client.forwarded for i in call] == [1, 2, 3, 4, 5, 6]
+    for call in client.forwarded:
+        album = [i for i in call if i in (3, 4, 5)]
+        assert album in ([], [3, 4, 5])
+
+
+def test_resume_from_checkpoint(tmp_path, monkeypatch, make_manager):
+    """A restarted session resumes after the saved watermark and skips sent IDs"""
+    from app.managers.progress_manager import ProgressManager
+
+    progress_manager = ProgressManager(str(tmp_path))
+    progress_manager.save_progress("src", "dst", [1, 2, 3, 5], 3, 4, 0)
+
+    manager = make_manager(progress_manager)
+    client = FakeClient([FakeMessage(i) for i in range(1, 8)])
+
+    session, statuses = run_session(manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False
+    })
+
+    assert client.sent == ["msg 4", "msg 6", "msg 7"]
+    assert "Resuming after ID 3..." in statuses
+
+    progress = progress_manager.load_progress("src", "dst")
+    assert progress['last_message_id'] == 7
+    assert progress['total_sent'] == 7
+
+    # Flushed to disk when the session ends
+    assert ProgressManager(str(tmp_path)).load_progress("src", "dst")['last_message_id'] == 7
+
+
+def test_stop_while_waiting_leaves_message_for_resume(tmp_path, make_manager):
+    """A message still waiting for its send slot when the session stops is sent on resume"""
+    from app.managers.pacing import AccountPacer
+    from app.managers.progress_manager import ProgressManager
+
+    progress_manager = ProgressManager(str(tmp_path))
+    manager = make_manager(progress_manager)
+    manager.pacer = AccountPacer(initial=0.1, min_delay=0.1, max_delay=0.1)
+
+    class StoppingClient(FakeClient):
+        async def send_message(self, target, text):
+            result = await super().send_message(target, text)
+            if len(self.sent) == 2:
+                # Message 3 is waiting out the pacing gap by now
+                asyncio.get_running_loop().call_later(0.02, manager.stop_transfer, "task_test")
+            return result
+
+    config = {'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False}
+    first = StoppingClient([FakeMessage(i) for i in range(1, 6)])
+    run_session(manager, [first], config)
+    assert first.sent == ["msg 1", "msg 2"]
+    assert progress_manager.load_progress("src", "dst")['last_message_id'] == 2
+
+    second = FakeClient([FakeMessage(i) for i in range(1, 6)])
+    run_session(make_manager(progress_manager), [second], config)
+    assert second.sent == ["msg 3", "msg 4", "msg 5"]
+
+
+@pytest.mark.parametrize("mode", ["copy", "forward"])
+def test_stop_while_batch_waits_leaves_batch_for_resume(tmp_path, monkeypatch, make_manager, mode):
+    """A forward batch still waiting for its send slot when the session stops is sent on resume"""
+    from app.managers.pacing import AccountPacer
+    from app.managers.progress_manager import ProgressManager
+
+    monkeypatch.setattr(Config, 'FORWARD_BATCH_SIZE', 5)
+    progress_manager = ProgressManager(str(tmp_path))
+    manager = make_manager(progress_manager)
+    manager.pacer = AccountPacer(initial=0.1, min_delay=0.1, max_delay=0.1)
+
+    class StoppingClient(FakeClient):
+        async def forward_messages(self, target, message_ids, from_peer=None, **kwargs):
+            result = await super().forward_messages(target, message_ids, from_peer)
+            if len(self.forwarded) == 1:
+                # The next batch is waiting out the pacing gap by now
+                asyncio.get_running_loop().call_later(0.02, manager.stop_transfer, "task_test")
+            return result
+
+    config = {'source': 'src', 'target': 'dst', 'mode': mode}
+    first = StoppingClient([FakeMessage(i) for i in range(1, 13)])
+    run_session(manager, [first], config)
+    assert len(first.forwarded) == 1
+    assert progress_manager.load_progress("src", "dst")['last_message_id'] == first.forwarded[0][-1]
+
+    second = FakeClient([FakeMessage(i) for i in range(1, 13)])
+    run_session(make_manager(progress_manager), [second], config)
+    forwarded = [i for call in first.forwarded + second.forwarded for i in call]
+    assert forwarded == list(range(1, 13))
+    assert first.sent == second.sent == []
+
+
+def test_skipped_album_member_does_not_pass_buffered_one(tmp_path, make_manager):
+    """A filtered album member cannot move the watermark past an earlier, still buffered one"""
+    from app.managers.progress_manager import ProgressManager
+
+    manager = make_manager(ProgressManager(str(tmp_path)))
+    watermarks = []
+
+    class WatchingClient(FakeClient):
+        async def send_file(self, target, file, caption=None, **kwargs):
+            watermarks.append(manager.get_session("task_test").checkpoint.watermark)
+            return await super().send_file(target, file, caption, **kwargs)
+
+    video = FakeMessage(11, grouped_id=5)
+    video.photo, video.video = None, "video 11"
+    client = WatchingClient([FakeMessage(10, grouped_id=5), video])
+
+    session, _ = run_session(manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False, 'file_types': ['images']
+    })
+
+    assert client.files == ["photo 10"]
+    assert watermarks == [0]
+    assert session.checkpoint.watermark == 11
+
+
+def test_scan_records_source_head(tmp_path, make_manager):
+    """A pair stays pending while its scanned source head is past the watermark"""
+    from app.managers.sqlite_progress_manager import SQLiteProgressManager
+
+    progress_manager = SQLiteProgressManager(str(tmp_path / "progress.db"))
+    manager = make_manager(progress_manager)
+
+    class StoppingClient(FakeClient):
+        async def send_message(self, target, text):
+            result = await super().send_message(target, text)
+            if len(self.sent) == 2:
+                manager.stop_transfer("task_test")
+            return result
+
+    config = {'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False}
+    run_session(manager, [StoppingClient([FakeMessage(i) for i in range(1, 6)])], config)
+
+    pending = progress_manager.get_pending_pairs()
+    assert [(p['key'], p['last_message_id'], p['source_max_id']) for p in pending] == [("channel_src_to_dst", 2, 5)]
+
+    run_session(manager, [FakeClient([FakeMessage(i) for i in range(1, 6)])], config)
+    assert progress_manager.get_pending_pairs() == []
+    progress_manager.close()
+
+
+def test_sent_messages_are_mapped(tmp_path, monkeypatch, make_manager):
+    """Forward results, single sends and album sends are recorded in the MessageMap"""
+    from app.managers.message_map import MessageMap
+
+    message_map = MessageMap(str(tmp_path / "map.db"))
+    manager = make_manager(message_map=message_map)
+
+    client = FakeClient([FakeMessage(1), FakeMessage(2)])
+    run_session(manager, [client], {'source': 'src', 'target': 'dst', 'mode': 'forward'})
+    key = message_map.pair_key("src", "dst")
+    assert message_map.get_range(key, 1, 2) == {1: [2001], 2: [2002]}
+
+    client = FakeClient([FakeMessage(3), FakeMessage(4, grouped_id=9), FakeMessage(5, grouped_id=9)])
+    run_session(manager, [client], {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False
+    })
+    assert message_map.get_targets(key, 3) == [1001]
+    assert message_map.get_targets(key, 4) == [1010]
+    assert message_map.get_source(key, 1011) == 5
+    message_map.close()
+
+
+def test_sync_applies_edits_and_deletes(tmp_path, monkeypatch, make_manager):
+    """Sync edits target copies of edited messages and deletes copies of deleted ones"""
+    from datetime import datetime, timezone
+    from app.managers.message_map import MessageMap
+
+    message_map = MessageMap(str(tmp_path / "map.db"))
+    key = message_map.pair_key("src", "dst")
+    message_map.record(key, [(i, 100 + i) for i in range(1, 251)])
+    message_map.set_last_sync(key, datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+
+    history = {}
+    for i in range(1, 251):
+        if i % 50 == 0:
+            continue  # deleted in source
+        message = FakeMessage(i, text=f"edited {i}" if i in (7, 120) else None)
+        message.edit_date = datetime(2024, 6, 1, tzinfo=timezone.utc) if i in (7, 120) else None
+        history[i] = message
+    history[8].edit_date = datetime(2023, 1, 1, tzinfo=timezone.utc)  # edited before last sync
+
+    class SyncClient(FakeClient):
+        def __init__(self):
+            super().__init__()
+            self.get_calls = []
+            self.edits = []
+            self.deleted = []
+
+        async def get_messages(self, entity, ids=None):
+            self.get_calls.append(list(ids))
+            return [history.get(i) for i in ids]
+
+        async def edit_message(self, entity, message_id, text):
+            self.edits.append((message_id, text))
+
+        async def delete_messages(self, entity, message_ids):
+            self.deleted.extend(message_ids)
+
+    manager = make_manager(message_map=message_map)
+    client = SyncClient()
+    statuses = []
+    manager.create_session("sync_test", {'source': 'src', 'target': 'dst', 'mode': 'copy'})
+    asyncio.run(manager.start_sync("sync_test", [client], lambda sid, text: statuses.append(text)))
+
+    assert [len(c) for c in client.get_calls] == [100, 100, 50]
+    assert client.edits == [(107, "edited 7"), (220, "edited 120")]
+    assert client.deleted == [150, 200, 250, 300, 350]
+    assert statuses[-1] == "Sync completed!"
+    assert message_map.get_targets(key, 50) == []
+    assert message_map.count(key) == 245
+    assert message_map.get_last_sync(key) > datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    message_map.close()
+
+
+def test_sync_handlers_ignore_empty_deletions(tmp_path, make_manager):
+    """A deletion update without IDs is ignored; one with IDs deletes the mapped copies"""
+    from types import SimpleNamespace
+    from telethon import events
+    from app.managers.message_map import MessageMap
+
+    message_map = MessageMap(str(tmp_path / "map.db"))
+    message_map.record(message_map.pair_key("src", "dst"), [(1, 101), (2, 102)])
+
+    class DeletingClient(FakeClient):
+        deleted = []
+
+        async def delete_messages(self, entity, message_ids):
+            self.deleted = self.deleted + list(message_ids)
+
+    manager = make_manager(message_map=message_map)
+    manager.create_session("sync_test", {'source': 'src', 'target': 'dst', 'mode': 'copy'})
+    client = DeletingClient()
+
+    async def scenario():
+        manager.attach_sync_handlers("sync_test", client, "src", "dst")
+        on_deleted = next(c for c, e in client.handlers if isinstance(e, events.MessageDeleted))
+        await on_deleted(SimpleNamespace(deleted_ids=[]))
+        await on_deleted(SimpleNamespace(deleted_ids=[2]))
+
+    asyncio.run(scenario())
+    assert client.deleted == [102]
+    message_map.close()
+
+
+def test_sync_reads_skip_send_limits(tmp_path, make_manager):
+    """Sync reads take no send tokens or pacing, wait out FloodWaits and the sync waits for a slot"""
+    from telethon.errors import FloodWaitError
+    from app.managers.message_map import MessageMap
+
+    message_map = MessageMap(str(tmp_path / "map.db"))
+    key = message_map.pair_key("src", "dst")
+    message_map.record(key, [(i, 100 + i) for i in range(1, 151)])
+
+    class SyncClient(FakeClient):
+        reads = 0
+
+        async def get_messages(self, entity, ids=None):
+            self.reads += 1
+            if self.reads == 1:
+                raise FloodWaitError(request=None, capture=0)
+            messages = [None if i in (50, 120) else FakeMessage(i) for i in ids]
+            for message in filter(None, messages):
+                message.edit_date = None
+            return messages
+
+        async def delete_messages(self, entity, message_ids):
+            self.deleted = getattr(self, 'deleted', []) + list(message_ids)
+
+    manager = make_manager(message_map=message_map)
+    manager.set_max_concurrent(1)
+    limited, paced_floods = [], []
+    check_rate_limit = manager.check_rate_limit
+
+    async def counting_check(account_key, target, session_key=None):
+        limited.append(session_key in manager.rate_limiter.fair_queue.weights)
+        return await check_rate_limit(account_key, target, session_key)
+
+    manager.check_rate_limit = counting_check
+    manager.pacer.record_flood_wait = lambda *args: paced_floods.append(args)
+    client = SyncClient()
+    manager.create_session("sync_test", {'source': 'src', 'target': 'dst', 'account_ids': ['acc1']})
+
+    async def scenario():
+        manager._active.add("other")
+        task = asyncio.create_task(manager.start_sync("sync_test", [client], lambda sid, text: None))
+        await asyncio.sleep(0.01)
+        assert manager.get_queue_position("sync_test") == 1
+        manager._release("other")
+        await task
+
+    asyncio.run(scenario())
+
+    assert client.reads == 3  # FloodWait + one read per chunk
+    assert client.deleted == [150, 220]
+    assert limited == [True, True]  # One token per delete RPC only, with a fair share
+    assert paced_floods == []
+    assert manager.get_session("sync_test").stats['flood_waits'] == 1
+    assert "sync_test" not in manager.rate_limiter.fair_queue.weights
+    assert not manager._active
+    message_map.close()
+
+
+class TargetLogClient(FakeClient):
+    """Appends each sent text to a file standing in for the target channel; optionally hangs after N sends"""
+    def __init__(self, history, target_log, hang_after=None):
+        super().__init__(history)
+        self.target_log = target_log
+        self.hang_after = hang_after
+
+    async def send_message(self, target, text):
+        if self.hang_after is not None and len(self.sent) >= self.hang_after:
+            await asyncio.Event().wait()
+        await super().send_message(target, text)
+        with open(self.target_log, 'a+', encoding='utf-8') as f:
+            f.seek(0)
+            position = len(f.read().splitlines())
+            f.write(text + "\n")
+        # Target IDs follow the log order, as served by get_messages
+        return FakeMessage(900 + position, text)
+
+    async def get_messages(self, entity, limit=None, ids=None):
+        from datetime import datetime, timezone
+        if not os.path.exists(self.target_log):
+            return []
+        with open(self.target_log, encoding='utf-8') as f:
+            texts = f.read().splitlines()
+        messages = [FakeMessage(900 + i, text) for i, text in enumerate(texts)]
+        for message in messages:
+            message.date = datetime.now(timezone.utc)
+        return list(reversed(messages))[:limit]
+
+
+# Runs a transfer in a child process that is killed while its send after `sent` is in flight
+# (every message carries the optional third argument as its text)
+CRASHING_RUN = """
+import asyncio, os, sys
+from app.managers.intent_log import IntentLog
+from app.managers.pacing import AccountPacer
+from app.managers.progress_manager import ProgressManager
+from app.managers.rate_limiter import RateLimiter
+from app.managers.transfer_manager import TransferManager
+from tests.test_transfer_manager import FakeMessage, TargetLogClient
+
+state_dir, sent = sys.argv[1], int(sys.argv[2])
+text = sys.argv[3] if len(sys.argv) > 3 else None
+intent_log = IntentLog(os.path.join(state_dir, "intents.db"))
+manager = TransferManager(ProgressManager(os.path.join(state_dir, "progress")), intent_log=intent_log)
+manager.rate_limiter = RateLimiter(global_rate=0, account_rate=0, target_rate=0)
+manager.pacer = AccountPacer(initial=0, min_delay=0, max_delay=0)
+client = TargetLogClient([FakeMessage(i, text) for i in range(1, 21)], os.path.join(state_dir, "target.log"), sent)
+
+async def main():
+    manager.create_session("t", {'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False})
+    asyncio.ensure_future(manager.start_mass_transfer("t", [client], lambda sid, text: None))
+    while len(client.sent) < sent:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.1)
+    intent_log.flush()
+    os._exit(0)
+
+asyncio.run(main())
+"""
+
+
+
+def test_intents_resolved_on_sqlite_backend(tmp_path, make_manager):
+    """Checkpointed sends resolve their intents with the SQLite progress backend too"""
+    from app.managers.sqlite_progress_manager import SQLiteProgressManager
+    from app.managers.intent_log import IntentLog
+
+    progress_manager = SQLiteProgressManager(str(tmp_path / "progress.db"))
+    intent_log = IntentLog(str(tmp_path / "intents.db"))
+    manager = make_manager(progress_manager, intent_log=intent_log)
+    key = intent_log.pair_key("src", "dst")
+
+    class PeekingClient(FakeClient):
+        async def send_message(self, target, text):
+            self.pending_during.append(len(intent_log.pending(key)))
+            return await super().send_message(target, text)
+
+    client = PeekingClient([FakeMessage(i) for i in range(1, 6)])
+    client.pending_during = []
+    run_session(manager, [client], {'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False})
+
+    assert client.sent == [f"msg {i}" for i in range(1, 6)]
+    assert all(count >= 1 for count in client.pending_during)
+    assert intent_log.pending(key) == []
+    intent_log.close()
+    progress_manager.close()
+
+@pytest.mark.parametrize("sent", [7, 13])
+def test_no_duplicates_after_kill(tmp_path, monkeypatch, sent, make_manager):
+    """A run killed mid-send resumes without posting any message twice"""
+    import subprocess
+    import sys
+    from app.managers.progress_manager import ProgressManager
+    from app.managers.intent_log import IntentLog
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", CRASHING_RUN, str(tmp_path), str(sent)], cwd=root, check=True, timeout=60)
+    target_log = str(tmp_path / "target.log")
+    with open(target_log, encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == sent
+
+    # Restart over the same state
+    intent_log = IntentLog(str(tmp_path / "intents.db"))
+    manager = make_manager(ProgressManager(str(tmp_path / "progress")), intent_log=intent_log)
+    client = TargetLogClient([FakeMessage(i) for i in range(1, 21)], target_log)
+    run_session(manager, [client], {'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False})
+
+    with open(target_log, encoding='utf-8') as f:
+        assert f.read().splitlines() == [f"msg {i}" for i in range(1, 21)]
+    assert manager.progress_manager.load_progress("src", "dst")['total_sent'] == 20
+    assert intent_log.pending(intent_log.pair_key("src", "dst")) == []
+    intent_log.close()
+
+
+
+def test_no_duplicates_after_kill_with_identical_content(tmp_path, make_manager):
+    """Identical messages are matched 1:1 after the last checkpointed copy, not against earlier copies"""
+    import subprocess
+    import sys
+    from app.managers.progress_manager import ProgressManager
+    from app.managers.intent_log import IntentLog
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", CRASHING_RUN, str(tmp_path), "13", "same"], cwd=root, check=True, timeout=60)
+    target_log = str(tmp_path / "target.log")
+
+    intent_log = IntentLog(str(tmp_path / "intents.db"))
+    recovered = len(intent_log.pending(intent_log.pair_key("src", "dst")))
+    manager = make_manager(ProgressManager(str(tmp_path / "progress")), intent_log=intent_log)
+    client = TargetLogClient([FakeMessage(i, "same") for i in range(1, 21)], target_log)
+    session, _ = run_session(manager, [client], {'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False})
+
+    with open(target_log, encoding='utf-8') as f:
+        assert f.read().splitlines() == ["same"] * 20
+    assert 0 < session.stats['intents_recovered'] < recovered
+    assert manager.progress_manager.load_progress("src", "dst")['total_sent'] == 20
+    assert intent_log.pending(intent_log.pair_key("src", "dst")) == []
+    intent_log.close()
+
+def test_live_mode_follows_new_messages(transfer_manager):
+    """After the backfill, live messages are sent once each until the session stops"""
+    from types import SimpleNamespace
+    from telethon import events
+
+    client = FakeClient([FakeMessage(i) for i in range(1, 4)])
+    statuses = []
+    transfer_manager.create_session("live_test", {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False, 'live': True
+    })
+
+    async def scenario():
+        task = asyncio.create_task(transfer_manager.start_mass_transfer(
+            "live_test", [client], lambda sid, text: statuses.append(text)
+        ))
+        while len(client.sent) < 3:
+            await asyncio.sleep(0.001)
+        on_new = next(c for c, e in client.handlers if isinstance(e, events.NewMessage))
+
+        await on_new(SimpleNamespace(message=FakeMessage(3)))  # already backfilled
+        await on_new(SimpleNamespace(message=FakeMessage(4)))
+        await on_new(SimpleNamespace(message=FakeMessage(5)))
+        while len(client.sent) < 5:
+            await asyncio.sleep(0.001)
+
+        transfer_manager.stop_transfer("live_test")
+        await task
+
+    asyncio.run(scenario())
+
+    assert client.sent == [f"msg {i}" for i in range(1, 6)]
+    assert "Live: following new messages after ID 3..." in statuses
+    assert client.handlers == []
+
+
+def test_admission_queue_limits_concurrent_sessions(transfer_manager):
+    """Sessions beyond the limit wait in FIFO order and are told their position"""
+    transfer_manager.set_max_concurrent(1)
+    gate = asyncio.Event()
+
+    class GatedClient(FakeClient):
+        async def send_message(self, target, text):
+            await gate.wait()
+            return await super().send_message(target, text)
+
+    client = GatedClient([FakeMessage(1)])
+    statuses = {name: [] for name in ('first', 'second', 'third')}
+    for name in statuses:
+        transfer_manager.create_session(name, {'source': 'src', 'target': 'dst', 'mode': 'copy',
+                                               'copy_via_forward': False})
+
+    async def scenario():
+        tasks = [
+            asyncio.create_task(transfer_manager.start_mass_transfer(
+                name, [client], lambda sid, text: statuses[sid].append(text)))
+            for name in statuses
+        ]
+        await asyncio.sleep(0.01)
+        assert transfer_manager.get_queue_position('second') == 1
+        assert transfer_manager.get_queue_position('third') == 2
+        transfer_manager.stop_transfer('second')
+        assert transfer_manager.get_queue_position('third') == 1
+        gate.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert "Queued: position 1 of 2 (1 running)" in statuses['second']
+    assert statuses['second'][-1] == "Stopped before start"
+    assert "Queued: position 1 of 1 (1 running)" in statuses['third']
+    assert statuses['third'][-1] == "Completed Successfully!"
+    assert client.sent == ["msg 1", "msg 1"]
+    assert not transfer_manager._active
+
+
+def test_failing_sender_ends_session_with_error(transfer_manager, monkeypatch):
+    """An unexpected sender error stops the scanner too instead of hanging on the full queue"""
+    monkeypatch.setattr(Config, 'TRANSFER_QUEUE_SIZE', 2)
+    client = FakeClient([FakeMessage(i) for i in range(1, 21)])
+    original = transfer_manager.process_unit
+
+    async def process_unit(session, scheduler, unit, *args, **kwargs):
+        if unit[0].id == 3:
+            raise RuntimeError("boom")
+        return await original(session, scheduler, unit, *args, **kwargs)
+
+    monkeypatch.setattr(transfer_manager, 'process_unit', process_unit)
+    statuses = []
+    transfer_manager.create_session("task_test", {
+        'source': 'src', 'target': 'dst', 'mode': 'copy', 'copy_via_forward': False
+    })
+
+    async def scenario():
+        await asyncio.wait_for(transfer_manager.start_mass_transfer(
+            "task_test", [client], lambda sid, text: statuses.append(text)
+        ), 5)
+    asyncio.run(scenario())
+
+    session = transfer_manager.get_session("task_test")
+    assert statuses[-1] == "Error: boom"
+    assert session.status == "Error: boom"
+    assert not session.is_running
+    assert not transfer_manager._active